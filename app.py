@@ -1,17 +1,23 @@
 import dash
-from dash import dcc, html, Input, Output, dash_table
+from dash import dcc, html, Input, Output, State, ClientsideFunction, Patch
 import dash_bootstrap_components as dbc
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import plotly.express as px
 import io, base64
-import joblib 
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
 import numpy as np
-import plotly.graph_objects as go
 import os
-import statsmodels
+from ltbi.registro import RegistroModelos
+from ltbi.secciones import CacheSecciones, figura_evolucion_regiones
+from ltbi.densidad import CacheDensidad
+from ltbi.dispersion import ZOOM_COMPLETO, puntos_en_ventana
+from ltbi.figuras_modelo import CacheFigurasModelo
+from ltbi.recarga import VigilanteDatos
+from ltbi.prediccion import registrar_rutas as registrar_rutas_prediccion
+from ltbi.cache import serializar_figura
+from ltbi.cache_compartida import CacheCallbacks, registrar_rutas as registrar_rutas_cache
+from ltbi import metricas
+from ltbi.perfilador import Perfilador, registrar_rutas as registrar_rutas_perfilador
+from ltbi.trabajos import GestorTrabajos
+from ltbi.bootstrap import intervalos_bootstrap
 # -------------------------------------
 # Configuración general
 # -------------------------------------
@@ -22,15 +28,41 @@ server = app.server
 # -------------------------------------
 # Cargar datos
 # -------------------------------------
-df_imputado = pd.read_csv("data/df_imputado.csv")
+# Instantánea con df_imputado (tablas tipadas desde los CSV más recientes de la
+# OMS), el cubo región × año, los mapas por año y los estadísticos de EDA3. Se
+# renueva en segundo plano cuando llega una publicación nueva a data/; cada
+# callback toma `datos.actual` una sola vez y trabaja sobre esa instantánea.
+datos = VigilanteDatos()
 
 # --- Cargar modelos ---
-# --- Cargar packs ---
-modelos_pack = {
-    "XGBoost": joblib.load("models/xgboost_pack.pkl"),
-    "Random Forest": joblib.load("models/random_forest_pack.pkl"),
-    "Gradient Boosting": joblib.load("models/gradient_boosting_pack.pkl")
-}
+# --- Registro perezoso de packs (índice + arreglos en mmap, modelo bajo demanda) ---
+modelos_pack = RegistroModelos("models")
+
+# --- Figuras de "Visualización del modelo" precalculadas por modelo/versión ---
+figuras_modelo = CacheFigurasModelo(modelos_pack)
+figuras_modelo.precalentar()
+densidad_modelo = CacheDensidad(modelos_pack)
+
+# --- API de predicción en línea (micro-lotes) sobre el servidor Flask ---
+servicio_prediccion = registrar_rutas_prediccion(server, modelos_pack)
+
+
+def version_vigente():
+    """Versión de los datos y de cada pack: toda salida cacheada depende de ella."""
+    return (datos.actual.version, tuple(modelos_pack.version(m) for m in modelos_pack))
+
+
+# --- Caché de salidas de callbacks compartida entre workers (en disco) ---
+cache_callbacks = registrar_rutas_cache(server, CacheCallbacks(version_vigente))
+
+# --- Métricas por callback en formato Prometheus (GET /metrics) ---
+metricas.registrar_rutas(server)
+
+# --- Perfiles bajo demanda de un callback (admin, ver ltbi/perfilador.py) ---
+perfilador = metricas.usar_perfilador(registrar_rutas_perfilador(server, Perfilador()))
+
+# --- Trabajos pesados en procesos aparte (callbacks en segundo plano) ---
+trabajos = GestorTrabajos(version_vigente)
 # --- Evaluar métricas ---
 # -------------------------------------
 # Función auxiliar para convertir figuras Matplotlib a imágenes
@@ -80,13 +112,20 @@ app.layout = dbc.Container(
     Output("content-area", "children"),
     [Input(f"btn-{i}", "n_clicks") for i in range(0, 9)]
 )
+@metricas.medir()
 def mostrar_contenido(*args):
     ctx = dash.callback_context
     if not ctx.triggered:
         return html.P("Selecciona una sección del informe para comenzar.", className="text-muted text-center")
 
     boton_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    return secciones.obtener(boton_id)
+
 
+# -------------------------------------
+# Construcción de cada sección (se cachea ya serializada en `secciones`)
+# -------------------------------------
+def construir_seccion(boton_id):
     if boton_id == "btn-0":
         return dbc.Card([
             dbc.CardBody([
@@ -901,6 +940,8 @@ def mostrar_contenido(*args):
 
 
     elif boton_id == "btn-7":
+        instantanea = datos.actual
+        df_imputado = instantanea.df_imputado
         tabs = dcc.Tabs([
             # === Pestaña: EDA ===
             dcc.Tab(label="EDA", children=[
@@ -928,7 +969,8 @@ def mostrar_contenido(*args):
                 html.Hr(),
 
                 html.H5("Mapa mundial — Prevalencia LTBI"),
-                dcc.Graph(id="mapa-prevalencia-global")
+                dcc.Graph(id="mapa-prevalencia-global"),
+                dcc.Store(id="store-anio-mapa")
             ]),
 
             # === Pestaña: EDA2 ===
@@ -937,15 +979,7 @@ def mostrar_contenido(*args):
                 html.H3("Evolución por región"),
                 html.Hr(style={"border": "1px solid #ccc", "margin": "40px 0"}),
 
-                dcc.Graph(
-                    figure=px.line(
-                        df_imputado.groupby(["anio", "region_OMS"], as_index=False)
-                        .agg(media_prevalencia=("prevalencia_contactos", "mean")),
-                        x="anio", y="media_prevalencia", color="region_OMS",
-                        title="Evolución de la prevalencia LTBI por región OMS",
-                        markers=True, template="plotly_white"
-                    )
-                )
+                dcc.Graph(figure=figura_evolucion_regiones(instantanea.cubo))
             ]),
 
             # === Pestaña: EDA3 ===
@@ -970,7 +1004,7 @@ def mostrar_contenido(*args):
                 html.Br(),
                 html.Hr(style={"border": "1px solid #ccc", "margin": "40px 0"}),
                 html.H3("Resumen estadístico general"),
-                html.Div(id="tabla-resumen-eda")
+                html.Div(id="tabla-resumen-eda", children=instantanea.estadisticas.tabla_componente())
             ]),
 
             # === Pestaña: Visualización del modelo ===
@@ -984,6 +1018,17 @@ def mostrar_contenido(*args):
                         value=list(modelos_pack.keys())[0],
                         clearable=False,
                         style={"width": "50%"}
+                    ),
+                    dcc.Checklist(
+                        id="checklist-tendencia",
+                        options=[
+                            {"label": "Banda de confianza 95 %", "value": "bandas"},
+                            {"label": "Suavizado LOWESS", "value": "suavizado"}
+                        ],
+                        value=[],
+                        inline=True,
+                        inputStyle={"marginRight": "5px", "marginLeft": "15px"},
+                        style={"marginTop": "10px"}
                     )
                 ], style={"marginBottom": "30px"}),
                 html.Hr(style={"border": "1px solid #ccc", "margin": "40px 0"}),
@@ -997,11 +1042,28 @@ def mostrar_contenido(*args):
                     "gridTemplateColumns": "1fr 1fr",
                     "gridGap": "20px",
                     "padding": "10px 40px"
-                })
+                }),
+                html.Hr(style={"border": "1px solid #ccc", "margin": "40px 0"}),
+                html.H4("Densidad Reales vs Predichos"),
+                dcc.RadioItems(
+                    id="radio-escala-densidad",
+                    options=[
+                        {"label": "Conteo", "value": "conteo"},
+                        {"label": "Log-conteo", "value": "log"}
+                    ],
+                    value="log",
+                    inline=True,
+                    inputStyle={"marginRight": "5px", "marginLeft": "15px"}
+                ),
+                dcc.Graph(id="grafico-densidad", style={"height": "500px", "padding": "0 40px"})
             ]),
 
             # === Pestaña: Métricas de Modelos ===
             dcc.Tab(label="Métricas de Modelos", children=[
+                dcc.Store(id="store-metricas", data={
+                    "modelos": list(modelos_pack.keys()),
+                    "metricas": {nombre: modelos_pack.metricas(nombre) for nombre in modelos_pack}
+                }),
                 html.Hr(style={"border": "1px solid #ccc", "margin": "40px 0"}),
                 html.H3("Análisis de Métricas de Modelos"),
 
@@ -1024,6 +1086,25 @@ def mostrar_contenido(*args):
                     "padding": "0 40px"
                 }),
 
+                # --- Intervalos de confianza bootstrap (trabajo en segundo plano) ---
+                html.H4("Intervalos de confianza (bootstrap, 95 %)"),
+                html.Div([
+                    html.Label("Remuestras:", style={"fontWeight": "bold", "marginRight": "10px"}),
+                    dcc.Dropdown(
+                        id="dropdown-remuestras-bootstrap",
+                        options=[{"label": f"{n:,}", "value": n} for n in (1000, 5000, 20000)],
+                        value=5000,
+                        clearable=False,
+                        style={"width": "150px", "display": "inline-block", "verticalAlign": "middle"}
+                    ),
+                    dbc.Button("Calcular", id="btn-bootstrap", color="primary", className="ms-3"),
+                    dbc.Button("Cancelar", id="btn-cancelar-bootstrap", color="secondary",
+                               outline=True, className="ms-2", disabled=True),
+                ], style={"marginBottom": "15px", "padding": "0 40px"}),
+                html.Div(dbc.Progress(id="progreso-bootstrap", value=0, label=""),
+                         style={"marginBottom": "15px", "padding": "0 40px"}),
+                html.Div(id="tabla-bootstrap", style={"marginBottom": "40px", "padding": "0 40px"}),
+
                 html.Hr(style={"border": "1px solid #ccc", "margin": "40px 0"}),
 
                 html.H3("Comparador de métricas entre modelos"),
@@ -1141,6 +1222,10 @@ def mostrar_contenido(*args):
         ])
 
 
+secciones = CacheSecciones(construir_seccion, version=version_vigente)
+secciones.precalentar([f"btn-{i}" for i in range(0, 9)])
+
+
 # ====================================================
 # 📊 CALLBACKS para los gráficos de análisis EDA (btn-7)
 # ====================================================
@@ -1148,86 +1233,54 @@ def mostrar_contenido(*args):
 @app.callback(
     [
         Output("histograma-variable-eda", "figure"),
-        Output("boxplot-variable-eda", "figure"),
-        Output("tabla-resumen-eda", "children")
+        Output("boxplot-variable-eda", "figure")
     ],
     Input("dropdown-variable-eda", "value")
 )
+@metricas.medir()
+@cache_callbacks.memoizar()
 def actualizar_analisis_eda(variable):
     if variable is None:
         raise dash.exceptions.PreventUpdate
 
-    # --- Histograma ---
-    fig_hist = px.histogram(
-        df_imputado, x=variable, nbins=30, marginal="rug",
-        title=f"Histograma — {variable}",
-        color_discrete_sequence=["#2C3E50"]
-    )
-    fig_hist.update_layout(template="plotly_white")
-
-    # --- Boxplot ---
-    fig_box = px.box(
-        df_imputado, y=variable, points="all",
-        title=f"Boxplot — {variable}",
-        color_discrete_sequence=["#2C3E50"]
-    )
-    fig_box.update_layout(template="plotly_white")
-
-    # --- Tabla resumen ---
-    num_cols = df_imputado.select_dtypes(include="number").columns
-    stats = pd.DataFrame({
-        "Promedio": df_imputado[num_cols].mean(),
-        "Varianza": df_imputado[num_cols].var(),
-        "Máximo": df_imputado[num_cols].max(),
-        "Mínimo": df_imputado[num_cols].min()
-    }).round(2)
-
-    table = dbc.Table.from_dataframe(stats, striped=True, bordered=True, hover=True)
-
-    return fig_hist, fig_box, table
+    return datos.actual.figuras_eda.obtener(variable)
 
 
 @app.callback(
     [
         Output("grafico-evolucion-global", "figure"),
         Output("heatmap-region-anio", "figure"),
-        Output("tarjetas-resumen", "children"),
-        Output("mapa-prevalencia-global", "figure")
+        Output("tarjetas-resumen", "children")
     ],
     Input("slider-rango-anios", "value")
 )
+@metricas.medir()
+@cache_callbacks.memoizar()
 def actualizar_vista_global(rango_anios):
     anio_min, anio_max = rango_anios
+    cubo_global = datos.actual.cubo
 
-    df_filtrado = df_imputado[
-        (df_imputado["anio"] >= anio_min) & (df_imputado["anio"] <= anio_max)
-    ]
-
-    evol_global = df_filtrado.groupby("anio", as_index=False).agg(
-        media_prevalencia=("prevalencia_contactos", "mean")
-    )
-    fig_linea = px.line(
-        evol_global, x="anio", y="media_prevalencia",
-        markers=True, title=f"Evolución global LTBI ({anio_min}–{anio_max})",
-        color_discrete_sequence=["#2C3E50"], template="plotly_white"
-    )
+    evol_global = cubo_global.serie_global("prevalencia_contactos", anio_min, anio_max)
+    # --- Heatmap por región (desde el cubo de agregados) ---
+    heatmap_data = cubo_global.matriz_region_anio("prevalencia_contactos", anio_min, anio_max)
 
-    # --- Heatmap por región ---
-    heat_data = df_filtrado.groupby(["region_OMS", "anio"], as_index=False).agg(
-        media_prevalencia=("prevalencia_contactos", "mean")
-    )
-    heatmap_data = heat_data.pivot(index="region_OMS", columns="anio", values="media_prevalencia")
-    fig_heat = px.imshow(
-        heatmap_data, color_continuous_scale="ice",
-        labels=dict(x="Año", y="Región OMS", color="Prevalencia (%)"),
-        title="Prevalencia promedio LTBI por región y año"
-    )
+    with metricas.fase("figura"):
+        fig_linea = px.line(
+            evol_global, x="anio", y="media_prevalencia",
+            markers=True, title=f"Evolución global LTBI ({anio_min}–{anio_max})",
+            color_discrete_sequence=["#2C3E50"], template="plotly_white"
+        )
+        fig_heat = px.imshow(
+            heatmap_data, color_continuous_scale="ice",
+            labels=dict(x="Año", y="Región OMS", color="Prevalencia (%)"),
+            title="Prevalencia promedio LTBI por región y año"
+        )
 
     # --- Tarjetas resumen ---
     tarjetas = [
         ("Años Analizados", anio_max - anio_min + 1, "#2980B9"),
-        ("Prevalencia Promedio", f"{df_filtrado['prevalencia_contactos'].mean():.2f}%", "#27AE60"),
-        ("Diferencia Promedio (Sup - Inf)", f"{(df_filtrado['prevalencia_superior'] - df_filtrado['prevalencia_inferior']).mean():.2f}%", "#E67E22")
+        ("Prevalencia Promedio", f"{cubo_global.media('prevalencia_contactos', anio_min, anio_max):.2f}%", "#27AE60"),
+        ("Diferencia Promedio (Sup - Inf)", f"{cubo_global.media('amplitud_intervalo', anio_min, anio_max):.2f}%", "#E67E22")
     ]
     cards = [
         html.Div(
@@ -1246,189 +1299,153 @@ def actualizar_vista_global(rango_anios):
         for titulo, valor, color in tarjetas
     ]
 
-    # --- Mapa mundial ---
-    anio_sel = anio_max
-    df_anio = df_filtrado[df_filtrado["anio"] == anio_sel]
-    fig_map = px.choropleth(
-        df_anio,
-        locations="country",
-        locationmode="country names",
-        color="prevalencia_contactos",
-        hover_name="country",
-        color_continuous_scale="ice",
-        title=f"Mapa mundial de prevalencia LTBI ({anio_sel})",
-        labels={"prevalencia_contactos": "Prevalencia (%)"}
-    )
-    fig_map.update_layout(margin=dict(r=0, t=50, l=0, b=0))
+    # Figuras ya en forma JSON: así se guardan en la caché compartida y un
+    # acierto no reconstruye (ni valida) el go.Figure al leerlo
+    return serializar_figura(fig_linea), serializar_figura(fig_heat), cards
 
-    return fig_linea, fig_heat, cards, fig_map
 
-from dash import Input, Output
-import joblib
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-import io
-import base64
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+# --- Mapa mundial: sólo depende de anio_max, se sirve desde la caché por año ---
+# El store guarda (año, versión de los datos): tras una recarga se redibuja
+# aunque el año no cambie.
+@app.callback(
+    [
+        Output("mapa-prevalencia-global", "figure"),
+        Output("store-anio-mapa", "data")
+    ],
+    Input("slider-rango-anios", "value"),
+    State("store-anio-mapa", "data")
+)
+@metricas.medir()
+def actualizar_mapa(rango_anios, mapa_previo):
+    instantanea = datos.actual
+    mapa_sel = [rango_anios[1], instantanea.version]
+    if mapa_sel == mapa_previo:
+        raise dash.exceptions.PreventUpdate
+    return instantanea.mapas.obtener(rango_anios[1]), mapa_sel
+
 
 @app.callback(
     [Output("grafico1", "figure"),
      Output("grafico2", "figure"),
      Output("grafico3", "figure"),
      Output("grafico4", "figure")],
-    [Input("dropdown-modelo", "value")]
+    [Input("dropdown-modelo", "value"),
+     Input("checklist-tendencia", "value")]
 )
-def actualizar_visualizacion(modelo_sel):
-    pack = modelos_pack[modelo_sel]
+@metricas.medir()
+@cache_callbacks.memoizar()
+def actualizar_visualizacion(modelo_sel, opciones_tendencia):
+    return figuras_modelo.obtener(modelo_sel, opciones_tendencia)
 
-    y_test = pack["y_test"]
-    y_pred = pack["y_pred"]
-    metricas = pack["metricas"]
-
-    # Paleta azul oscuro consistente
-    azul_principal = "#1A5276"
-    azul_suave = "#2874A6"
-    azul_claro = "#85C1E9"
-
-    # --- 1️⃣ Real vs Predicho ---
-    fig1 = px.scatter(
-        x=y_test, y=y_pred,
-        title=f"{modelo_sel}: Reales vs Predichos",
-        labels={"x": "Reales", "y": "Predichos"},
-        color_discrete_sequence=[azul_principal]
-    )
-    fig1.add_trace(go.Scatter(
-        x=[min(y_test), max(y_test)],
-        y=[min(y_test), max(y_test)],
-        mode="lines",
-        line=dict(color="#E74C3C", dash="dash"),
-        name="Ideal"
-    ))
-    fig1.update_layout(template="plotly_white", font=dict(color="#2C3E50"))
-
-    # --- 2️⃣ Curva de regresión ---
-    fig2 = px.scatter(
-        x=y_test, y=y_pred,
-        trendline="ols",
-        title=f"{modelo_sel}: Curva de regresión ajustada",
-        labels={"x": "Reales", "y": "Predichos"},
-        color_discrete_sequence=[azul_suave]
-    )
-    fig2.update_traces(marker=dict(size=6))
-    fig2.update_layout(template="plotly_white", font=dict(color="#2C3E50"))
-
-    # --- 3️⃣ Residuos vs Predicción ---
-    residuos = y_test - y_pred
-    fig3 = px.scatter(
-        x=y_pred, y=residuos,
-        title=f"{modelo_sel}: Residuos vs Predicción",
-        labels={"x": "Predichos", "y": "Residuos"},
-        color_discrete_sequence=[azul_principal]
-    )
-    fig3.add_hline(y=0, line_dash="dash", line_color="#E74C3C")
-    fig3.update_layout(template="plotly_white", font=dict(color="#2C3E50"))
-
-    # --- 4️⃣ Distribución Reales vs Predichos ---
-    fig4 = go.Figure()
-    fig4.add_trace(go.Histogram(x=y_test, name="Reales", opacity=0.6, marker_color=azul_principal))
-    fig4.add_trace(go.Histogram(x=y_pred, name="Predichos", opacity=0.6, marker_color=azul_claro))
-    fig4.update_layout(
-        barmode="overlay",
-        title=f"{modelo_sel}: Distribución Reales vs Predichos",
-        template="plotly_white",
-        font=dict(color="#2C3E50"),
-        legend=dict(title="Tipo de dato")
-    )
-    fig4.update_traces(opacity=0.5)
 
+# --- Densidad 2D Reales vs Predichos (grilla cacheada por modelo) ---
+@app.callback(
+    Output("grafico-densidad", "figure"),
+    [Input("dropdown-modelo", "value"),
+     Input("radio-escala-densidad", "value")]
+)
+@metricas.medir()
+@cache_callbacks.memoizar()
+def actualizar_densidad(modelo_sel, escala):
+    return densidad_modelo.obtener(modelo_sel, escala)
 
-    # --- Tabla de métricas ---
-    tabla = dash_table.DataTable(
-        columns=[{"name": k, "id": k} for k in metricas.keys()],
-        data=[metricas],
-        style_table={"margin": "auto"},
-        style_header={"backgroundColor": "#2C3E50", "color": "white"},
-        style_cell={"textAlign": "center", "fontSize": 15}
-    )
 
-    return fig1, fig2, fig3, fig4
+# --- Zoom en las dispersiones: puntos de la ventana visible a resolución completa ---
+EJES_DISPERSION = {
+    "grafico1": (0, lambda p: (p["y_test"], p["y_pred"])),
+    "grafico2": (0, lambda p: (p["y_test"], p["y_pred"])),
+    "grafico3": (0, lambda p: (p["y_pred"], np.asarray(p["y_test"]) - p["y_pred"])),
+}
 
 
+def registrar_zoom(id_grafico, indice_traza, ejes):
+    @app.callback(
+        Output(id_grafico, "figure", allow_duplicate=True),
+        Input(id_grafico, "relayoutData"),
+        State("dropdown-modelo", "value"),
+        prevent_initial_call=True
+    )
+    @metricas.medir(f"actualizar_zoom_{id_grafico}")
+    def actualizar_zoom(relayout, modelo_sel):
+        if not relayout or modelo_sel is None:
+            raise dash.exceptions.PreventUpdate
+        x, y = ejes(modelos_pack[modelo_sel])
+        puntos = puntos_en_ventana(x, y, relayout)
+        if puntos is None:
+            # Vuelta a autoescala: se restaura la submuestra cacheada
+            # Sólo un doble clic explícito; no el {"autosize": True} del primer render
+            if not (relayout.get("xaxis.autorange") or relayout.get("yaxis.autorange")):
+                raise dash.exceptions.PreventUpdate
+            cacheada = figuras_modelo.obtener(modelo_sel)[int(id_grafico[-1]) - 1]
+            puntos = (cacheada["data"][indice_traza]["x"], cacheada["data"][indice_traza]["y"])
+        parche = Patch()
+        parche["data"][indice_traza]["x"] = puntos[0]
+        parche["data"][indice_traza]["y"] = puntos[1]
+        return parche
+
+
+if ZOOM_COMPLETO:
+    for id_grafico, (indice_traza, ejes) in EJES_DISPERSION.items():
+        registrar_zoom(id_grafico, indice_traza, ejes)
+
+
+# --- Intervalos bootstrap de las métricas: trabajo en segundo plano ---
+# Corre en un proceso de `trabajos` (el worker web sólo responde a los sondeos),
+# informa el avance, se cancela con el botón o al cambiar de sección, y el
+# resultado se reutiliza para el mismo modelo, remuestras y versión.
 @app.callback(
-    [Output("tarjetas-metricas", "children"),
-     Output("grafico-metricas", "figure")],
-    [Input("dropdown-modelo-metricas", "value"),
-     Input("checklist-metricas", "value")]
+    Output("tabla-bootstrap", "children"),
+    Input("btn-bootstrap", "n_clicks"),
+    State("dropdown-modelo-metricas", "value"),
+    State("dropdown-remuestras-bootstrap", "value"),
+    background=True,
+    manager=trabajos,
+    interval=500,
+    progress=[Output("progreso-bootstrap", "value"), Output("progreso-bootstrap", "label")],
+    running=[
+        (Output("btn-bootstrap", "disabled"), True, False),
+        (Output("btn-cancelar-bootstrap", "disabled"), False, True),
+    ],
+    cancel=[Input("btn-cancelar-bootstrap", "n_clicks")] + [Input(f"btn-{i}", "n_clicks") for i in range(0, 9)],
+    cache_args_to_ignore=[0],
+    prevent_initial_call=True
 )
-def actualizar_metricas(modelo_seleccionado, modelos_comparar):
-    tarjetas = []
-    df_metricas = []
-
-    # === Tarjetas individuales ===
-    for nombre, datos in modelos_pack.items():
-        if nombre == modelo_seleccionado:
-            metricas = datos["metricas"]
-            for k, v in metricas.items():
-                tarjetas.append(
-                    html.Div([
-                        html.H4(k, style={"color": "#1A5276", "fontWeight": "bold"}),
-                        html.H2(f"{v:.3f}", style={"color": "#2980B9", "fontWeight": "bold"})
-                    ], style={
-                        "backgroundColor": "#EAF2F8",
-                        "padding": "20px",
-                        "borderRadius": "12px",
-                        "textAlign": "center",
-                        "width": "90%",
-                        "boxShadow": "2px 2px 6px rgba(0,0,0,0.1)",
-                        "border": "1px solid #AED6F1"
-                    }))
-    
-    # === Comparador de métricas ===
-    for modelo in modelos_comparar:
-        m = modelos_pack[modelo]["metricas"]
-        for k, v in m.items():
-            df_metricas.append({"Modelo": modelo, "Métrica": k, "Valor": v})
-
-    df_metricas = pd.DataFrame(df_metricas)
-
-    # Paleta de tonos azules
-    palette_azul = ["#0D47A1", "#1565C0", "#1976D2", "#1E88E5", "#42A5F5", "#64B5F6"]
-
-    fig = px.bar(
-        df_metricas,
-        x="Métrica",
-        y="Valor",
-        color="Modelo",
-        barmode="group",
-        title="Comparación de métricas entre modelos",
-        text_auto=True,
-        color_discrete_sequence=palette_azul
+def calcular_bootstrap(set_progress, n_clicks, modelo_sel, n_remuestras):
+    pack = modelos_pack[modelo_sel]
+    intervalos = intervalos_bootstrap(
+        pack["y_test"], pack["y_pred"], n_remuestras=n_remuestras,
+        progreso=lambda hechas, total: set_progress((100 * hechas // total, f"{hechas:,}/{total:,}"))
     )
-
-    fig.update_layout(
-        template="plotly_white",
-        title_font=dict(size=20, color="#154360"),
-        xaxis_title="Métrica",
-        yaxis_title="Valor",
-        legend_title="Modelo",
-        plot_bgcolor="#F8FBFF",
-        paper_bgcolor="#F8FBFF",
-        font=dict(color="#2C3E50"),
-        margin=dict(t=60, l=40, r=40, b=40)
+    filas = [
+        html.Tr([html.Td(nombre), html.Td(f"{v['estimacion']:.4f}"),
+                 html.Td(f"[{v['inferior']:.4f}, {v['superior']:.4f}]")])
+        for nombre, v in intervalos.items()
+    ]
+    return dbc.Table(
+        [html.Thead(html.Tr([html.Th("Métrica"), html.Th("Estimación"), html.Th("IC 95 %")])),
+         html.Tbody(filas)],
+        bordered=True, striped=True, size="sm"
     )
 
-    fig.update_traces(
-        textfont_size=12,
-        textangle=0,
-        textposition="outside",
-        cliponaxis=False
-    )
 
-    return tarjetas, fig
+# --- Métricas: se dibujan en el navegador a partir de `store-metricas` ---
+app.clientside_callback(
+    ClientsideFunction(namespace="metricas", function_name="tarjetas"),
+    Output("tarjetas-metricas", "children"),
+    Input("dropdown-modelo-metricas", "value"),
+    State("store-metricas", "data")
+)
+
+app.clientside_callback(
+    ClientsideFunction(namespace="metricas", function_name="comparador"),
+    Output("grafico-metricas", "figure"),
+    Input("checklist-metricas", "value"),
+    State("store-metricas", "data")
+)
 
 
 if __name__ == "__main__":
+       datos.iniciar()
        app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 10000)), debug=False)
 
 
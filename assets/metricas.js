@@ -0,0 +1,83 @@
+// -------------------------------------
+// Callbacks del lado del cliente para la pestaña "Métricas de Modelos".
+// Las métricas de todos los modelos llegan una sola vez en `store-metricas`;
+// las tarjetas y el comparador se dibujan en el navegador.
+// -------------------------------------
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    metricas: {
+        tarjetas: function (modelo, store) {
+            if (!store || !store.metricas[modelo]) {
+                return [];
+            }
+            var metricas = store.metricas[modelo];
+            return Object.keys(metricas).map(function (k) {
+                return {
+                    type: "Div",
+                    namespace: "dash_html_components",
+                    props: {
+                        children: [
+                            {
+                                type: "H4",
+                                namespace: "dash_html_components",
+                                props: {children: k, style: {color: "#1A5276", fontWeight: "bold"}}
+                            },
+                            {
+                                type: "H2",
+                                namespace: "dash_html_components",
+                                props: {children: metricas[k] == null ? "—" : Number(metricas[k]).toFixed(3), style: {color: "#2980B9", fontWeight: "bold"}}
+                            }
+                        ],
+                        style: {
+                            backgroundColor: "#EAF2F8",
+                            padding: "20px",
+                            borderRadius: "12px",
+                            textAlign: "center",
+                            width: "90%",
+                            boxShadow: "2px 2px 6px rgba(0,0,0,0.1)",
+                            border: "1px solid #AED6F1"
+                        }
+                    }
+                };
+            });
+        },
+
+        comparador: function (modelos, store) {
+            // Paleta de tonos azules
+            var paleta = ["#0D47A1", "#1565C0", "#1976D2", "#1E88E5", "#42A5F5", "#64B5F6"];
+            var datos = [];
+            (modelos || []).forEach(function (modelo) {
+                var m = store && store.metricas[modelo];
+                if (!m) {
+                    return;
+                }
+                var claves = Object.keys(m);
+                datos.push({
+                    type: "bar",
+                    name: modelo,
+                    x: claves,
+                    y: claves.map(function (k) { return m[k]; }),
+                    texttemplate: "%{y:.3f}",
+                    textposition: "outside",
+                    textangle: 0,
+                    textfont: {size: 12},
+                    cliponaxis: false,
+                    marker: {color: paleta[store.modelos.indexOf(modelo) % paleta.length]}
+                });
+            });
+            return {
+                data: datos,
+                layout: {
+                    barmode: "group",
+                    title: {text: "Comparación de métricas entre modelos", font: {size: 20, color: "#154360"}},
+                    xaxis: {title: {text: "Métrica"}, gridcolor: "#EBF0F8"},
+                    yaxis: {title: {text: "Valor"}, gridcolor: "#EBF0F8", zerolinecolor: "#EBF0F8"},
+                    legend: {title: {text: "Modelo"}},
+                    plot_bgcolor: "#F8FBFF",
+                    paper_bgcolor: "#F8FBFF",
+                    font: {color: "#2C3E50"},
+                    margin: {t: 60, l: 40, r: 40, b: 40}
+                }
+            };
+        }
+    }
+});
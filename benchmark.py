@@ -0,0 +1,324 @@
+"""
+Banco de pruebas de rendimiento del dashboard.
+
+Importa la app (con el vigilante de datos apagado) y mide:
+
+- arranque: importar ``app`` (datos, agregados, secciones, figuras
+  precalculadas) y cargar todos los packs de modelos;
+- ``actualizar_vista_global`` en los 45 rangos de años posibles;
+- ``actualizar_analisis_eda`` en cada columna numérica;
+- ``actualizar_visualizacion`` y ``actualizar_densidad`` en cada modelo, y
+  ``store-metricas`` (las métricas se dibujan en el navegador; el store no
+  tiene callback de servidor y llega dentro de la sección ``btn-7``, así que
+  se dispara esa sección y ``bytes`` es sólo el del store);
+- ``mostrar_contenido`` en cada botón de sección.
+
+Cada callback se dispara por ``/_dash-update-component`` con el cliente de
+pruebas de Flask, igual que desde el navegador, así que el tiempo incluye el
+despacho de Dash y la serialización, y ``bytes`` es el tamaño de la respuesta
+JSON. Por caso se guarda la primera llamada (cachés del proceso frías), la
+mediana y el p95 de las repeticiones, y el pico de memoria Python de una
+llamada (``tracemalloc``); por grupo, el pico de RSS del proceso.
+
+La caché compartida en disco (``ltbi/cache_compartida.py``) se desactiva salvo
+con ``--con-cache-disco``: si no, se mediría la lectura de SQLite.
+
+Se ejecuta desde la raíz del repositorio (la app lee ``data/`` y ``models/``):
+
+    python benchmark.py --salida bench.json
+    python benchmark.py --salida nuevo.json --comparar bench.json --umbral 0.25
+
+Con ``--comparar`` termina con código 1 si algún caso empeora más que el
+umbral (tiempo mediano o bytes) respecto al archivo base.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# Mínimo absoluto (ms) para considerar regresión un aumento de tiempo: por
+# debajo, la diferencia es ruido del reloj y del planificador.
+MINIMO_MS = 2.0
+
+
+# -------------------------------------
+# Disparo de callbacks
+# -------------------------------------
+def _salidas(clave):
+    """``outputs`` de la petición a partir de la clave de ``callback_map``."""
+    if not clave.startswith(".."):
+        id_, prop = clave.rsplit(".", 1)
+        return {"id": id_, "property": prop}
+    return [
+        dict(zip(("id", "property"), s.rsplit(".", 1)))
+        for s in clave.strip(".").split("...")
+    ]
+
+
+def cuerpo_peticion(app, clave, valores, disparador):
+    """Cuerpo de ``/_dash-update-component`` para el callback ``clave`` de
+    ``app.callback_map``, con ``valores`` por id de componente."""
+    callback = app.callback_map[clave]
+    entradas = [dict(e, value=valores.get(e["id"])) for e in callback["inputs"]]
+    estados = [dict(e, value=valores.get(e["id"])) for e in callback["state"]]
+    return {
+        "output": clave,
+        "outputs": _salidas(clave),
+        "inputs": entradas,
+        "state": estados,
+        "changedPropIds": [disparador],
+    }
+
+
+def _pico_rss_mb():
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def _percentil(valores, q):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, round(q * (len(ordenados) - 1)))]
+
+
+def medir(llamada, repeticiones):
+    """Primera llamada, mediana y p95 de ``repeticiones`` más, bytes de la
+    respuesta y pico de memoria Python de una llamada."""
+    inicio = time.perf_counter()
+    bytes_respuesta = llamada()
+    primera = (time.perf_counter() - inicio) * 1000
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        llamada()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    tracemalloc.start()
+    llamada()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "primera_ms": round(primera, 3),
+        "mediana_ms": round(statistics.median(tiempos), 3) if tiempos else round(primera, 3),
+        "p95_ms": round(_percentil(tiempos, 0.95), 3) if tiempos else round(primera, 3),
+        "bytes": bytes_respuesta,
+        "memoria_pico_bytes": pico,
+    }
+
+
+# -------------------------------------
+# Casos
+# -------------------------------------
+def _buscar_componente(nodo, id_componente):
+    """Primer componente con ``id_componente`` en un árbol de layout serializado."""
+    if isinstance(nodo, dict):
+        if nodo.get("props", {}).get("id") == id_componente:
+            return nodo
+        nodos = nodo.values()
+    elif isinstance(nodo, list):
+        nodos = nodo
+    else:
+        return None
+    for hijo in nodos:
+        encontrado = _buscar_componente(hijo, id_componente)
+        if encontrado is not None:
+            return encontrado
+    return None
+
+
+def casos(app_mod):
+    """``{grupo: [(nombre, llamada)]}``; cada llamada devuelve los bytes de la
+    respuesta y falla si el servidor no responde 200."""
+    app = app_mod.app
+    cliente = app_mod.server.test_client()
+    cliente.get("/")
+
+    def disparar(clave, valores, disparador, extraer=None):
+        """``extraer(json)``, si se da, elige la parte de la respuesta que se cuenta en ``bytes``."""
+        cuerpo = cuerpo_peticion(app, clave, valores, disparador)
+
+        def llamada():
+            respuesta = cliente.post("/_dash-update-component", json=cuerpo)
+            if respuesta.status_code != 200:
+                raise RuntimeError(f"{disparador}: HTTP {respuesta.status_code}")
+            if extraer is None:
+                return len(respuesta.data)
+            return len(json.dumps(extraer(respuesta.get_json())).encode())
+
+        return llamada
+
+    df = app_mod.datos.actual.df_imputado
+    anios = sorted(int(a) for a in df["anio"].unique())
+    numericas = df.select_dtypes(include="number").columns
+    modelos = list(app_mod.modelos_pack.keys())
+    clave_vista = "..grafico-evolucion-global.figure...heatmap-region-anio.figure...tarjetas-resumen.children.."
+    clave_eda = "..histograma-variable-eda.figure...boxplot-variable-eda.figure.."
+    clave_modelo = "..grafico1.figure...grafico2.figure...grafico3.figure...grafico4.figure.."
+
+    def datos_store_metricas(respuesta):
+        componente = _buscar_componente(respuesta, "store-metricas")
+        if componente is None:
+            raise RuntimeError("store-metricas no está en la sección btn-7")
+        return componente["props"]["data"]
+
+    return {
+        "vista_global": [
+            (f"vista_global[{a}-{b}]",
+             disparar(clave_vista, {"slider-rango-anios": [a, b]}, "slider-rango-anios.value"))
+            for i, a in enumerate(anios) for b in anios[i:]
+        ],
+        "analisis_eda": [
+            (f"analisis_eda[{col}]",
+             disparar(clave_eda, {"dropdown-variable-eda": col}, "dropdown-variable-eda.value"))
+            for col in numericas
+        ],
+        "visualizacion": [
+            (f"visualizacion[{m}]",
+             disparar(clave_modelo, {"dropdown-modelo": m}, "dropdown-modelo.value"))
+            for m in modelos
+        ],
+        "densidad": [
+            (f"densidad[{m},{escala}]",
+             disparar("grafico-densidad.figure",
+                      {"dropdown-modelo": m, "radio-escala-densidad": escala},
+                      "dropdown-modelo.value"))
+            for m in modelos for escala in ("conteo", "log")
+        ],
+        "metricas": [
+            ("metricas[store]",
+             disparar("content-area.children", {"btn-7": 1}, "btn-7.n_clicks", datos_store_metricas))
+        ],
+        "secciones": [
+            (f"secciones[btn-{i}]",
+             disparar("content-area.children", {f"btn-{i}": 1}, f"btn-{i}.n_clicks"))
+            for i in range(0, 9)
+        ],
+    }
+
+
+# -------------------------------------
+# Ejecución y comparación
+# -------------------------------------
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(repeticiones=5, con_cache_disco=False):
+    os.environ["LTBI_RECARGA_SEGUNDOS"] = "0"
+    if not con_cache_disco:
+        os.environ["LTBI_CACHE_CALLBACKS_MB"] = "0"
+
+    inicio = time.perf_counter()
+    import app as app_mod
+    importar = (time.perf_counter() - inicio) * 1000
+    inicio = time.perf_counter()
+    app_mod.modelos_pack.precargar()
+    packs = (time.perf_counter() - inicio) * 1000
+
+    resultado = {
+        "meta": {
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "repeticiones": repeticiones,
+            "cache_disco": con_cache_disco,
+        },
+        "arranque": {
+            "importar_ms": round(importar, 1),
+            "cargar_packs_ms": round(packs, 1),
+            "rss_pico_mb": round(_pico_rss_mb(), 1),
+        },
+        "grupos": {},
+        "casos": {},
+    }
+    for grupo, lista in casos(app_mod).items():
+        inicio = time.perf_counter()
+        for nombre, llamada in lista:
+            resultado["casos"][nombre] = medir(llamada, repeticiones)
+        resultado["grupos"][grupo] = {
+            "casos": len(lista),
+            "total_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            "rss_pico_mb": round(_pico_rss_mb(), 1),
+        }
+    return resultado
+
+
+def comparar(base, nuevo, umbral):
+    """Casos (y arranque) que empeoran más que ``umbral`` en tiempo mediano
+    o en bytes; ``[(caso, métrica, antes, después)]``."""
+    regresiones = []
+
+    def revisar(nombre, metrica, antes, despues, minimo=0.0):
+        if antes is None or despues is None:
+            return
+        if despues > antes * (1 + umbral) and despues - antes > minimo:
+            regresiones.append((nombre, metrica, antes, despues))
+
+    for metrica in ("importar_ms", "cargar_packs_ms"):
+        revisar("arranque", metrica, base["arranque"].get(metrica), nuevo["arranque"].get(metrica), MINIMO_MS)
+    for nombre, caso in nuevo["casos"].items():
+        previo = base["casos"].get(nombre)
+        if previo is None:
+            continue
+        revisar(nombre, "mediana_ms", previo["mediana_ms"], caso["mediana_ms"], MINIMO_MS)
+        revisar(nombre, "bytes", previo["bytes"], caso["bytes"])
+    return regresiones
+
+
+def imprimir(resultado):
+    arranque = resultado["arranque"]
+    print(f"Arranque: importar {arranque['importar_ms']:.0f} ms, "
+          f"packs {arranque['cargar_packs_ms']:.0f} ms, RSS {arranque['rss_pico_mb']:.0f} MB")
+    print(f"{'caso':<44}{'primera':>10}{'mediana':>10}{'p95':>10}{'KB':>10}{'mem KB':>10}")
+    for nombre, caso in resultado["casos"].items():
+        print(f"{nombre:<44}{caso['primera_ms']:>10.1f}{caso['mediana_ms']:>10.1f}{caso['p95_ms']:>10.1f}"
+              f"{caso['bytes'] / 1024:>10.1f}{caso['memoria_pico_bytes'] / 1024:>10.0f}")
+    for grupo, datos_grupo in resultado["grupos"].items():
+        print(f"{grupo}: {datos_grupo['casos']} casos, {datos_grupo['total_ms']:.0f} ms, "
+              f"RSS pico {datos_grupo['rss_pico_mb']:.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide arranque, callbacks y tamaño de respuestas del dashboard.")
+    parser.add_argument("--salida", default="benchmark.json", help="archivo JSON de resultados")
+    parser.add_argument("--repeticiones", type=int, default=5, help="llamadas medidas por caso tras la primera")
+    parser.add_argument("--comparar", help="resultados base con los que comparar")
+    parser.add_argument("--umbral", type=float, default=0.25, help="empeoramiento relativo tolerado (0.25 = 25 %%)")
+    parser.add_argument("--con-cache-disco", action="store_true", help="no desactivar la caché compartida en disco")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args.repeticiones, args.con_cache_disco)
+    imprimir(resultado)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"✅ Resultados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(base, resultado, args.umbral)
+        for nombre, metrica, antes, despues in regresiones:
+            print(f"❌ {nombre} {metrica}: {antes} → {despues} (+{(despues / antes - 1) * 100:.0f} %)")
+        if regresiones:
+            return 1
+        print(f"✅ Sin regresiones mayores al {args.umbral:.0%} respecto a {args.comparar}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
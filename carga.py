@@ -0,0 +1,388 @@
+"""
+Pruebas de carga locales: reproduce sesiones realistas del dashboard.
+
+Dos pasos, sin servicios externos:
+
+1. ``grabar``: importa la app y genera los cuerpos de
+   ``/_dash-update-component`` de una sesión típica, comprobando que cada uno
+   responde 200/204. La sesión recorre ``btn-0``…``btn-8``; en ``btn-7``
+   dispara los callbacks iniciales de la sección de resultados, arrastra
+   ``slider-rango-anios`` (vista global + mapa) y cambia ``dropdown-modelo``
+   (visualización + densidad). ``checklist-metricas`` y
+   ``dropdown-modelo-metricas`` se resuelven en el navegador (callbacks
+   clientside) y no generan peticiones, así que no aparecen en la sesión.
+
+2. ``reproducir``: lanza ``--usuarios`` usuarios virtuales (hilos) que
+   repiten la sesión contra ``--url`` durante ``--duracion`` segundos, con
+   ``--pausa`` segundos de reflexión entre pasos. Las peticiones de un mismo
+   paso salen en paralelo, como las envía el navegador. Con ``--iniciar``
+   arranca antes un gunicorn local (``--workers``). Con ``--usuarios 1,2,4,8``
+   prueba cada nivel en orden y muestra dónde se degrada el p95.
+
+3. ``memoria``: arranca un gunicorn local, reproduce la sesión con un
+   usuario y lee ``/proc/<pid>/smaps_rollup`` del maestro y de cada worker
+   (memoria privada, compartida y PSS; sólo Linux). Con ``--sin-precarga``
+   mide la app cargada en cada worker (``LTBI_PRELOAD=0``).
+
+Informe por nivel: peticiones/s, sesiones completas, tasa de error y
+percentiles p50/p95/p99 por callback. ``--salida`` lo guarda en JSON.
+
+Se ejecuta desde la raíz del repositorio:
+
+    python carga.py grabar --salida sesion.json
+    python carga.py reproducir --sesion sesion.json --iniciar --workers 2 --usuarios 1,4,16
+    python carga.py memoria --sesion sesion.json --workers 4
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark import cuerpo_peticion
+
+RUTA_CALLBACKS = "/_dash-update-component"
+CLAVE_VISTA = "..grafico-evolucion-global.figure...heatmap-region-anio.figure...tarjetas-resumen.children.."
+CLAVE_MAPA = "..mapa-prevalencia-global.figure...store-anio-mapa.data.."
+CLAVE_EDA = "..histograma-variable-eda.figure...boxplot-variable-eda.figure.."
+CLAVE_MODELO = "..grafico1.figure...grafico2.figure...grafico3.figure...grafico4.figure.."
+CLAVE_DENSIDAD = "grafico-densidad.figure"
+CLAVE_SECCION = "content-area.children"
+
+
+# -------------------------------------
+# Grabación de la sesión
+# -------------------------------------
+def _peticion(app, clave, valores, disparador):
+    return {
+        "callback": app.callback_map[clave]["callback"].__name__,
+        "cuerpo": cuerpo_peticion(app, clave, valores, disparador),
+    }
+
+
+def construir_sesion(app_mod):
+    """Lista de pasos; cada paso es la lista de peticiones que el navegador
+    envía a la vez tras una acción del usuario."""
+    app = app_mod.app
+    df = app_mod.datos.actual.df_imputado
+    anios = sorted(int(a) for a in df["anio"].unique())
+    modelos = list(app_mod.modelos_pack.keys())
+    columna_eda = df.select_dtypes(include="number").columns[0]
+
+    def seccion(i):
+        return [_peticion(app, CLAVE_SECCION, {f"btn-{i}": 1}, f"btn-{i}.n_clicks")]
+
+    def rango(valor, anio_previo):
+        valores = {"slider-rango-anios": valor, "store-anio-mapa": anio_previo}
+        return [
+            _peticion(app, CLAVE_VISTA, valores, "slider-rango-anios.value"),
+            _peticion(app, CLAVE_MAPA, valores, "slider-rango-anios.value"),
+        ]
+
+    def modelo(nombre):
+        valores = {"dropdown-modelo": nombre, "radio-escala-densidad": "log"}
+        return [
+            _peticion(app, CLAVE_MODELO, valores, "dropdown-modelo.value"),
+            _peticion(app, CLAVE_DENSIDAD, valores, "dropdown-modelo.value"),
+        ]
+
+    pasos = [seccion(i) for i in range(0, 8)]
+    # Al montarse la sección de resultados, Dash dispara sus callbacks iniciales
+    completo = [anios[0], anios[-1]]
+    pasos.append(
+        rango(completo, None)
+        + [_peticion(app, CLAVE_EDA, {"dropdown-variable-eda": columna_eda}, "dropdown-variable-eda.value")]
+        + modelo(modelos[0])
+    )
+    # Arrastres del slider: cada soltada es una petición
+    previo = completo
+    for valor in ([anios[2], anios[-1]], [anios[2], anios[-3]], [anios[4], anios[-3]], completo):
+        pasos.append(rango(valor, previo[1]))
+        previo = valor
+    for nombre in modelos[1:] + modelos[:1]:
+        pasos.append(modelo(nombre))
+    pasos.append(seccion(8))
+    return pasos
+
+
+def grabar(salida):
+    os.environ["LTBI_RECARGA_SEGUNDOS"] = "0"
+    import app as app_mod
+
+    pasos = construir_sesion(app_mod)
+    cliente = app_mod.server.test_client()
+    cliente.get("/")
+    for paso in pasos:
+        for peticion in paso:
+            respuesta = cliente.post(RUTA_CALLBACKS, json=peticion["cuerpo"])
+            if respuesta.status_code not in (200, 204):
+                raise RuntimeError(f"{peticion['callback']}: HTTP {respuesta.status_code}")
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump({"pasos": pasos}, f, ensure_ascii=False)
+    n = sum(len(paso) for paso in pasos)
+    print(f"✅ Sesión de {len(pasos)} pasos y {n} peticiones en {salida}")
+
+
+# -------------------------------------
+# Reproducción
+# -------------------------------------
+class _Cliente:
+    """Conexión keep-alive por hilo al servidor."""
+
+    def __init__(self, url):
+        partes = urllib.parse.urlsplit(url)
+        self.host, self.puerto = partes.hostname, partes.port or 80
+        self._local = threading.local()
+
+    def post(self, ruta, datos):
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = self._local.conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=120)
+        try:
+            conexion.request("POST", ruta, datos, {"Content-Type": "application/json"})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            return respuesta.status
+        except (OSError, http.client.HTTPException):
+            conexion.close()
+            self._local.conexion = None
+            raise
+
+
+class Resultados:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.errores = {}
+        self.sesiones = 0
+
+    def anotar(self, callback, segundos, error):
+        with self._lock:
+            self.latencias.setdefault(callback, []).append(segundos)
+            if error:
+                self.errores[callback] = self.errores.get(callback, 0) + 1
+
+    def sesion_completa(self):
+        with self._lock:
+            self.sesiones += 1
+
+
+def _percentiles(valores):
+    ordenados = sorted(valores)
+
+    def q(p):
+        return ordenados[min(len(ordenados) - 1, round(p * (len(ordenados) - 1)))] * 1000
+    return {
+        "n": len(ordenados),
+        "p50_ms": round(q(0.50), 1),
+        "p95_ms": round(q(0.95), 1),
+        "p99_ms": round(q(0.99), 1),
+        "media_ms": round(statistics.fmean(ordenados) * 1000, 1),
+    }
+
+
+def _usuario(cliente, pasos, pausa, fin, resultados):
+    def enviar(peticion):
+        inicio = time.perf_counter()
+        try:
+            error = cliente.post(RUTA_CALLBACKS, peticion["datos"]) not in (200, 204)
+        except (OSError, http.client.HTTPException):
+            error = True
+        resultados.anotar(peticion["callback"], time.perf_counter() - inicio, error)
+
+    with ThreadPoolExecutor(max_workers=max(len(p) for p in pasos)) as paralelo:
+        while time.monotonic() < fin:
+            for paso in pasos:
+                if time.monotonic() >= fin:
+                    return
+                list(paralelo.map(enviar, paso))
+                if pausa:
+                    time.sleep(pausa)
+            resultados.sesion_completa()
+
+
+def reproducir(url, pasos, usuarios, duracion, pausa):
+    """Un nivel de concurrencia; devuelve el informe."""
+    pasos = [
+        [{"callback": p["callback"], "datos": json.dumps(p["cuerpo"]).encode()} for p in paso]
+        for paso in pasos
+    ]
+    cliente = _Cliente(url)
+    resultados = Resultados()
+    inicio = time.monotonic()
+    fin = inicio + duracion
+    hilos = [
+        threading.Thread(target=_usuario, args=(cliente, pasos, pausa, fin, resultados), daemon=True)
+        for _ in range(usuarios)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.monotonic() - inicio
+
+    todas = [s for lat in resultados.latencias.values() for s in lat]
+    errores = sum(resultados.errores.values())
+    return {
+        "usuarios": usuarios,
+        "segundos": round(transcurrido, 1),
+        "peticiones": len(todas),
+        "peticiones_s": round(len(todas) / transcurrido, 1),
+        "sesiones": resultados.sesiones,
+        "tasa_error": round(errores / len(todas), 4) if todas else None,
+        "global": _percentiles(todas) if todas else None,
+        "callbacks": {
+            callback: dict(_percentiles(lat), errores=resultados.errores.get(callback, 0))
+            for callback, lat in sorted(resultados.latencias.items())
+        },
+    }
+
+
+def iniciar_servidor(puerto, workers, precarga=True):
+    """Arranca gunicorn en segundo plano y espera a que responda."""
+    entorno = dict(os.environ, PORT=str(puerto), LTBI_WORKERS=str(workers), LTBI_RECARGA_SEGUNDOS="0",
+                   LTBI_PRELOAD="1" if precarga else "0")
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "wsgi:application", "--access-logfile", "/dev/null"],
+        env=entorno,
+    )
+    url = f"http://127.0.0.1:{puerto}"
+    limite = time.monotonic() + 180
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError("gunicorn terminó antes de quedar listo")
+        try:
+            urllib.request.urlopen(url + "/", timeout=2).read()
+            return proceso, url
+        except OSError:
+            time.sleep(0.5)
+    proceso.terminate()
+    raise RuntimeError("gunicorn no respondió a tiempo")
+
+
+# -------------------------------------
+# Memoria por worker
+# -------------------------------------
+def _smaps(pid):
+    """Campos de ``/proc/<pid>/smaps_rollup`` en MB."""
+    campos = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) == 3 and partes[2] == "kB":
+                campos[partes[0].rstrip(":")] = int(partes[1]) / 1024
+    return campos
+
+
+def _hijos(pid):
+    hijos = []
+    for entrada in os.listdir("/proc"):
+        if entrada.isdigit():
+            try:
+                with open(f"/proc/{entrada}/stat") as f:
+                    # El nombre del proceso va entre paréntesis y puede tener espacios
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                hijos.append(int(entrada))
+    return sorted(hijos)
+
+
+def medir_memoria(pid_maestro):
+    """Privado y compartido por worker y PSS total (maestro + workers), en MB."""
+    workers = [_smaps(pid) for pid in _hijos(pid_maestro)]
+    maestro = _smaps(pid_maestro)
+    privado = [w["Private_Clean"] + w["Private_Dirty"] for w in workers]
+    compartido = [w["Shared_Clean"] + w["Shared_Dirty"] for w in workers]
+    return {
+        "workers": len(workers),
+        "privado_mb": round(statistics.mean(privado), 1),
+        "compartido_mb": round(statistics.mean(compartido), 1),
+        "pss_total_mb": round(maestro["Pss"] + sum(w["Pss"] for w in workers), 1),
+    }
+
+
+def imprimir(informe):
+    g = informe["global"] or {}
+    print(f"\n👥 {informe['usuarios']} usuarios: {informe['peticiones_s']} pet/s, "
+          f"{informe['sesiones']} sesiones, error {informe['tasa_error']:.2%}, "
+          f"p50 {g.get('p50_ms')} ms, p95 {g.get('p95_ms')} ms, p99 {g.get('p99_ms')} ms")
+    print(f"   {'callback':<28}{'n':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'errores':>9}")
+    for callback, c in informe["callbacks"].items():
+        print(f"   {callback:<28}{c['n']:>7}{c['p50_ms']:>9}{c['p95_ms']:>9}{c['p99_ms']:>9}{c['errores']:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Graba y reproduce sesiones del dashboard para pruebas de carga.")
+    sub = parser.add_subparsers(dest="orden", required=True)
+
+    p_grabar = sub.add_parser("grabar", help="genera la sesión desde la app")
+    p_grabar.add_argument("--salida", default="sesion.json")
+
+    p_rep = sub.add_parser("reproducir", help="reproduce la sesión con N usuarios")
+    p_rep.add_argument("--sesion", default="sesion.json")
+    p_rep.add_argument("--url", default="http://127.0.0.1:10000")
+    p_rep.add_argument("--usuarios", default="1,2,4,8", help="niveles de concurrencia, separados por coma")
+    p_rep.add_argument("--duracion", type=float, default=30, help="segundos por nivel")
+    p_rep.add_argument("--pausa", type=float, default=1.0, help="segundos de reflexión entre pasos")
+    p_rep.add_argument("--iniciar", action="store_true", help="arrancar un gunicorn local")
+    p_rep.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p_rep.add_argument("--puerto", type=int, default=18050, help="puerto del gunicorn local")
+    p_rep.add_argument("--salida", help="archivo JSON con los informes")
+
+    p_mem = sub.add_parser("memoria", help="memoria por worker tras recorrer la sesión")
+    p_mem.add_argument("--sesion", default="sesion.json")
+    p_mem.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p_mem.add_argument("--sin-precarga", action="store_true", help="LTBI_PRELOAD=0")
+    p_mem.add_argument("--duracion", type=float, default=20, help="segundos de sesión antes de medir")
+    p_mem.add_argument("--puerto", type=int, default=18050, help="puerto del gunicorn local")
+    args = parser.parse_args(argv)
+
+    if args.orden == "grabar":
+        grabar(args.salida)
+        return 0
+
+    with open(args.sesion, encoding="utf-8") as f:
+        pasos = json.load(f)["pasos"]
+
+    if args.orden == "memoria":
+        proceso, url = iniciar_servidor(args.puerto, args.workers, precarga=not args.sin_precarga)
+        try:
+            # Un usuario por worker, para que las peticiones lleguen a todos
+            reproducir(url, pasos, args.workers, args.duracion, pausa=0)
+            memoria = medir_memoria(proceso.pid)
+        finally:
+            proceso.terminate()
+            proceso.wait()
+        print(f"🧠 {memoria['workers']} workers{' sin precarga' if args.sin_precarga else ''}: "
+              f"privado {memoria['privado_mb']:.0f} MB, compartido {memoria['compartido_mb']:.0f} MB "
+              f"por worker; PSS total {memoria['pss_total_mb']:.0f} MB")
+        return 0
+
+    proceso, url = (iniciar_servidor(args.puerto, args.workers) if args.iniciar else (None, args.url))
+    try:
+        informes = []
+        for usuarios in (int(u) for u in args.usuarios.split(",")):
+            informes.append(reproducir(url, pasos, usuarios, args.duracion, args.pausa))
+            imprimir(informes[-1])
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "pausa": args.pausa, "niveles": informes}, f, indent=2, ensure_ascii=False)
+        print(f"✅ Informe en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
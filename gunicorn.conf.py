@@ -0,0 +1,53 @@
+# -------------------------------------
+# Configuración de gunicorn (se lee automáticamente desde el directorio actual)
+#
+#   gunicorn wsgi:application
+#
+# Variables de entorno:
+#   PORT            puerto (10000 por defecto, igual que app.py)
+#   LTBI_WORKERS    procesos (por defecto, uno por núcleo)
+#   LTBI_HILOS      hilos por worker con la clase gthread (4)
+#   LTBI_PRELOAD    "0" para cargar la app en cada worker en vez de en el maestro
+#   PROMETHEUS_MULTIPROC_DIR  archivos de métricas compartidos (data/.cache/prometheus)
+# -------------------------------------
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 10000)}"
+workers = int(os.environ.get("LTBI_WORKERS", os.cpu_count() or 1))
+
+# Los callbacks pasan la mayor parte del tiempo serializando y esperando E/S:
+# varios hilos por worker atienden más peticiones sin otra copia del proceso.
+worker_class = "gthread"
+threads = int(os.environ.get("LTBI_HILOS", 4))
+
+# Datos, agregados y modelos se cargan una vez en el maestro y los workers
+# los comparten copy-on-write (ver wsgi.py).
+preload_app = os.environ.get("LTBI_PRELOAD", "1") != "0"
+
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+# Cada worker escribe sus métricas en archivos mmap y /metrics las suma
+# (ltbi/metricas.py). Debe fijarse antes de importar prometheus_client, y los
+# archivos de una ejecución anterior no deben sumarse a esta.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join("data", ".cache", "prometheus"))
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def post_fork(server, worker):
+    # Los hilos no sobreviven al fork: el vigilante de datos (ltbi/recarga.py)
+    # se arranca en cada worker. La caché de ingesta la reconstruye uno solo
+    # (cerrojo en ltbi/ingesta.py); los demás la leen.
+    import app
+
+    app.datos.iniciar()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
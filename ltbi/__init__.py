@@ -0,0 +1,3 @@
+# -------------------------------------
+# Utilidades internas del dashboard LTBI
+# -------------------------------------
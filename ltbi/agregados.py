@@ -0,0 +1,144 @@
+"""
+Cubo de agregación región × año × métrica con sumas acumuladas por año.
+
+Se guardan sumas y conteos por celda, más sus acumulados a lo largo del eje
+de años, de modo que cualquier rango ``[anio_min, anio_max]`` se resuelve con
+restas de arreglos de tamaño (regiones × métricas) o, para las series por año,
+con un recorte de (regiones × años). El callback del slider ya no filtra ni
+agrupa el DataFrame.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+METRICAS_CUBO = (
+    "prevalencia_contactos",
+    "prevalencia_inferior",
+    "prevalencia_superior",
+    "porcentaje_ninos",
+    "elegibles_tratamiento",
+)
+
+# Métricas derivadas: nombre -> función sobre el DataFrame
+DERIVADAS_CUBO = {
+    "amplitud_intervalo": lambda df: df["prevalencia_superior"] - df["prevalencia_inferior"],
+}
+
+
+class CuboAgregados:
+    def __init__(self, df, col_anio="anio", col_region="region_OMS",
+                 metricas=METRICAS_CUBO, derivadas=DERIVADAS_CUBO):
+        self.col_anio = col_anio
+        self.col_region = col_region
+        self._derivadas = derivadas
+
+        valores = self._columnas_metricas(df, [m for m in metricas if m in df.columns])
+        self.metricas = list(valores)
+        self._idx_metrica = {m: i for i, m in enumerate(self.metricas)}
+
+        anios = df[col_anio].to_numpy()
+        self.anio_min = int(anios.min())
+        self.anio_max = int(anios.max())
+        self.anios = np.arange(self.anio_min, self.anio_max + 1)
+
+        _, regiones = pd.factorize(df[col_region], sort=True)
+        self.regiones = [str(r) for r in regiones]
+
+        # --- Sumas y conteos por celda (región, año, métrica) ---
+        self.sumas, self.conteos = self._sumar(df)
+        self._acumular()
+
+    def _columnas_metricas(self, df, metricas):
+        valores = {m: df[m] for m in metricas}
+        for nombre, funcion in self._derivadas.items():
+            try:
+                valores[nombre] = funcion(df)
+            except KeyError:
+                continue
+        return valores
+
+    def _sumar(self, df):
+        """Sumas y conteos ``(regiones, años, métricas)`` de las filas de ``df``."""
+        n_reg, n_anio, n_met = len(self.regiones), len(self.anios), len(self.metricas)
+        valores = self._columnas_metricas(df, [m for m in self.metricas if m in df.columns])
+        matriz = np.column_stack([np.asarray(valores[m], dtype=np.float64) for m in self.metricas])
+        validos = ~np.isnan(matriz)
+
+        codigos = pd.Categorical(df[self.col_region].astype(str), categories=self.regiones).codes
+        celda = codigos * n_anio + (df[self.col_anio].to_numpy() - self.anio_min)
+        sumas = np.zeros((n_reg * n_anio, n_met))
+        conteos = np.zeros((n_reg * n_anio, n_met))
+        np.add.at(sumas, celda, np.where(validos, matriz, 0.0))
+        np.add.at(conteos, celda, validos)
+        return sumas.reshape(n_reg, n_anio, n_met), conteos.reshape(n_reg, n_anio, n_met)
+
+    def _acumular(self):
+        # --- Acumulados a lo largo del año, con un cero inicial ---
+        ceros = np.zeros((len(self.regiones), 1, len(self.metricas)))
+        self.sumas_acum = np.concatenate([ceros, np.cumsum(self.sumas, axis=1)], axis=1)
+        self.conteos_acum = np.concatenate([ceros, np.cumsum(self.conteos, axis=1)], axis=1)
+
+    def con_cambios(self, df, anios):
+        """Copia del cubo con sólo las columnas de ``anios`` recalculadas desde
+        ``df``. Devuelve ``None`` si cambian las regiones o el rango de años
+        (hace falta un cubo nuevo); el cubo original no se modifica."""
+        anios_df = df[self.col_anio].to_numpy()
+        if (set(df[self.col_region].astype(str).unique()) - set(self.regiones)
+                or anios_df.min() < self.anio_min or anios_df.max() > self.anio_max
+                or set(self._columnas_metricas(df, [m for m in self.metricas if m in df.columns]))
+                != set(self.metricas)):
+            return None
+        nuevo = copy.copy(self)
+        nuevo.sumas, nuevo.conteos = self.sumas.copy(), self.conteos.copy()
+        idx = sorted(int(a) - self.anio_min for a in anios)
+        if idx:
+            sumas, conteos = self._sumar(df[np.isin(anios_df, list(anios))])
+            nuevo.sumas[:, idx] = sumas[:, idx]
+            nuevo.conteos[:, idx] = conteos[:, idx]
+        nuevo._acumular()
+        return nuevo
+
+    def _indices(self, anio_min, anio_max):
+        i0 = int(np.clip(anio_min, self.anio_min, self.anio_max)) - self.anio_min
+        i1 = int(np.clip(anio_max, self.anio_min, self.anio_max)) - self.anio_min + 1
+        return i0, max(i1, i0)
+
+    def totales_region(self, metrica, anio_min, anio_max):
+        """Suma y conteo por región en el rango, vía diferencia de acumulados."""
+        i0, i1 = self._indices(anio_min, anio_max)
+        m = self._idx_metrica[metrica]
+        suma = self.sumas_acum[:, i1, m] - self.sumas_acum[:, i0, m]
+        conteo = self.conteos_acum[:, i1, m] - self.conteos_acum[:, i0, m]
+        return suma, conteo
+
+    def media(self, metrica, anio_min, anio_max):
+        suma, conteo = self.totales_region(metrica, anio_min, anio_max)
+        total = conteo.sum()
+        return suma.sum() / total if total else np.nan
+
+    def serie_global(self, metrica, anio_min, anio_max):
+        """Media por año (todas las regiones) en el rango, como DataFrame."""
+        i0, i1 = self._indices(anio_min, anio_max)
+        m = self._idx_metrica[metrica]
+        suma = self.sumas[:, i0:i1, m].sum(axis=0)
+        conteo = self.conteos[:, i0:i1, m].sum(axis=0)
+        con_datos = conteo > 0
+        return pd.DataFrame({
+            self.col_anio: self.anios[i0:i1][con_datos],
+            "media_prevalencia": suma[con_datos] / conteo[con_datos],
+        })
+
+    def matriz_region_anio(self, metrica, anio_min, anio_max):
+        """Media por región y año (regiones en filas, años en columnas)."""
+        i0, i1 = self._indices(anio_min, anio_max)
+        m = self._idx_metrica[metrica]
+        conteo = self.conteos[:, i0:i1, m]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            medias = self.sumas[:, i0:i1, m] / conteo
+        tabla = pd.DataFrame(
+            medias,
+            index=pd.Index(self.regiones, name=self.col_region),
+            columns=pd.Index(self.anios[i0:i1], name=self.col_anio),
+        )
+        return tabla.loc[(conteo > 0).any(axis=1), (conteo > 0).any(axis=0)]
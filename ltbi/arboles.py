@@ -0,0 +1,327 @@
+"""
+Motor de inferencia vectorizado para ensambles de árboles.
+
+Los árboles de un ``GradientBoostingRegressor``, ``RandomForestRegressor``,
+``DecisionTreeRegressor`` o ``XGBRegressor``/``Booster`` se aplanan en arreglos
+contiguos de nodos (variable, umbral, hijo izquierdo/derecho, dirección de
+faltantes y valor de hoja) con índices globales, en orden de anchura para que
+cada par de hermanos sea contiguo. Si ``numba`` está instalado
+(``requirements-motor.txt``), un núcleo
+compilado recorre los árboles en paralelo sobre las filas (``prange``); si
+no, el lote se evalúa avanzando todos los (fila, árbol) un nivel por
+iteración con ``np.take``, repartiendo bloques de filas entre hilos.
+
+Las hojas se acumulan árbol por árbol partiendo del valor base, en el mismo
+orden que scikit-learn; para XGBoost la suma va en ``float32``, como en su
+predictor, así que el resultado coincide con el del booster bit a bit.
+
+Los arreglos se guardan en ``arboles.npz`` dentro del pack (ver
+``ltbi.formato_pack``), lo que además independiza la inferencia de la versión
+de scikit-learn/XGBoost con la que se entrenó.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+FILAS_POR_BLOQUE = int(os.environ.get("LTBI_ARBOLES_BLOQUE", 2048))
+HILOS = int(os.environ.get("LTBI_ARBOLES_HILOS", os.cpu_count() or 1))
+BLOQUE_NUMBA = 256
+# Bits reservados para el índice de variable en el código de nodo
+BITS_VARIABLE = 16
+_MASCARA_VARIABLE = (1 << BITS_VARIABLE) - 1
+
+
+# -------------------------------------
+# Núcleo compilado opcional (numba); si no está instalado se usa NumPy puro
+# -------------------------------------
+# numba se importa y compila al primer lote (sólo con el motor activado), no
+# al importar el módulo. Con lotes desde hilos de servicio conviene fijar
+# NUMBA_THREADING_LAYER=omp: con TBB el proceso puede no terminar limpio.
+_kernel_numba = None
+_numba_probado = False
+_lock_numba = threading.Lock()
+
+
+def _compilar_kernel():
+    from numba import njit, prange
+
+    @njit(parallel=True, cache=True)
+    def kernel(X, codigo, umbral, faltante_der, valor, raices, profundidad,
+               estricto, base, bloque, salida):
+        n = X.shape[0]
+        for b in prange((n + bloque - 1) // bloque):
+            inicio = b * bloque
+            fin = min(inicio + bloque, n)
+            total = np.empty(fin - inicio, valor.dtype)
+            total[:] = base
+            # Árbol por árbol sobre un bloque de filas: los nodos del árbol
+            # quedan en caché mientras se recorren todas las filas del bloque
+            for raiz in raices:
+                for i in range(inicio, fin):
+                    nodo = raiz
+                    for _ in range(profundidad):
+                        c = codigo[nodo]
+                        x = X[i, c & _MASCARA_VARIABLE]
+                        der = (x >= umbral[nodo]) if estricto else (x > umbral[nodo])
+                        if x != x:
+                            der = faltante_der[nodo]
+                        nodo = (c >> BITS_VARIABLE) + der
+                    total[i - inicio] += valor[nodo]
+            for i in range(inicio, fin):
+                salida[i] = total[i - inicio]
+
+    return kernel
+
+
+def _kernel():
+    """Núcleo de numba, o ``None`` si numba no está instalado."""
+    global _kernel_numba, _numba_probado
+    with _lock_numba:
+        if not _numba_probado:
+            try:
+                _kernel_numba = _compilar_kernel()
+            except ImportError:
+                _kernel_numba = None
+            _numba_probado = True
+    return _kernel_numba
+
+
+_ARREGLOS = ("variable", "umbral", "izquierdo", "faltante_izq", "valor", "raices")
+
+
+class ArbolesAplanados:
+    def __init__(self, variable, umbral, izquierdo, faltante_izq, valor, raices,
+                 base, profundidad, estricto, n_variables, precision_simple=False):
+        self.variable = np.ascontiguousarray(variable, dtype=np.int32)
+        self.umbral = np.ascontiguousarray(umbral, dtype=np.float64)
+        self.izquierdo = np.ascontiguousarray(izquierdo, dtype=np.int32)
+        self.faltante_izq = np.ascontiguousarray(faltante_izq, dtype=bool)
+        self.valor = np.ascontiguousarray(valor, dtype=np.float64)
+        self.raices = np.ascontiguousarray(raices, dtype=np.int32)
+        self.base = float(base)
+        self.profundidad = int(profundidad)
+        # sklearn separa con ``x <= umbral``; XGBoost con ``x < umbral``
+        self.estricto = bool(estricto)
+        self.n_variables = int(n_variables)
+        # XGBoost acumula las hojas en float32
+        self.precision_simple = bool(precision_simple)
+        self._tipo = np.float32 if self.precision_simple else np.float64
+        self._valor = self.valor.astype(self._tipo)
+        # Hijo izquierdo y variable empaquetados en un solo entero: un único
+        # acceso a memoria por nivel. Las hojas usan variable 0, umbral +inf y
+        # se apuntan a sí mismas, así que todo recorrido dura ``profundidad``.
+        if self.n_variables > _MASCARA_VARIABLE:
+            raise ValueError(f"Demasiadas variables para el motor de árboles: {self.n_variables}")
+        self._codigo = (self.izquierdo.astype(np.int64) << BITS_VARIABLE) | np.maximum(self.variable, 0)
+        self._faltante_der = ~self.faltante_izq
+
+    # --- Evaluación ---
+    def _evaluar_bloque(self, X):
+        n, n_var = X.shape
+        plano = X.ravel()
+        inicio_fila = (np.arange(n, dtype=np.int64) * n_var)[:, None]
+        nodos = np.broadcast_to(self.raices.astype(np.int64), (n, self.raices.size)).copy()
+        for _ in range(self.profundidad):
+            codigo = self._codigo.take(nodos)
+            x = plano.take(inicio_fila + (codigo & _MASCARA_VARIABLE))
+            umbral = self.umbral.take(nodos)
+            der = (x >= umbral) if self.estricto else (x > umbral)
+            faltante = np.isnan(x)
+            if faltante.any():
+                der = np.where(faltante, self._faltante_der.take(nodos), der)
+            # Los hermanos son contiguos: derecho == izquierdo + 1
+            nodos = (codigo >> BITS_VARIABLE) + der
+        # Suma secuencial (cumsum) desde la base, en el orden de los árboles
+        valores = np.empty((n, self.raices.size + 1), dtype=self._tipo)
+        valores[:, 0] = self.base
+        valores[:, 1:] = self._valor.take(nodos)
+        return np.cumsum(valores, axis=1, dtype=self._tipo)[:, -1].astype(np.float64)
+
+    def predecir(self, X):
+        """``X``: matriz (filas × variables) ya preprocesada."""
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32), dtype=np.float64)
+        n = X.shape[0]
+        if n == 0:
+            return np.empty(0)
+        kernel = _kernel()
+        if kernel is not None:
+            salida = np.empty(n)
+            kernel(X, self._codigo, self.umbral, self._faltante_der,
+                          self._valor, self.raices, self.profundidad, self.estricto, self._tipo(self.base),
+                          BLOQUE_NUMBA, salida)
+            return salida
+        bloques = [X[i:i + FILAS_POR_BLOQUE] for i in range(0, n, FILAS_POR_BLOQUE)]
+        if len(bloques) == 1 or HILOS <= 1:
+            return np.concatenate([self._evaluar_bloque(b) for b in bloques])
+        with ThreadPoolExecutor(max_workers=HILOS) as pool:
+            return np.concatenate(list(pool.map(self._evaluar_bloque, bloques)))
+
+    # --- Persistencia ---
+    def guardar(self, ruta):
+        np.savez(
+            ruta,
+            **{a: getattr(self, a) for a in _ARREGLOS},
+            meta=np.array(json.dumps({
+                "base": self.base, "profundidad": self.profundidad,
+                "estricto": self.estricto, "n_variables": self.n_variables,
+                "precision_simple": self.precision_simple,
+            })),
+        )
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as datos:
+            meta = json.loads(str(datos["meta"]))
+            return cls(**{a: datos[a] for a in _ARREGLOS}, **meta)
+
+
+# -------------------------------------
+# Aplanado por librería
+# -------------------------------------
+def _reordenar(arbol):
+    """Renumera los nodos en anchura para que cada par de hermanos quede
+    contiguo (derecho = izquierdo + 1); las hojas apuntan a sí mismas."""
+    izquierdo, derecho = arbol["izquierdo"], arbol["derecho"]
+    hoja = arbol["variable"] < 0
+    orden, nuevo_izq = [0], {}
+    for viejo in orden:
+        if not hoja[viejo]:
+            nuevo_izq[viejo] = len(orden)
+            orden.extend((izquierdo[viejo], derecho[viejo]))
+    orden = np.asarray(orden)
+    nuevo_id = np.empty(izquierdo.size, dtype=np.int64)
+    nuevo_id[orden] = np.arange(orden.size)
+    hoja = hoja[orden]
+    return {
+        "variable": np.where(hoja, 0, arbol["variable"][orden]),
+        "umbral": np.where(hoja, np.inf, arbol["umbral"][orden]),
+        "izquierdo": np.array([nuevo_izq.get(v, nuevo_id[v]) for v in orden]),
+        "faltante_izq": np.where(hoja, True, arbol["faltante_izq"][orden]),
+        "valor": arbol["valor"][orden],
+        "hoja": hoja,
+    }
+
+
+def _concatenar(arboles, base, estricto, n_variables, escala=1.0, precision_simple=False):
+    """``arboles``: lista de dicts con arreglos locales por árbol."""
+    desplazamiento, partes, raices, profundidad = 0, {a: [] for a in _ARREGLOS[:-1]}, [], 0
+    for arbol in arboles:
+        profundidad = max(profundidad, _profundidad(
+            arbol["izquierdo"], arbol["derecho"], arbol["variable"] < 0
+        ))
+        arbol = _reordenar(arbol)
+        hoja = arbol["hoja"]
+        partes["variable"].append(arbol["variable"])
+        partes["umbral"].append(arbol["umbral"])
+        partes["izquierdo"].append(arbol["izquierdo"] + desplazamiento)
+        partes["faltante_izq"].append(arbol["faltante_izq"])
+        partes["valor"].append(np.where(hoja, arbol["valor"] * escala, 0.0))
+        raices.append(desplazamiento)
+        desplazamiento += hoja.size
+    return ArbolesAplanados(
+        **{a: np.concatenate(v) for a, v in partes.items()},
+        raices=np.asarray(raices), base=base, profundidad=profundidad,
+        estricto=estricto, n_variables=n_variables, precision_simple=precision_simple,
+    )
+
+
+def _profundidad(izquierdo, derecho, hoja):
+    frontera = np.array([0])
+    profundidad = 0
+    while frontera.size:
+        internos = frontera[~hoja[frontera]]
+        if not internos.size:
+            break
+        profundidad += 1
+        frontera = np.concatenate([izquierdo[internos], derecho[internos]])
+    return profundidad
+
+
+def _arbol_sklearn(arbol):
+    t = arbol.tree_
+    faltante = getattr(t, "missing_go_to_left", None)
+    return {
+        "variable": t.feature.astype(np.int64),
+        "umbral": t.threshold,
+        "izquierdo": t.children_left,
+        "derecho": t.children_right,
+        "faltante_izq": np.zeros(t.node_count, bool) if faltante is None else faltante.astype(bool),
+        "valor": t.value[:, 0, 0],
+    }
+
+
+def _aplanar_sklearn(estimador):
+    nombre = type(estimador).__name__
+    n_variables = estimador.n_features_in_
+    if nombre == "GradientBoostingRegressor":
+        if estimador.init_ == "zero":
+            base = 0.0
+        else:
+            base = float(np.ravel(estimador.init_.predict(np.zeros((1, n_variables))))[0])
+        arboles = [_arbol_sklearn(a) for a in estimador.estimators_[:, 0]]
+        return _concatenar(arboles, base, False, n_variables, escala=estimador.learning_rate)
+    if nombre in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        arboles = [_arbol_sklearn(a) for a in estimador.estimators_]
+        return _concatenar(arboles, 0.0, False, n_variables, escala=1.0 / len(arboles))
+    if nombre in ("DecisionTreeRegressor", "ExtraTreeRegressor"):
+        return _concatenar([_arbol_sklearn(estimador)], 0.0, False, n_variables)
+    return None
+
+
+def _aplanar_xgboost(booster):
+    modelo = json.loads(booster.save_raw(raw_format="json"))
+    aprendiz = modelo["learner"]
+    objetivo = aprendiz["objective"]["name"]
+    if aprendiz["gradient_booster"]["name"] != "gbtree" or not objetivo.startswith("reg:squared"):
+        return None
+    base = float(aprendiz["learner_model_param"]["base_score"].strip("[]"))
+    arboles = []
+    for t in aprendiz["gradient_booster"]["model"]["trees"]:
+        izquierdo = np.asarray(t["left_children"], dtype=np.int64)
+        condicion = np.asarray(t["split_conditions"], dtype=np.float32).astype(np.float64)
+        hoja = izquierdo < 0
+        arboles.append({
+            "variable": np.where(hoja, -1, np.asarray(t["split_indices"], dtype=np.int64)),
+            "umbral": condicion,
+            "izquierdo": izquierdo,
+            "derecho": np.asarray(t["right_children"], dtype=np.int64),
+            "faltante_izq": np.asarray(t["default_left"], dtype=bool),
+            # En las hojas de XGBoost el valor va en split_conditions
+            "valor": condicion,
+        })
+    n_variables = int(aprendiz["learner_model_param"]["num_feature"])
+    return _concatenar(arboles, base, True, n_variables, precision_simple=True)
+
+
+def aplanar(estimador):
+    """``ArbolesAplanados`` del estimador final, o ``None`` si no es un
+    ensamble de árboles soportado."""
+    if hasattr(estimador, "get_booster"):
+        return _aplanar_xgboost(estimador.get_booster())
+    if type(estimador).__name__ == "Booster":
+        return _aplanar_xgboost(estimador)
+    if hasattr(estimador, "booster"):  # ModeloXGBoostNativo
+        return _aplanar_xgboost(estimador.booster)
+    return _aplanar_sklearn(estimador)
+
+
+class MotorArboles:
+    """``predict(DataFrame)`` con escalado estándar + ``ArbolesAplanados``."""
+
+    def __init__(self, arboles, preprocesador):
+        self.arboles = arboles
+        self.feature_names_in_ = np.asarray(preprocesador["columnas"], dtype=object)
+        self.media = np.asarray(preprocesador["media"])
+        self.escala = np.asarray(preprocesador["escala"])
+
+    def transformar(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)]
+        return (np.asarray(X, dtype=np.float64) - self.media) / self.escala
+
+    def predict(self, X):
+        return self.arboles.predecir(self.transformar(X))
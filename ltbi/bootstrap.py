@@ -0,0 +1,56 @@
+"""
+Intervalos de confianza bootstrap para las métricas de un modelo.
+
+Se remuestrean con reemplazo los pares (real, predicho) del conjunto de
+prueba y se recalculan R², RMSE y MAE en cada remuestra; el intervalo es el
+percentil de esas réplicas. Las remuestras se procesan por bloques
+vectorizados, y tras cada bloque se informa el avance.
+"""
+import numpy as np
+
+BLOQUE = 100
+
+
+def _metricas(y, y_pred):
+    """R², RMSE y MAE por fila de matrices ``(remuestras, n)``."""
+    error = y - y_pred
+    sse = np.einsum("ij,ij->i", error, error)
+    centrado = y - y.mean(axis=1, keepdims=True)
+    sst = np.einsum("ij,ij->i", centrado, centrado)
+    n = y.shape[1]
+    return {
+        "R2": 1 - sse / sst,
+        "RMSE": np.sqrt(sse / n),
+        "MAE": np.abs(error).mean(axis=1),
+    }
+
+
+def intervalos_bootstrap(y_test, y_pred, n_remuestras=1000, nivel=0.95, semilla=42, progreso=None):
+    """``{métrica: {"estimacion", "inferior", "superior"}}``; ``progreso(hechas,
+    total)`` se llama tras cada bloque de remuestras."""
+    y_test = np.asarray(y_test, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    validos = ~(np.isnan(y_test) | np.isnan(y_pred))
+    y_test, y_pred = y_test[validos], y_pred[validos]
+    n = len(y_test)
+
+    rng = np.random.default_rng(semilla)
+    replicas = {nombre: np.empty(n_remuestras) for nombre in ("R2", "RMSE", "MAE")}
+    for inicio in range(0, n_remuestras, BLOQUE):
+        fin = min(inicio + BLOQUE, n_remuestras)
+        indices = rng.integers(0, n, size=(fin - inicio, n))
+        for nombre, valores in _metricas(y_test[indices], y_pred[indices]).items():
+            replicas[nombre][inicio:fin] = valores
+        if progreso is not None:
+            progreso(fin, n_remuestras)
+
+    estimaciones = _metricas(y_test[None, :], y_pred[None, :])
+    alfa = (1 - nivel) / 2
+    return {
+        nombre: {
+            "estimacion": float(estimaciones[nombre][0]),
+            "inferior": float(np.quantile(valores, alfa)),
+            "superior": float(np.quantile(valores, 1 - alfa)),
+        }
+        for nombre, valores in replicas.items()
+    }
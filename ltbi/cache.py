@@ -0,0 +1,67 @@
+"""
+Caché LRU en memoria, segura entre hilos, para salidas de callbacks ya
+serializadas (figuras, layouts, tablas).
+"""
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+from ltbi.metricas import fase
+
+
+@fase("serializacion")
+def serializar_figura(fig):
+    """Convierte una figura Plotly a su forma JSON plana (dict de listas).
+
+    Dash vuelve a serializar ese dict sin validar ni reconstruir el objeto
+    ``go.Figure``, así que guardar esta forma evita repetir ese trabajo.
+    """
+    return json.loads(pio.to_json(fig, validate=False))
+
+
+class CacheLRU:
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def get(self, clave, defecto=None):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            return defecto
+
+    def put(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def obtener(self, clave, constructor):
+        """Devuelve el valor cacheado o lo construye con ``constructor()``."""
+        valor = self.get(clave, _FALTANTE)
+        if valor is _FALTANTE:
+            valor = constructor()
+            self.put(clave, valor)
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __contains__(self, clave):
+        return clave in self._datos
+
+    def __len__(self):
+        return len(self._datos)
+
+
+_FALTANTE = object()
@@ -0,0 +1,123 @@
+"""
+Caché de salidas de callbacks compartida entre procesos (``diskcache``).
+
+Los callbacks envueltos con ``CacheCallbacks.memoizar`` son funciones
+deterministas de sus entradas y de la versión de los datos y modelos: la
+clave es ``(callback, entradas, versión)`` y el valor la salida tal como la
+devuelve el callback. El almacén es SQLite + archivos en disco, así que lo
+que calcula un worker de gunicorn lo sirve cualquier otro.
+
+- Presupuesto: ``LTBI_CACHE_CALLBACKS_MB`` (256; 0 desactiva la caché), con
+  desalojo LRU cuando se supera.
+- Ubicación: ``LTBI_CACHE_CALLBACKS_DIR`` (``data/.cache/callbacks``).
+- ``GET /api/cache/estadisticas``: aciertos, fallos, entradas y bytes, sumados
+  entre todos los workers.
+
+Dentro de ``sin_cache()`` (lo usa el perfilador) la lectura se omite: el
+callback siempre se ejecuta y su resultado reemplaza al guardado.
+"""
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import threading
+
+import diskcache
+from flask import jsonify
+
+DIR_CACHE_CALLBACKS = os.environ.get("LTBI_CACHE_CALLBACKS_DIR", os.path.join("data", ".cache", "callbacks"))
+PRESUPUESTO_MB = float(os.environ.get("LTBI_CACHE_CALLBACKS_MB", 256))
+
+_local = threading.local()
+
+
+def clave_callback(nombre, argumentos, version):
+    """Huella estable de (callback, entradas, versión)."""
+    texto = json.dumps([nombre, argumentos, version], sort_keys=True, default=str)
+    return f"{nombre}:{hashlib.sha1(texto.encode()).hexdigest()}"
+
+
+@contextlib.contextmanager
+def sin_cache():
+    """Fuerza un fallo de caché en los callbacks llamados desde este hilo."""
+    anterior = getattr(_local, "omitir", False)
+    _local.omitir = True
+    try:
+        yield
+    finally:
+        _local.omitir = anterior
+
+
+class CacheCallbacks:
+    def __init__(self, version, directorio=DIR_CACHE_CALLBACKS, presupuesto_mb=PRESUPUESTO_MB):
+        """``version()`` devuelve la versión vigente de datos y modelos."""
+        self._version = version
+        self.activa = presupuesto_mb > 0
+        self._cache = None
+        if self.activa:
+            self._cache = diskcache.Cache(
+                directorio,
+                size_limit=int(presupuesto_mb * 2 ** 20),
+                eviction_policy="least-recently-used",
+            )
+            self._cache.stats(enable=True)
+
+    def memoizar(self, nombre=None):
+        """Decorador para un callback (va debajo de ``@app.callback``)."""
+        def decorador(funcion):
+            if not self.activa:
+                return funcion
+            nombre_cb = nombre or funcion.__name__
+
+            @functools.wraps(funcion)
+            def envoltura(*args):
+                clave = clave_callback(nombre_cb, args, self._version())
+                valor = _FALTANTE
+                if not getattr(_local, "omitir", False):
+                    valor = self._cache.get(clave, default=_FALTANTE, retry=True)
+                if valor is _FALTANTE:
+                    # PreventUpdate y demás excepciones no se cachean
+                    valor = funcion(*args)
+                    self._cache.set(clave, valor, retry=True)
+                return valor
+
+            return envoltura
+        return decorador
+
+    def estadisticas(self):
+        if not self.activa:
+            return {"activa": False}
+        aciertos, fallos = self._cache.stats()
+        total = aciertos + fallos
+        return {
+            "activa": True,
+            "aciertos": aciertos,
+            "fallos": fallos,
+            "tasa_aciertos": aciertos / total if total else None,
+            "entradas": len(self._cache),
+            "bytes": self._cache.volume(),
+            "presupuesto_bytes": self._cache.size_limit,
+        }
+
+    def cerrar(self):
+        """Cierra las conexiones SQLite (se reabren solas al siguiente uso);
+        debe llamarse en el maestro antes de hacer fork."""
+        if self.activa:
+            self._cache.close()
+
+    def limpiar(self):
+        if self.activa:
+            self._cache.clear(retry=True)
+            self._cache.stats(reset=True)
+
+
+_FALTANTE = object()
+
+
+def registrar_rutas(server, cache):
+    @server.route("/api/cache/estadisticas", methods=["GET"])
+    def api_cache_estadisticas():
+        return jsonify(cache.estadisticas())
+
+    return cache
@@ -0,0 +1,14 @@
+"""
+Utilidades comunes sobre los DataFrames del dashboard.
+"""
+import hashlib
+
+import pandas as pd
+
+
+def version_dataframe(df):
+    """Huella corta del contenido de ``df`` (cambia si cambia cualquier fila)."""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    h = hashlib.sha1(hashes.tobytes())
+    h.update(",".join(map(str, df.columns)).encode())
+    return h.hexdigest()[:12]
@@ -0,0 +1,89 @@
+"""
+Vista de densidad 2D (reales vs predichos) calculada en el servidor.
+
+Los pares se agrupan en una grilla fija con ``np.bincount``; al navegador sólo
+viaja la matriz de conteos, cuyo tamaño no depende del tamaño del conjunto de
+prueba. La grilla se cachea por (modelo, versión del pack).
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from ltbi.cache import CacheLRU, serializar_figura
+from ltbi.metricas import fase
+
+N_BINS_DENSIDAD = 60
+
+
+def grilla_densidad(x, y, n_bins=N_BINS_DENSIDAD):
+    """Conteos ``(n_bins_y, n_bins_x)`` con límites comunes a ambos ejes."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[validos], y[validos]
+
+    lo = min(x.min(), y.min())
+    hi = max(x.max(), y.max())
+    bordes = np.linspace(lo, hi, n_bins + 1)
+    escala = n_bins / (hi - lo) if hi > lo else 0.0
+    ix = np.minimum(((x - lo) * escala).astype(np.int64), n_bins - 1)
+    iy = np.minimum(((y - lo) * escala).astype(np.int64), n_bins - 1)
+    conteos = np.bincount(iy * n_bins + ix, minlength=n_bins * n_bins)
+    return conteos.reshape(n_bins, n_bins), bordes
+
+
+@fase("figura")
+def figura_densidad(modelo_sel, conteos, bordes, escala="conteo"):
+    centros = (bordes[:-1] + bordes[1:]) / 2
+    if escala == "log":
+        z = np.log10(1 + conteos)
+        titulo_barra = "log₁₀(1 + n)"
+    else:
+        z = conteos
+        titulo_barra = "n"
+    z = np.where(conteos > 0, z, np.nan).astype(np.float32)
+
+    fig = go.Figure(go.Heatmap(
+        x=centros, y=centros, z=z,
+        colorscale="Blues",
+        colorbar=dict(title=titulo_barra),
+        customdata=conteos.astype(np.int32),
+        hovertemplate="Reales: %{x:.2f}<br>Predichos: %{y:.2f}<br>n: %{customdata}<extra></extra>",
+    ))
+    fig.add_trace(go.Scatter(
+        x=[bordes[0], bordes[-1]], y=[bordes[0], bordes[-1]],
+        mode="lines", line=dict(color="#E74C3C", dash="dash"), name="Ideal"
+    ))
+    fig.update_layout(
+        title=f"{modelo_sel}: Densidad Reales vs Predichos (n={int(conteos.sum()):,})",
+        xaxis_title="Reales", yaxis_title="Predichos",
+        template="plotly_white", font=dict(color="#2C3E50"),
+        showlegend=False
+    )
+    return fig
+
+
+class CacheDensidad:
+    """Grilla por (modelo, versión) y figura serializada por escala."""
+
+    def __init__(self, registro, maxsize=16):
+        self.registro = registro
+        self._grillas = CacheLRU(maxsize)
+        self._figuras = CacheLRU(maxsize * 2)
+
+    def grilla(self, nombre):
+        clave = (nombre, self.registro.version(nombre))
+
+        def _construir():
+            pack = self.registro[nombre]
+            return grilla_densidad(pack["y_test"], pack["y_pred"])
+
+        return self._grillas.obtener(clave, _construir)
+
+    def obtener(self, nombre, escala="conteo"):
+        clave = (nombre, self.registro.version(nombre), escala)
+
+        def _construir():
+            conteos, bordes = self.grilla(nombre)
+            return serializar_figura(figura_densidad(nombre, conteos, bordes, escala))
+
+        return self._figuras.obtener(clave, _construir)
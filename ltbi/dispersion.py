@@ -0,0 +1,83 @@
+"""
+Dispersión de predicciones con tamaño de respuesta acotado.
+
+``submuestrear`` elige a lo sumo ``max_puntos`` índices: conserva todos los
+puntos de celdas poco pobladas de una grilla 2D (ahí viven los atípicos) y
+toma una muestra uniforme del resto, lo que mantiene la densidad relativa.
+Por encima de ``UMBRAL_WEBGL`` puntos se usan trazas WebGL (``scattergl``).
+"""
+import os
+
+import numpy as np
+
+UMBRAL_WEBGL = int(os.environ.get("LTBI_UMBRAL_WEBGL", 1000))
+MAX_PUNTOS = int(os.environ.get("LTBI_MAX_PUNTOS", 3000))
+ZOOM_COMPLETO = os.environ.get("LTBI_ZOOM_COMPLETO", "1") == "1"
+
+
+def modo_render(n_puntos, umbral=None):
+    umbral = UMBRAL_WEBGL if umbral is None else umbral
+    return "webgl" if n_puntos > umbral else "svg"
+
+
+def submuestrear(x, y, max_puntos=None, n_celdas=64, max_por_celda_rara=2, semilla=0):
+    """Índices ordenados de una submuestra que preserva atípicos y densidad."""
+    max_puntos = MAX_PUNTOS if max_puntos is None else max_puntos
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = x.size
+    if n <= max_puntos:
+        return np.arange(n)
+
+    def _bin(v):
+        lo, hi = v.min(), v.max()
+        escala = (n_celdas - 1) / (hi - lo) if hi > lo else 0.0
+        return ((v - lo) * escala).astype(np.int64)
+
+    celda = _bin(x) * n_celdas + _bin(y)
+    conteo = np.bincount(celda, minlength=n_celdas * n_celdas)
+    raros = conteo[celda] <= max_por_celda_rara
+
+    idx_raros = np.flatnonzero(raros)
+    if idx_raros.size >= max_puntos:
+        # Demasiados puntos aislados: se priorizan las celdas más vacías
+        orden = np.argsort(conteo[celda[idx_raros]], kind="stable")
+        return np.sort(idx_raros[orden[:max_puntos]])
+
+    idx_densos = np.flatnonzero(~raros)
+    cupo = max_puntos - idx_raros.size
+    rng = np.random.default_rng(semilla)
+    elegidos = rng.choice(idx_densos, size=min(cupo, idx_densos.size), replace=False)
+    return np.sort(np.concatenate([idx_raros, elegidos]))
+
+
+def rango_zoom(relayout, eje):
+    """``(min, max)`` del eje a partir de ``relayoutData``; ``None`` si no hay zoom."""
+    if not relayout:
+        return None
+    if f"{eje}.range[0]" in relayout:
+        return relayout[f"{eje}.range[0]"], relayout[f"{eje}.range[1]"]
+    if f"{eje}.range" in relayout:
+        return tuple(relayout[f"{eje}.range"])
+    return None
+
+
+def puntos_en_ventana(x, y, relayout, max_puntos=None):
+    """Puntos visibles tras un zoom, a resolución completa si caben en el
+    presupuesto. Devuelve ``None`` cuando el gráfico vuelve a autoescala."""
+    if not relayout or relayout.get("xaxis.autorange") or relayout.get("autosize"):
+        return None
+    rango_x, rango_y = rango_zoom(relayout, "xaxis"), rango_zoom(relayout, "yaxis")
+    if rango_x is None and rango_y is None:
+        return None
+
+    x = np.asarray(x)
+    y = np.asarray(y)
+    visibles = np.ones(x.size, dtype=bool)
+    if rango_x is not None:
+        visibles &= (x >= min(rango_x)) & (x <= max(rango_x))
+    if rango_y is not None:
+        visibles &= (y >= min(rango_y)) & (y <= max(rango_y))
+    idx = np.flatnonzero(visibles)
+    sub = submuestrear(x[idx], y[idx], max_puntos)
+    return x[idx][sub], y[idx][sub]
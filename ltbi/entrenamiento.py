@@ -0,0 +1,277 @@
+"""
+Entrenamiento de los modelos de ``else/modelo.ipynb`` en una sola pasada.
+
+El cuaderno entrena los siete modelos uno tras otro y, por cada uno, ajusta
+los cinco pliegues dos veces (``cross_val_predict`` y luego
+``cross_val_score``), vuelve a ajustar sobre todo el entrenamiento y después
+reentrena los tres mejores con otros hiperparámetros. Aquí cada par
+(modelo, pliegue) y cada ajuste final es una tarea independiente, y todas se
+reparten en un único ``joblib.Parallel`` entre los núcleos:
+
+- De cada pliegue salen a la vez las predicciones fuera de pliegue y su R²
+  (``R2_train`` es la media, como en el cuaderno); ``R2_test``, ``MAE`` y
+  ``RMSE`` salen del ajuste final sobre la partición de prueba, y ese mismo
+  ajuste es el que se guarda.
+- Cada tarea limita sus hilos (``threadpoolctl`` y el ``n_jobs`` del
+  estimador) a ``--hilos``, y se lanzan ``núcleos // hilos`` procesos, así
+  que nunca hay más hilos de cálculo que núcleos. Las tareas más caras se
+  lanzan primero.
+- XGBoost usa ``tree_method="hist"`` en CPU en lugar de ``gpu_hist``.
+
+Los mejores ``--top`` modelos se escriben como packs (``ltbi.formato_pack``)
+en ``models/<modelo>_pack/``, que el registro prefiere al pickle del mismo
+nombre; en ``models/.entrenamiento/`` quedan la tabla de resultados y las
+predicciones fuera de pliegue::
+
+    python -m ltbi.entrenamiento                                  # data/tb_datos_modelo_final.csv
+    python -m ltbi.entrenamiento --ingesta --salida /tmp/packs    # tabla de ltbi.ingesta
+    python -m ltbi.entrenamiento --modelos "XGBoost,Random Forest" --hilos 2
+
+Por defecto se entrena con la misma tabla que los packs distribuidos
+(``data/tb_datos_modelo_final.csv``). Con ``--ingesta`` se usa la tabla de
+``ltbi.ingesta``, que es otra (un país-año por fila): esos packs no deben
+reemplazar a los de ``models/``, así que se exige ``--salida``.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.svm import SVR
+from threadpoolctl import threadpool_limits
+
+from ltbi import formato_pack, ingesta
+
+SEMILLA = 42
+N_PLIEGUES = 5
+FRACCION_TEST = 0.2
+DIR_REPORTE = os.path.join("models", ".entrenamiento")
+DATOS_MODELO = os.path.join("data", "tb_datos_modelo_final.csv")
+
+
+# -------------------------------------
+# Modelos (hiperparámetros del cuaderno)
+# -------------------------------------
+def _xgboost(hilos):
+    from xgboost import XGBRegressor
+
+    return XGBRegressor(
+        n_estimators=500, learning_rate=0.05, max_depth=6, subsample=0.8,
+        colsample_bytree=0.8, reg_lambda=1.0, random_state=SEMILLA,
+        tree_method="hist", device="cpu", n_jobs=hilos,
+    )
+
+
+# nombre -> (fábrica(hilos), costo relativo para ordenar las tareas)
+MODELOS = {
+    "Regresión Lineal": (lambda hilos: LinearRegression(n_jobs=hilos), 1),
+    "Ridge": (lambda hilos: Ridge(alpha=1.0, max_iter=10000, random_state=SEMILLA), 1),
+    "Lasso": (lambda hilos: Lasso(alpha=0.001, max_iter=10000, random_state=SEMILLA), 2),
+    "Random Forest": (lambda hilos: RandomForestRegressor(
+        n_estimators=300, max_depth=12, min_samples_split=3, max_features="log2",
+        random_state=SEMILLA, n_jobs=hilos,
+    ), 40),
+    "Gradient Boosting": (lambda hilos: GradientBoostingRegressor(
+        n_estimators=400, learning_rate=0.05, max_depth=4, subsample=0.9, random_state=SEMILLA,
+    ), 60),
+    "SVR": (lambda hilos: SVR(kernel="rbf", C=10, epsilon=0.1, gamma="scale"), 100),
+    "XGBoost": (_xgboost, 30),
+}
+
+
+def crear_pipeline(nombre, X, hilos=1):
+    """Escalado de las columnas numéricas + one-hot de las demás + estimador."""
+    numericas = list(X.select_dtypes("number").columns)
+    categoricas = [c for c in X.columns if c not in numericas]
+    pre = ColumnTransformer([
+        ("num", StandardScaler(), numericas),
+        ("cat", OneHotEncoder(handle_unknown="ignore"), categoricas),
+    ])
+    return Pipeline([("pre", pre), ("modelo", MODELOS[nombre][0](hilos))])
+
+
+def id_pack(nombre):
+    ascii_ = unicodedata.normalize("NFKD", nombre).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "_", ascii_.lower()).strip("_") + "_pack"
+
+
+# -------------------------------------
+# Tareas
+# -------------------------------------
+def _tarea(nombre, pliegue, X_ajuste, y_ajuste, X_eval, hilos):
+    """Ajusta y predice un pliegue (o el modelo final si ``pliegue`` es ``None``)."""
+    inicio = time.perf_counter()
+    with threadpool_limits(limits=hilos):
+        pipeline = crear_pipeline(nombre, X_ajuste, hilos)
+        pipeline.fit(X_ajuste, y_ajuste)
+        pred = pipeline.predict(X_eval)
+    segundos = time.perf_counter() - inicio
+    return nombre, pliegue, pred, segundos, pipeline if pliegue is None else None
+
+
+def _metricas(y, y_pred):
+    return {
+        "R2": r2_score(y, y_pred),
+        "MAE": mean_absolute_error(y, y_pred),
+        "RMSE": float(np.sqrt(mean_squared_error(y, y_pred))),
+    }
+
+
+class Entrenamiento:
+    """Resultado de ``entrenar``: tabla de métricas, predicciones fuera de
+    pliegue, modelos finales y la partición de prueba."""
+
+    def __init__(self, resultados, oof, modelos, predicciones, X_test, y_test, y_train, segundos):
+        self.resultados = resultados
+        self.oof = oof
+        self.modelos = modelos
+        self.predicciones = predicciones
+        self.X_test = X_test
+        self.y_test = y_test
+        self.y_train = y_train
+        self.segundos = segundos
+
+    def metricas(self, nombre):
+        """Métricas con las claves de los packs."""
+        fila = self.resultados.loc[nombre]
+        return {c: float(fila[c]) for c in ("R2_train", "R2_test", "MAE", "RMSE")}
+
+
+def entrenar(tabla, objetivo=ingesta.OBJETIVO, modelos=None, n_pliegues=N_PLIEGUES,
+             procesos=None, hilos=1, semilla=SEMILLA, verbose=0):
+    """Validación cruzada y ajuste final de ``modelos`` en un solo ``Parallel``."""
+    modelos = list(modelos or MODELOS)
+    tabla = tabla.dropna(subset=[objetivo])
+    X = tabla.drop(columns=[objetivo])
+    X = X.astype({c: np.float64 for c in X.select_dtypes("number").columns})
+    y = tabla[objetivo].to_numpy(dtype=np.float64)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=FRACCION_TEST, random_state=semilla
+    )
+    pliegues = list(KFold(n_splits=n_pliegues, shuffle=True, random_state=semilla).split(X_train))
+    procesos = procesos or max(1, (os.cpu_count() or 1) // hilos)
+
+    tareas = [(nombre, i) for nombre in modelos for i in range(n_pliegues)]
+    tareas += [(nombre, None) for nombre in modelos]
+    tareas.sort(key=lambda t: MODELOS[t[0]][1], reverse=True)
+
+    def argumentos(nombre, pliegue):
+        if pliegue is None:
+            return X_train, y_train, X_test
+        ajuste, evaluacion = pliegues[pliegue]
+        return X_train.iloc[ajuste], y_train[ajuste], X_train.iloc[evaluacion]
+
+    inicio = time.perf_counter()
+    salidas = Parallel(n_jobs=procesos, backend="loky", verbose=verbose)(
+        delayed(_tarea)(nombre, pliegue, *argumentos(nombre, pliegue), hilos)
+        for nombre, pliegue in tareas
+    )
+    total = time.perf_counter() - inicio
+
+    oof = {nombre: np.empty(len(y_train)) for nombre in modelos}
+    r2_pliegues = {nombre: [] for nombre in modelos}
+    segundos = dict.fromkeys(modelos, 0.0)
+    finales, predicciones = {}, {}
+    for nombre, pliegue, pred, seg, pipeline in salidas:
+        segundos[nombre] += seg
+        if pliegue is None:
+            finales[nombre], predicciones[nombre] = pipeline, pred
+        else:
+            evaluacion = pliegues[pliegue][1]
+            oof[nombre][evaluacion] = pred
+            r2_pliegues[nombre].append(r2_score(y_train[evaluacion], pred))
+
+    filas = []
+    for nombre in modelos:
+        prueba = _metricas(y_test, predicciones[nombre])
+        filas.append({
+            "modelo": nombre,
+            "R2_train": float(np.mean(r2_pliegues[nombre])),
+            "R2_cv_std": float(np.std(r2_pliegues[nombre])),
+            "R2_oof": r2_score(y_train, oof[nombre]),
+            "R2_test": prueba["R2"],
+            "MAE": prueba["MAE"],
+            "RMSE": prueba["RMSE"],
+            "segundos_cpu": segundos[nombre],
+        })
+    resultados = pd.DataFrame(filas).set_index("modelo").sort_values("R2_test", ascending=False)
+    return Entrenamiento(resultados, oof, finales, predicciones, X_test, y_test, y_train, total)
+
+
+# -------------------------------------
+# Salida
+# -------------------------------------
+def guardar(entrenamiento, top=3, destino="models", dir_reporte=DIR_REPORTE, origen=None):
+    """Packs de los ``top`` mejores por ``R2_test`` y el reporte; devuelve las carpetas."""
+    carpetas = []
+    for nombre in entrenamiento.resultados.index[:top]:
+        carpeta = os.path.join(destino, id_pack(nombre))
+        formato_pack.guardar_pack(
+            carpeta, nombre, entrenamiento.modelos[nombre], entrenamiento.X_test,
+            entrenamiento.y_test, entrenamiento.predicciones[nombre],
+            entrenamiento.metricas(nombre), origen=origen,
+        )
+        carpetas.append(carpeta)
+    if dir_reporte:
+        os.makedirs(dir_reporte, exist_ok=True)
+        entrenamiento.resultados.to_csv(os.path.join(dir_reporte, "resultados.csv"))
+        np.savez(
+            os.path.join(dir_reporte, "oof.npz"), y_train=entrenamiento.y_train,
+            **{id_pack(n).removesuffix("_pack"): p for n, p in entrenamiento.oof.items()},
+        )
+    return carpetas
+
+
+# -------------------------------------
+# CLI
+# -------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reentrena los modelos del cuaderno y escribe los packs.")
+    parser.add_argument("--datos", default=DATOS_MODELO, help=f"CSV de entrenamiento (por defecto, {DATOS_MODELO})")
+    parser.add_argument("--ingesta", action="store_true",
+                        help="Entrenar con la tabla de modelado de ltbi.ingesta (exige --salida)")
+    parser.add_argument("--modelos", help=f"Lista separada por comas (por defecto: {', '.join(MODELOS)})")
+    parser.add_argument("--pliegues", type=int, default=N_PLIEGUES, help="Pliegues de la validación cruzada")
+    parser.add_argument("--hilos", type=int, default=1, help="Hilos por tarea")
+    parser.add_argument("--procesos", type=int, help="Tareas simultáneas (por defecto, núcleos // hilos)")
+    parser.add_argument("--top", type=int, default=3, help="Cuántos modelos guardar como pack")
+    parser.add_argument("--salida", help="Carpeta de los packs (por defecto, models)")
+    parser.add_argument("--reporte", default=DIR_REPORTE, help="Carpeta de resultados y predicciones fuera de pliegue")
+    args = parser.parse_args(argv)
+
+    modelos = [m.strip() for m in args.modelos.split(",")] if args.modelos else None
+    desconocidos = set(modelos or []) - set(MODELOS)
+    if desconocidos:
+        parser.error(f"Modelos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    if args.ingesta:
+        if not args.salida:
+            parser.error("--ingesta exige --salida: no se reemplazan los packs de models/")
+        tabla, origen = ingesta.cargar()[1], {"archivo": "ltbi.ingesta"}
+    else:
+        tabla, origen = pd.read_csv(args.datos), {"archivo": os.path.basename(args.datos)}
+
+    entrenamiento = entrenar(
+        tabla, modelos=modelos, n_pliegues=args.pliegues, procesos=args.procesos, hilos=args.hilos,
+    )
+    print(entrenamiento.resultados.round(4).to_string())
+    print(f"✅ {len(entrenamiento.resultados)} modelos × {args.pliegues} pliegues + ajuste final "
+          f"en {entrenamiento.segundos:.1f} s")
+    for carpeta in guardar(entrenamiento, args.top, args.salida or "models", args.reporte, origen):
+        print(f"   pack: {carpeta}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
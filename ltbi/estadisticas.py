@@ -0,0 +1,118 @@
+"""
+Estadísticos descriptivos de las columnas numéricas, calculados una vez por
+versión del dataset.
+
+Media, varianza y asimetría se guardan como momentos (n, media, M2, M3) para
+poder combinar filas nuevas sin recorrer de nuevo todo el histórico; mínimo,
+máximo y faltantes se actualizan directamente. Los cuantiles son estadísticos
+de orden y se recalculan sobre los valores retenidos.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+import dash_bootstrap_components as dbc
+
+from ltbi.datos import version_dataframe
+
+CUANTILES = (0.25, 0.5, 0.75)
+
+
+def _momentos(matriz):
+    validos = ~np.isnan(matriz)
+    n = validos.sum(axis=0).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.nansum(matriz, axis=0) / n
+        d = np.where(validos, matriz - media, 0.0)
+    return n, media, (d ** 2).sum(axis=0), (d ** 3).sum(axis=0)
+
+
+class EstadisticasDescriptivas:
+    def __init__(self, df):
+        self.columnas = list(df.select_dtypes(include="number").columns)
+        self._valores = df[self.columnas].to_numpy(dtype=np.float64)
+        self._calcular_desde_cero()
+
+    def _calcular_desde_cero(self):
+        matriz = self._valores
+        self.n, self.media, self.m2, self.m3 = _momentos(matriz)
+        self.faltantes = np.isnan(matriz).sum(axis=0)
+        self.minimo = np.nanmin(matriz, axis=0)
+        self.maximo = np.nanmax(matriz, axis=0)
+        self.cuantiles = np.nanquantile(matriz, CUANTILES, axis=0)
+        self._actualizar_version()
+
+    def _actualizar_version(self):
+        self.version = version_dataframe(pd.DataFrame(self._valores, columns=self.columnas))
+        self._tabla = None
+
+    def agregar_filas(self, df_nuevo):
+        """Incorpora filas nuevas combinando momentos (Chan et al. / Pébay)."""
+        nuevos = df_nuevo[self.columnas].to_numpy(dtype=np.float64)
+        if not len(nuevos):
+            return
+        nb, media_b, m2_b, m3_b = _momentos(nuevos)
+        na, media_a, m2_a, m3_a = self.n, self.media, self.m2, self.m3
+
+        n = na + nb
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = np.where(nb > 0, media_b - media_a, 0.0)
+            delta = np.where(na > 0, delta, 0.0)
+            media = np.where(na > 0, media_a + delta * nb / n, media_b)
+            m2 = m2_a + m2_b + delta ** 2 * na * nb / n
+            m3 = (m3_a + m3_b
+                  + delta ** 3 * na * nb * (na - nb) / n ** 2
+                  + 3 * delta * (na * m2_b - nb * m2_a) / n)
+
+        self.n = n
+        self.media = media
+        self.m2 = np.nan_to_num(m2)
+        self.m3 = np.nan_to_num(m3)
+        self.faltantes = self.faltantes + np.isnan(nuevos).sum(axis=0)
+        self.minimo = np.fmin(self.minimo, np.nanmin(nuevos, axis=0))
+        self.maximo = np.fmax(self.maximo, np.nanmax(nuevos, axis=0))
+
+        self._valores = np.vstack([self._valores, nuevos])
+        self.cuantiles = np.nanquantile(self._valores, CUANTILES, axis=0)
+        self._actualizar_version()
+
+    def con_filas(self, df_nuevo):
+        """Copia con ``df_nuevo`` incorporado; ésta no cambia (puede seguir en
+        uso por la instantánea anterior)."""
+        estadisticas = copy.copy(self)
+        estadisticas.agregar_filas(df_nuevo)
+        return estadisticas
+
+    @property
+    def varianza(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 1, self.m2 / (self.n - 1), np.nan)
+
+    @property
+    def asimetria(self):
+        # Coeficiente de Fisher-Pearson ajustado (el mismo que pandas .skew())
+        n = self.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            g1 = np.sqrt(n) * self.m3 / self.m2 ** 1.5
+            return np.where(n > 2, g1 * np.sqrt(n * (n - 1)) / (n - 2), np.nan)
+
+    def tabla(self):
+        return pd.DataFrame({
+            "Promedio": self.media,
+            "Varianza": self.varianza,
+            "Máximo": self.maximo,
+            "Mínimo": self.minimo,
+            "Q1": self.cuantiles[0],
+            "Mediana": self.cuantiles[1],
+            "Q3": self.cuantiles[2],
+            "Asimetría": self.asimetria,
+            "Faltantes": self.faltantes,
+        }, index=pd.Index(self.columnas, name="Variable")).round(2)
+
+    def tabla_componente(self):
+        """Tabla Bootstrap de resumen, cacheada hasta que cambien los datos."""
+        if self._tabla is None:
+            self._tabla = dbc.Table.from_dataframe(
+                self.tabla(), striped=True, bordered=True, hover=True, index=True
+            )
+        return self._tabla
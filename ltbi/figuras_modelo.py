@@ -0,0 +1,166 @@
+"""
+Figuras de la pestaña "Visualización del modelo" y su caché.
+
+Las cuatro figuras dependen sólo del modelo elegido (y de las opciones de la
+tendencia: banda de confianza y LOWESS), así que se construyen una vez por
+(modelo, versión del pack, opciones), se guardan ya serializadas y el
+callback se reduce a una búsqueda en la caché. Las dispersiones llevan una
+submuestra de tamaño fijo (ver ``ltbi.dispersion``); la recta de tendencia y
+los histogramas usan siempre el conjunto de prueba completo, y éstos se
+agrupan en el servidor (sólo viajan los conteos por intervalo).
+"""
+import os
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from ltbi.cache import CacheLRU, serializar_figura
+from ltbi.metricas import fase
+from ltbi.dispersion import modo_render, submuestrear
+from ltbi.tendencia import ajuste_lineal, evaluar_tendencia, lowess_binned
+
+# Paleta azul oscuro consistente
+AZUL_PRINCIPAL = "#1A5276"
+AZUL_SUAVE = "#2874A6"
+AZUL_CLARO = "#85C1E9"
+NBINS_DISTRIBUCION = 50
+
+
+def trazas_tendencia(x, y, bandas=False, suavizado=False, nivel=0.95):
+    """Trazas de la recta OLS (y opcionalmente banda de confianza y LOWESS)."""
+    ajuste = ajuste_lineal(x, y)
+    x_linea = np.linspace(ajuste["x_min"], ajuste["x_max"], 100)
+    y_linea, y_inf, y_sup = evaluar_tendencia(ajuste, x_linea, nivel=nivel)
+
+    trazas = []
+    if bandas:
+        trazas.append(go.Scatter(
+            x=np.concatenate([x_linea, x_linea[::-1]]),
+            y=np.concatenate([y_sup, y_inf[::-1]]),
+            fill="toself", fillcolor="rgba(231, 76, 60, 0.15)",
+            line=dict(width=0), hoverinfo="skip",
+            name=f"IC {int(nivel * 100)}%"
+        ))
+    trazas.append(go.Scatter(
+        x=x_linea, y=y_linea, mode="lines",
+        line=dict(color="#E74C3C"),
+        name="Tendencia OLS",
+        hovertemplate=(
+            f"y = {ajuste['pendiente']:.4f}·x + {ajuste['intercepto']:.4f}"
+            f"<br>R² = {ajuste['r2']:.4f}<extra></extra>"
+        )
+    ))
+    if suavizado:
+        x_suave, y_suave = lowess_binned(x, y)
+        trazas.append(go.Scatter(
+            x=x_suave, y=y_suave, mode="lines",
+            line=dict(color="#F39C12", dash="dot"),
+            name="LOWESS"
+        ))
+    return trazas
+
+
+@fase("figura")
+def construir_figuras(modelo_sel, y_test, y_pred, bandas=False, suavizado=False, max_puntos=None):
+    y_test = np.asarray(y_test)
+    y_pred = np.asarray(y_pred)
+    residuos = y_test - y_pred
+
+    # --- Submuestra acotada (atípicos + densidad) y WebGL para muchos puntos ---
+    n = y_test.size
+    idx = submuestrear(y_test, y_pred, max_puntos)
+    idx_res = submuestrear(y_pred, residuos, max_puntos)
+    render = modo_render(idx.size)
+    sufijo = f" ({idx.size:,} de {n:,} puntos)" if idx.size < n else ""
+
+    # --- 1️⃣ Real vs Predicho ---
+    fig1 = px.scatter(
+        x=y_test[idx], y=y_pred[idx],
+        title=f"{modelo_sel}: Reales vs Predichos{sufijo}",
+        labels={"x": "Reales", "y": "Predichos"},
+        color_discrete_sequence=[AZUL_PRINCIPAL],
+        render_mode=render
+    )
+    fig1.add_trace(go.Scatter(
+        x=[y_test.min(), y_test.max()],
+        y=[y_test.min(), y_test.max()],
+        mode="lines",
+        line=dict(color="#E74C3C", dash="dash"),
+        name="Ideal"
+    ))
+    fig1.update_layout(template="plotly_white", font=dict(color="#2C3E50"))
+
+    # --- 2️⃣ Curva de regresión ---
+    fig2 = px.scatter(
+        x=y_test[idx], y=y_pred[idx],
+        title=f"{modelo_sel}: Curva de regresión ajustada{sufijo}",
+        labels={"x": "Reales", "y": "Predichos"},
+        color_discrete_sequence=[AZUL_SUAVE],
+        render_mode=render
+    )
+    fig2.update_traces(marker=dict(size=6))
+    for traza in trazas_tendencia(y_test, y_pred, bandas=bandas, suavizado=suavizado):
+        fig2.add_trace(traza)
+    fig2.update_layout(template="plotly_white", font=dict(color="#2C3E50"))
+
+    # --- 3️⃣ Residuos vs Predicción ---
+    fig3 = px.scatter(
+        x=y_pred[idx_res], y=residuos[idx_res],
+        title=f"{modelo_sel}: Residuos vs Predicción{sufijo}",
+        labels={"x": "Predichos", "y": "Residuos"},
+        color_discrete_sequence=[AZUL_PRINCIPAL],
+        render_mode=render
+    )
+    fig3.add_hline(y=0, line_dash="dash", line_color="#E74C3C")
+    fig3.update_layout(template="plotly_white", font=dict(color="#2C3E50"))
+
+    # --- 4️⃣ Distribución Reales vs Predichos ---
+    # Intervalos comunes a ambas series para que las barras se superpongan
+    validos = np.isfinite(y_test) & np.isfinite(y_pred)
+    reales, predichos = y_test[validos], y_pred[validos]
+    bordes = np.histogram_bin_edges(np.concatenate([reales, predichos]), bins=NBINS_DISTRIBUCION)
+    fig4 = go.Figure()
+    for serie, nombre, color in ((reales, "Reales", AZUL_PRINCIPAL), (predichos, "Predichos", AZUL_CLARO)):
+        conteos, _ = np.histogram(serie, bins=bordes)
+        fig4.add_trace(go.Bar(
+            x=(bordes[:-1] + bordes[1:]) / 2, y=conteos, width=np.diff(bordes),
+            name=nombre, marker_color=color,
+        ))
+    fig4.update_layout(
+        barmode="overlay", bargap=0,
+        title=f"{modelo_sel}: Distribución Reales vs Predichos",
+        template="plotly_white",
+        font=dict(color="#2C3E50"),
+        legend=dict(title="Tipo de dato")
+    )
+    fig4.update_traces(opacity=0.5)
+
+    return fig1, fig2, fig3, fig4
+
+
+class CacheFigurasModelo:
+    """Figuras serializadas por (modelo, versión del pack, opciones de la
+    tendencia), con desalojo LRU."""
+
+    def __init__(self, registro, maxsize=None):
+        self.registro = registro
+        if maxsize is None:
+            maxsize = int(os.environ.get("LTBI_CACHE_FIGURAS", 8))
+        self._cache = CacheLRU(maxsize)
+
+    def _construir(self, nombre, bandas, suavizado):
+        pack = self.registro[nombre]
+        figuras = construir_figuras(nombre, pack["y_test"], pack["y_pred"], bandas=bandas, suavizado=suavizado)
+        return tuple(serializar_figura(f) for f in figuras)
+
+    def obtener(self, nombre, opciones=None):
+        """``opciones``: valores del checklist de tendencia (``"bandas"``, ``"suavizado"``)."""
+        opciones = opciones or ()
+        bandas, suavizado = "bandas" in opciones, "suavizado" in opciones
+        clave = (nombre, self.registro.version(nombre), bandas, suavizado)
+        return self._cache.obtener(clave, lambda: self._construir(nombre, bandas, suavizado))
+
+    def precalentar(self):
+        for nombre in list(self.registro)[:self._cache.maxsize]:
+            self.obtener(nombre)
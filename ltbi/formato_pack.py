@@ -0,0 +1,243 @@
+"""
+Formato de pack de modelo versionado y columnar.
+
+Un pack es una carpeta con:
+
+- ``manifest.json``: nombre, métricas, columnas, versiones de librerías,
+  huella de contenido y la descripción de los demás archivos.
+- ``y_test.npy``, ``y_pred.npy``, ``X_test.npy``: arreglos crudos que se abren
+  con ``mmap_mode="r"`` (sin copia).
+- El modelo: XGBoost en su formato nativo (``modelo.ubj``) más los parámetros
+  del ``StandardScaler`` en el manifest; los estimadores de scikit-learn, que
+  no tienen formato nativo, se guardan como ``modelo.joblib``.
+- ``arboles.npz``: si el estimador es un ensamble de árboles soportado, sus
+  nodos aplanados para el motor vectorizado de ``ltbi.arboles``.
+
+Leer las métricas sólo requiere abrir el manifest. Conversión de los pickles
+existentes::
+
+    python -m ltbi.formato_pack models/*.pkl
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ltbi import arboles
+
+# 3: arboles.npz guarda si las hojas se suman en float32 (XGBoost)
+FORMATO = 3
+MANIFEST = "manifest.json"
+ARRAYS_PACK = ("y_test", "y_pred", "X_test")
+
+
+# -------------------------------------
+# Escritura
+# -------------------------------------
+def _versiones_librerias():
+    versiones = {"numpy": np.__version__, "pandas": pd.__version__}
+    for modulo in ("sklearn", "xgboost"):
+        try:
+            versiones[modulo] = __import__(modulo).__version__
+        except ImportError:
+            pass
+    return versiones
+
+
+def extraer_escalador(modelo):
+    """Parámetros de un Pipeline ``ColumnTransformer(StandardScaler)`` +
+    estimador, o ``None`` si el preprocesamiento no es de esa forma."""
+    pasos = getattr(modelo, "steps", None)
+    if not pasos or len(pasos) != 2:
+        return None
+    pre = pasos[0][1]
+    escalador, columnas = None, None
+    for nombre, transformador, cols in getattr(pre, "transformers_", []):
+        if len(cols) == 0 or transformador == "drop":
+            continue
+        pasos_t = getattr(transformador, "steps", [(None, transformador)])
+        if escalador is not None or len(pasos_t) != 1 or type(pasos_t[0][1]).__name__ != "StandardScaler":
+            return None
+        escalador, columnas = pasos_t[0][1], [str(c) for c in cols]
+    if escalador is None or getattr(pre, "remainder", "drop") != "drop":
+        return None
+    return {
+        "tipo": "standard_scaler",
+        "columnas": columnas,
+        "media": np.asarray(escalador.mean_, dtype=np.float64).tolist(),
+        "escala": np.asarray(escalador.scale_, dtype=np.float64).tolist(),
+    }
+
+
+def _guardar_modelo(modelo, destino):
+    estimador = modelo.steps[-1][1] if hasattr(modelo, "steps") else modelo
+    info = {"estimador": type(estimador).__name__}
+    escalador = extraer_escalador(modelo)
+    if hasattr(estimador, "get_booster") and escalador is not None:
+        estimador.get_booster().save_model(os.path.join(destino, "modelo.ubj"))
+        info.update(tipo="xgboost", archivo="modelo.ubj", preprocesador=escalador)
+    else:
+        joblib.dump(modelo, os.path.join(destino, "modelo.joblib"))
+        info.update(tipo="joblib", archivo="modelo.joblib")
+        if escalador is not None:
+            info["preprocesador"] = escalador
+    plano = arboles.aplanar(estimador) if escalador is not None else None
+    if plano is not None:
+        plano.guardar(os.path.join(destino, "arboles.npz"))
+        info["arboles"] = "arboles.npz"
+    return info
+
+
+def _huella(carpeta, archivos):
+    h = hashlib.sha1()
+    for archivo in sorted(archivos):
+        with open(os.path.join(carpeta, archivo), "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+    return h.hexdigest()[:12]
+
+
+def guardar_pack(destino, nombre, modelo, X_test, y_test, y_pred, metricas, origen=None):
+    """Escribe el pack en ``destino`` de forma atómica (carpeta temporal + rename)."""
+    tmp = f"{destino.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    columnas = [str(c) for c in getattr(X_test, "columns", [])]
+    np.save(os.path.join(tmp, "y_test.npy"), np.asarray(y_test))
+    np.save(os.path.join(tmp, "y_pred.npy"), np.asarray(y_pred))
+    np.save(os.path.join(tmp, "X_test.npy"), np.asarray(X_test, dtype=np.float64))
+    info_modelo = _guardar_modelo(modelo, tmp)
+
+    manifest = {
+        "formato": FORMATO,
+        "nombre": nombre,
+        "metricas": {k: float(v) for k, v in metricas.items()},
+        "columnas": columnas,
+        "n_test": int(len(y_test)),
+        "arrays": {a: f"{a}.npy" for a in ARRAYS_PACK},
+        "modelo": info_modelo,
+        "versiones": _versiones_librerias(),
+        "creado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "origen": origen,
+    }
+    manifest["version"] = _huella(
+        tmp, [f"{a}.npy" for a in ARRAYS_PACK] + [info_modelo["archivo"]]
+    )
+    with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(tmp, destino)
+    return manifest
+
+
+def firma_archivo(ruta):
+    st = os.stat(ruta)
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def convertir_pickle(ruta_pkl, destino=None):
+    """Convierte un pack joblib (dict con nombre/modelo/X_test/y_test/y_pred/
+    metricas) al formato de carpeta."""
+    pack = joblib.load(ruta_pkl)
+    id_pack = os.path.splitext(os.path.basename(ruta_pkl))[0]
+    destino = destino or os.path.join(os.path.dirname(ruta_pkl), id_pack)
+    nombre = pack.get("nombre") or id_pack.replace("_pack", "").replace("_", " ").title()
+    return guardar_pack(
+        destino, nombre, pack["modelo"], pack["X_test"], pack["y_test"], pack["y_pred"],
+        pack["metricas"],
+        origen={"archivo": os.path.basename(ruta_pkl), "firma": firma_archivo(ruta_pkl)},
+    )
+
+
+# -------------------------------------
+# Lectura
+# -------------------------------------
+def es_pack(carpeta):
+    return os.path.isfile(os.path.join(carpeta, MANIFEST))
+
+
+def leer_manifest(carpeta):
+    with open(os.path.join(carpeta, MANIFEST), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cargar_arrays(carpeta, manifest=None, mmap=True):
+    manifest = manifest or leer_manifest(carpeta)
+    modo = "r" if mmap else None
+    return {
+        a: np.load(os.path.join(carpeta, archivo), mmap_mode=modo)
+        for a, archivo in manifest["arrays"].items()
+    }
+
+
+class ModeloXGBoostNativo:
+    """Escalado estándar + ``xgboost.Booster`` cargado desde su formato nativo.
+
+    Expone ``predict(DataFrame)`` y ``feature_names_in_`` como el Pipeline original.
+    """
+
+    def __init__(self, ruta_booster, preprocesador):
+        import xgboost
+
+        self.booster = xgboost.Booster()
+        self.booster.load_model(ruta_booster)
+        self.feature_names_in_ = np.asarray(preprocesador["columnas"], dtype=object)
+        self.media = np.asarray(preprocesador["media"])
+        self.escala = np.asarray(preprocesador["escala"])
+
+    def transformar(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)]
+        return (np.asarray(X, dtype=np.float64) - self.media) / self.escala
+
+    def predict(self, X):
+        return self.booster.inplace_predict(self.transformar(X).astype(np.float32))
+
+
+def cargar_modelo(carpeta, manifest=None):
+    manifest = manifest or leer_manifest(carpeta)
+    info = manifest["modelo"]
+    ruta = os.path.join(carpeta, info["archivo"])
+    if info["tipo"] == "xgboost":
+        return ModeloXGBoostNativo(ruta, info["preprocesador"])
+    return joblib.load(ruta)
+
+
+def cargar_motor(carpeta, manifest=None):
+    """``MotorArboles`` del pack, o ``None`` si el pack no trae ``arboles.npz``."""
+    manifest = manifest or leer_manifest(carpeta)
+    info = manifest["modelo"]
+    if "arboles" not in info:
+        return None
+    plano = arboles.ArbolesAplanados.cargar(os.path.join(carpeta, info["arboles"]))
+    return arboles.MotorArboles(plano, info["preprocesador"])
+
+
+# -------------------------------------
+# CLI de conversión
+# -------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convierte packs .pkl al formato de carpeta con manifest.")
+    parser.add_argument("pickles", nargs="+", help="Rutas a los packs .pkl")
+    parser.add_argument("--salida", help="Carpeta destino (por defecto, junto a cada .pkl)")
+    args = parser.parse_args(argv)
+
+    for ruta in args.pickles:
+        id_pack = os.path.splitext(os.path.basename(ruta))[0]
+        destino = os.path.join(args.salida, id_pack) if args.salida else None
+        manifest = convertir_pickle(ruta, destino)
+        print(f"✅ {ruta} -> {destino or os.path.join(os.path.dirname(ruta), id_pack)} "
+              f"({manifest['nombre']}, versión {manifest['version']}, modelo {manifest['modelo']['tipo']})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
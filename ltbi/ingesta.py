@@ -0,0 +1,369 @@
+"""
+Ingesta reproducible desde los CSV crudos de la OMS.
+
+Reconstruye las dos tablas del proyecto:
+
+- ``df_imputado``: estimaciones LTBI por país y año con la limpieza del
+  informe (``else/Informe#2_DataViz.Rmd``): mediana por (región, año) para la
+  prevalencia y sus límites, mediana global para elegibles, regresión
+  encadenada para el porcentaje de niños y reemplazo iterativo de atípicos (Z-score modificado)
+  por la mediana. Los país-año que ya están en ``data/df_imputado.csv`` (la
+  salida de ``mice`` del informe) conservan esos valores; la limpieza de aquí
+  sólo decide los de filas nuevas. La regresión encadenada es determinista y
+  no reproduce el arranque aleatorio de ``mice``: sobre las 1.710 filas del
+  informe cambiaría ``porcentaje_ninos`` en 601 de ellas (hasta 22,9 puntos).
+- La tabla de modelado: ``df_imputado`` unido a la carga de TB por ``iso3`` y
+  **el mismo año**. La tabla anterior (``tb_datos_model.csv``) unía cada año
+  LTBI con todos los años de carga del país (2000–2024), ~24× más filas.
+
+Los CSV se leen por bloques y sólo con las columnas necesarias; el bloque de
+carga se filtra a los años presentes en LTBI antes de acumularse. El
+resultado se tipa de forma compacta (``tipar``: región, país e ISO3 como
+categóricas, años como ``int16`` y métricas en ``float32`` cuando no se pierde
+precisión) y se guarda en ``data/.cache/`` en Feather (Arrow IPC, conserva los
+tipos y se lee sin reparsear), con la firma de los archivos crudos (y de
+``df_imputado.csv``) en el nombre, así que sólo se reconstruye si éstos
+cambian::
+
+    python -m ltbi.ingesta            # reconstruye (si hace falta) y resume
+    python -m ltbi.ingesta --forzar   # ignora la caché
+    python -m ltbi.ingesta --memoria  # bytes por columna, sin tipar vs tipado
+"""
+import argparse
+import contextlib
+import glob
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin gunicorn, un solo proceso reconstruye
+    fcntl = None
+
+DIR_DATOS = "data"
+DIR_CACHE = os.path.join(DIR_DATOS, ".cache")
+PATRON_LTBI = "LTBI_estimates_*.csv"
+PATRON_CARGA = "TB_burden_countries_*.csv"
+FILAS_POR_BLOQUE = 50_000
+VERSION_INGESTA = 3
+# Salida del informe: fuente de verdad para los país-año que ya contiene
+RUTA_REFERENCIA = os.path.join(DIR_DATOS, "df_imputado.csv")
+CLAVE_FILA = ["country", "anio"]
+
+COLUMNAS_LTBI = {
+    "country": "country",
+    "iso3": "iso3",
+    "year": "anio",
+    "g_whoregion": "region_OMS",
+    "e_prevtx_hh_contacts_pct": "prevalencia_contactos",
+    "e_prevtx_hh_contacts_pct_lo": "prevalencia_inferior",
+    "e_prevtx_hh_contacts_pct_hi": "prevalencia_superior",
+    "e_prevtx_kids_pct": "porcentaje_ninos",
+    "e_prevtx_eligible": "elegibles_tratamiento",
+}
+VARIABLES_CARGA = ["e_tbhiv_prct", "e_mort_exc_tbhiv_100k", "e_mort_tbhiv_100k", "c_cdr"]
+
+COLUMNAS_IMPUTADO = [
+    "anio", "region_OMS", "prevalencia_contactos", "prevalencia_inferior",
+    "prevalencia_superior", "porcentaje_ninos", "elegibles_tratamiento", "country", "iso3",
+]
+# ``year`` se conserva (igual a ``anio``) porque los packs entrenados la esperan
+COLUMNAS_MODELO = [
+    "anio", "prevalencia_contactos", "porcentaje_ninos", "elegibles_tratamiento",
+    "year", *VARIABLES_CARGA,
+]
+OBJETIVO = "prevalencia_contactos"
+
+COLUMNAS_CATEGORICAS = ("region_OMS", "country", "iso3")
+COLUMNAS_ANIO = ("anio", "year")
+# Error relativo tolerado al pasar una métrica a float32
+TOLERANCIA_FLOAT32 = 1e-6
+
+
+# -------------------------------------
+# Lectura por bloques
+# -------------------------------------
+def archivo_reciente(patron, directorio=DIR_DATOS):
+    """Archivo más reciente según la fecha ``AAAA-MM-DD`` del nombre."""
+    rutas = sorted(glob.glob(os.path.join(directorio, patron)))
+    if not rutas:
+        raise FileNotFoundError(f"No hay archivos {patron} en {directorio}")
+    return rutas[-1]
+
+
+def leer_ltbi(ruta, filas_por_bloque=FILAS_POR_BLOQUE):
+    bloques = pd.read_csv(
+        ruta, usecols=list(COLUMNAS_LTBI), chunksize=filas_por_bloque,
+        dtype={"country": str, "iso3": str, "g_whoregion": str, "year": np.int64},
+    )
+    df = pd.concat(bloques, ignore_index=True).rename(columns=COLUMNAS_LTBI)
+    return df[[c for c in COLUMNAS_IMPUTADO if c in df.columns]]
+
+
+def leer_carga(ruta, anios=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Variables de carga de TB por (iso3, year), opcionalmente sólo ``anios``."""
+    partes = []
+    for bloque in pd.read_csv(
+        ruta, usecols=["iso3", "year", *VARIABLES_CARGA], chunksize=filas_por_bloque,
+        dtype={"iso3": str, "year": np.int64, **{c: np.float64 for c in VARIABLES_CARGA}},
+    ):
+        if anios is not None:
+            bloque = bloque[bloque["year"].isin(anios)]
+        partes.append(bloque)
+    return pd.concat(partes, ignore_index=True).drop_duplicates(["iso3", "year"])
+
+
+# -------------------------------------
+# Limpieza (mismos pasos que el informe)
+# -------------------------------------
+def _mediana_por_grupo(df, columnas, grupos):
+    medianas = df.groupby(grupos)[columnas].transform("median")
+    return df[columnas].fillna(medianas)
+
+
+def _regresion_encadenada(df, columnas, iteraciones=5):
+    """Imputación por ecuaciones encadenadas con regresión lineal
+    determinista (``mice(method="norm.predict")``): los faltantes parten de la
+    media y cada columna, en orden, se predice desde las demás."""
+    actual = df[columnas].astype(np.float64)
+    actual = actual.fillna(actual.mean())
+    observados = {c: df[c].notna().to_numpy() for c in columnas}
+    for _ in range(iteraciones):
+        for c in columnas:
+            if observados[c].all():
+                continue
+            X = np.column_stack([np.ones(len(actual)), actual.drop(columns=c).to_numpy()])
+            coef, *_ = np.linalg.lstsq(X[observados[c]], actual[c].to_numpy()[observados[c]], rcond=None)
+            actual[c] = np.where(observados[c], actual[c].to_numpy(), X @ coef)
+    return actual
+
+
+def _atipicos_z_modificado(x, umbral=3.5):
+    mediana = np.median(x)
+    mad = np.median(np.abs(x - mediana))
+    if mad == 0 or np.isnan(mad):
+        return np.zeros(x.size, dtype=bool), mediana
+    return np.abs(0.6745 * (x - mediana) / mad) > umbral, mediana
+
+
+def reemplazar_atipicos(df, columnas, umbral=3.5, max_iter=100):
+    """Reemplaza por la mediana los valores con |Z modificado| > ``umbral``
+    hasta que no quede ninguno (como el bucle ``repeat`` del informe)."""
+    df = df.copy()
+    for _ in range(max_iter):
+        quedan = False
+        for c in columnas:
+            x = df[c].to_numpy(dtype=np.float64, copy=True)
+            atipicos, mediana = _atipicos_z_modificado(x, umbral)
+            if atipicos.any():
+                x[atipicos] = mediana
+                df[c] = x
+                quedan = True
+        if not quedan:
+            break
+    return df
+
+
+def imputar_ltbi(df):
+    crudo, df = df, df.copy()
+    prevalencias = ["prevalencia_contactos", "prevalencia_inferior", "prevalencia_superior"]
+    # MAR: mediana por región y año
+    df[prevalencias] = _mediana_por_grupo(df, prevalencias, ["region_OMS", "anio"])
+    # MCAR: mediana global
+    df["elegibles_tratamiento"] = df["elegibles_tratamiento"].fillna(df["elegibles_tratamiento"].median())
+    # MNAR: regresión encadenada sobre las variables crudas (sin las imputaciones anteriores)
+    df["porcentaje_ninos"] = _regresion_encadenada(
+        crudo, ["porcentaje_ninos", *prevalencias, "elegibles_tratamiento"]
+    )["porcentaje_ninos"]
+    numericas = prevalencias + ["porcentaje_ninos", "elegibles_tratamiento"]
+    return reemplazar_atipicos(df, numericas)
+
+
+def aplicar_referencia(df_imputado, ruta=RUTA_REFERENCIA):
+    """Sustituye por los del informe los valores de los país-año presentes en
+    ``ruta``; las filas nuevas conservan la imputación de ``imputar_ltbi``."""
+    if not ruta or not os.path.isfile(ruta):
+        return df_imputado
+    referencia = pd.read_csv(ruta).drop_duplicates(CLAVE_FILA)
+    columnas = [c for c in referencia.columns if c in df_imputado.columns and c not in CLAVE_FILA]
+    unida = df_imputado[CLAVE_FILA].merge(referencia, on=CLAVE_FILA, how="left", indicator=True)
+    en_informe = (unida["_merge"] == "both").to_numpy()
+    df = df_imputado.copy()
+    for c in columnas:
+        df.loc[en_informe, c] = unida.loc[en_informe, c].to_numpy()
+    return df
+
+
+def tabla_modelo(df_imputado, carga):
+    """Une LTBI y carga de TB por ``iso3`` y año (una fila por país-año); los
+    faltantes de carga se imputan con la media de la región OMS."""
+    unida = df_imputado.merge(
+        carga, left_on=["iso3", "anio"], right_on=["iso3", "year"], how="inner", validate="1:1"
+    )
+    medias = unida.groupby("region_OMS", observed=True)[VARIABLES_CARGA].transform("mean")
+    unida[VARIABLES_CARGA] = unida[VARIABLES_CARGA].fillna(medias)
+    unida = unida.dropna(subset=VARIABLES_CARGA)
+    return unida[COLUMNAS_MODELO].reset_index(drop=True)
+
+
+# -------------------------------------
+# Tipos compactos
+# -------------------------------------
+def _cabe_en_float32(x):
+    x = x[~np.isnan(x)]
+    x32 = x.astype(np.float32).astype(np.float64)
+    if np.all(x == np.round(x)):  # conteos: deben conservarse exactos
+        return np.array_equal(x32, x)
+    return np.allclose(x32, x, rtol=TOLERANCIA_FLOAT32, atol=0)
+
+
+def tipar(df):
+    """Categóricas para textos repetidos, ``int16`` para años y ``float32``
+    para las métricas que lo admiten sin perder precisión."""
+    tipos = {}
+    for c in df.columns:
+        if c in COLUMNAS_CATEGORICAS:
+            tipos[c] = "category"
+        elif c in COLUMNAS_ANIO:
+            tipos[c] = np.int16
+        elif df[c].dtype == np.float64 and _cabe_en_float32(df[c].to_numpy()):
+            tipos[c] = np.float32
+    return df.astype(tipos)
+
+
+def reporte_memoria(**tablas):
+    """Bytes por columna (``memory_usage(deep=True)``) de cada tabla."""
+    filas = [
+        {"tabla": nombre, "columna": c, "tipo": str(df[c].dtype), "bytes": int(b)}
+        for nombre, df in tablas.items()
+        for c, b in df.memory_usage(deep=True, index=False).items()
+    ]
+    return pd.DataFrame(filas)
+
+
+# -------------------------------------
+# Caché columnar
+# -------------------------------------
+def _firma(rutas):
+    h = hashlib.sha1(str(VERSION_INGESTA).encode())
+    for ruta in rutas:
+        if not ruta or not os.path.isfile(ruta):
+            h.update(b"-")
+            continue
+        st = os.stat(ruta)
+        h.update(f"{os.path.basename(ruta)}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()[:12]
+
+
+@contextlib.contextmanager
+def _bloqueo(ruta):
+    """Cerrojo exclusivo entre procesos (``flock``) sobre ``ruta``."""
+    if fcntl is None:
+        yield
+        return
+    with open(ruta, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _leer_cache(rutas):
+    """Tablas de la caché, o ``None`` si falta (o desaparece mientras se lee)."""
+    try:
+        return pd.read_feather(rutas["df_imputado"]), pd.read_feather(rutas["tabla_modelo"])
+    except FileNotFoundError:
+        return None
+
+
+def _escribir(df, ruta):
+    tmp = f"{ruta}.tmp-{os.getpid()}"
+    df.to_feather(tmp)
+    os.replace(tmp, ruta)
+
+
+def construir(ruta_ltbi, ruta_carga, filas_por_bloque=FILAS_POR_BLOQUE, tipado=True,
+              ruta_referencia=RUTA_REFERENCIA):
+    """``(df_imputado, tabla_modelo)`` directamente desde los CSV crudos."""
+    df_imputado = aplicar_referencia(imputar_ltbi(leer_ltbi(ruta_ltbi, filas_por_bloque)), ruta_referencia)
+    anios = df_imputado["anio"].unique()
+    carga = leer_carga(ruta_carga, anios, filas_por_bloque)
+    modelo = tabla_modelo(df_imputado, carga)
+    if tipado:
+        return tipar(df_imputado), tipar(modelo)
+    return df_imputado, modelo
+
+
+def cargar(ruta_ltbi=None, ruta_carga=None, dir_cache=DIR_CACHE, forzar=False,
+           ruta_referencia=RUTA_REFERENCIA):
+    """Como ``construir`` pero leyendo/escribiendo la caché Feather.
+
+    Los workers de gunicorn vigilan los datos por separado: la reconstrucción
+    va bajo un cerrojo de archivo, así que sólo uno la hace y los demás leen
+    su resultado."""
+    ruta_ltbi = ruta_ltbi or archivo_reciente(PATRON_LTBI)
+    ruta_carga = ruta_carga or archivo_reciente(PATRON_CARGA)
+    firma = _firma([ruta_ltbi, ruta_carga, ruta_referencia])
+    rutas = {t: os.path.join(dir_cache, f"{t}-{firma}.feather") for t in ("df_imputado", "tabla_modelo")}
+
+    tablas = None if forzar else _leer_cache(rutas)
+    if tablas is not None:
+        return tablas
+
+    os.makedirs(dir_cache, exist_ok=True)
+    with _bloqueo(os.path.join(dir_cache, ".ingesta.lock")):
+        # Otro proceso pudo escribirla mientras se esperaba el cerrojo
+        tablas = None if forzar else _leer_cache(rutas)
+        if tablas is not None:
+            return tablas
+        df_imputado, modelo = construir(ruta_ltbi, ruta_carga, ruta_referencia=ruta_referencia)
+        vigentes = set(rutas.values())
+        for viejo in glob.glob(os.path.join(dir_cache, "*.parquet")) + glob.glob(os.path.join(dir_cache, "*.feather")):
+            if viejo not in vigentes:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(viejo)
+        _escribir(df_imputado, rutas["df_imputado"])
+        _escribir(modelo, rutas["tabla_modelo"])
+    return df_imputado, modelo
+
+
+# -------------------------------------
+# CLI
+# -------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstruye df_imputado y la tabla de modelado desde los CSV de la OMS.")
+    parser.add_argument("--ltbi", help=f"CSV de estimaciones LTBI (por defecto, el {PATRON_LTBI} más reciente)")
+    parser.add_argument("--carga", help=f"CSV de carga de TB (por defecto, el {PATRON_CARGA} más reciente)")
+    parser.add_argument("--forzar", action="store_true", help="Reconstruye aunque exista la caché")
+    parser.add_argument("--csv", help="Carpeta donde exportar además ambas tablas en CSV")
+    parser.add_argument("--memoria", action="store_true", help="Muestra bytes por columna sin tipar vs tipado")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    df_imputado, modelo = cargar(args.ltbi, args.carga, forzar=args.forzar)
+    print(f"✅ df_imputado: {len(df_imputado):,} filas; tabla de modelado: {len(modelo):,} filas "
+          f"({time.perf_counter() - inicio:.2f} s)")
+    if args.csv:
+        os.makedirs(args.csv, exist_ok=True)
+        df_imputado.to_csv(os.path.join(args.csv, "df_imputado.csv"), index=False)
+        modelo.to_csv(os.path.join(args.csv, "tb_datos_modelo_final.csv"), index=False)
+    if args.memoria:
+        crudo_imputado, crudo_modelo = construir(
+            args.ltbi or archivo_reciente(PATRON_LTBI), args.carga or archivo_reciente(PATRON_CARGA),
+            tipado=False,
+        )
+        sin_tipar = reporte_memoria(df_imputado=crudo_imputado, tabla_modelo=crudo_modelo)
+        tipado = reporte_memoria(df_imputado=df_imputado, tabla_modelo=modelo)
+        reporte = sin_tipar.merge(tipado, on=["tabla", "columna"], suffixes=("_sin_tipar", "_tipado"))
+        print(reporte.to_string(index=False))
+        print(f"Total: {sin_tipar['bytes'].sum():,} B -> {tipado['bytes'].sum():,} B")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
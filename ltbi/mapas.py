@@ -0,0 +1,59 @@
+"""
+Mapas coropléticos por año, resueltos por código ISO3.
+
+Los países se ubican con la columna ``iso3`` que ``ltbi.ingesta`` trae del
+archivo de estimaciones LTBI de la OMS, y se construye un mapa por año al
+cargar los datos. El callback sólo entrega el mapa ya serializado.
+"""
+import pandas as pd
+import plotly.express as px
+
+from ltbi.cache import serializar_figura
+from ltbi.metricas import fase
+
+
+@fase("figura")
+def construir_mapa(df_anio, anio):
+    fig_map = px.choropleth(
+        df_anio,
+        locations="iso3",
+        color="prevalencia_contactos",
+        hover_name="country",
+        color_continuous_scale="ice",
+        title=f"Mapa mundial de prevalencia LTBI ({anio})",
+        labels={"prevalencia_contactos": "Prevalencia (%)"}
+    )
+    fig_map.update_layout(margin=dict(r=0, t=50, l=0, b=0))
+    return fig_map
+
+
+class MapasPorAnio:
+    """Un mapa serializado por año, construido de antemano."""
+
+    def __init__(self, df, col_anio="anio", anios=None, base=None):
+        self.col_anio = col_anio
+        df = df.dropna(subset=["iso3"])
+        if anios is not None:
+            df = df[df[col_anio].isin(list(anios))]
+        self._mapas = dict(base._mapas) if base is not None else {}
+        for anio in anios or ():
+            self._mapas.pop(int(anio), None)
+        self._mapas.update({
+            int(anio): serializar_figura(construir_mapa(grupo, int(anio)))
+            for anio, grupo in df.groupby(col_anio, sort=True)
+        })
+
+    def con_cambios(self, df, anios):
+        """Copia que reconstruye sólo los mapas de ``anios``."""
+        return MapasPorAnio(df, self.col_anio, anios=anios, base=self)
+
+    def obtener(self, anio):
+        mapa = self._mapas.get(int(anio))
+        if mapa is None:
+            return serializar_figura(construir_mapa(
+                pd.DataFrame(columns=["iso3", "country", "prevalencia_contactos"]), int(anio)
+            ))
+        return mapa
+
+    def __contains__(self, anio):
+        return int(anio) in self._mapas
@@ -0,0 +1,181 @@
+"""
+Métricas de rendimiento por callback en formato Prometheus (``GET /metrics``).
+
+Cada petición a ``/_dash-update-component`` abre un registro por hilo; el
+callback decorado con ``medir()`` le da nombre, y ``fase()`` reparte su tiempo:
+
+- ``calculo``: el cuerpo del callback (filtros, agregados, modelos, lecturas
+  de caché) menos las fases anidadas;
+- ``figura``: construcción de figuras Plotly (funciones marcadas con
+  ``@fase("figura")``);
+- ``serializacion``: ``serializar_figura`` más el resto de la petición, es
+  decir, el despacho de Dash y su ``to_json`` de la respuesta.
+
+Series (etiqueta ``callback``):
+
+- ``ltbi_callback_llamadas_total{resultado="ok|sin_cambios|error"}``
+- ``ltbi_callback_duracion_segundos``: histograma de la petición completa
+- ``ltbi_callback_fase_segundos{fase=...}``: histograma por fase
+- ``ltbi_callback_respuesta_bytes``: histograma del tamaño de la respuesta
+
+Registrar es sumar en memoria; el texto sólo se genera cuando alguien lee
+``/metrics``. Con varios workers de gunicorn se usa el modo multiproceso de
+``prometheus_client`` (``PROMETHEUS_MULTIPROC_DIR``, ver ``gunicorn.conf.py``)
+y ``/metrics`` suma los de todos.
+"""
+import contextlib
+import functools
+import os
+import threading
+import time
+
+from flask import Response, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+RUTA_CALLBACKS = "/_dash-update-component"
+FASES = ("calculo", "figura", "serializacion")
+
+LLAMADAS = Counter(
+    "ltbi_callback_llamadas", "Peticiones por callback de Dash.", ["callback", "resultado"]
+)
+DURACION = Histogram(
+    "ltbi_callback_duracion_segundos", "Duración de la petición completa.", ["callback"]
+)
+DURACION_FASE = Histogram(
+    "ltbi_callback_fase_segundos", "Tiempo de cada fase dentro de la petición.", ["callback", "fase"]
+)
+BYTES_RESPUESTA = Histogram(
+    "ltbi_callback_respuesta_bytes", "Tamaño de la respuesta JSON.", ["callback"],
+    buckets=(1e3, 4e3, 16e3, 64e3, 256e3, 1e6, 4e6, 16e6),
+)
+
+_local = threading.local()
+
+# Perfilador bajo demanda (ltbi/perfilador.py), si se activó con usar_perfilador
+_perfilador = None
+
+
+class _Registro:
+    """Tiempos de una petición: fases exclusivas (una fase anidada no cuenta
+    en la que la contiene)."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.inicio = time.perf_counter()
+        self.fases = dict.fromkeys(FASES, 0.0)
+        self.pila = []
+
+
+@contextlib.contextmanager
+def fase(nombre):
+    """Atribuye el tiempo del bloque a ``nombre`` en la petición en curso;
+    fuera de una petición de callback no hace nada. Sirve como decorador."""
+    registro = getattr(_local, "registro", None)
+    if registro is None:
+        yield
+        return
+    registro.pila.append(0.0)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = time.perf_counter() - inicio
+        anidado = registro.pila.pop()
+        registro.fases[nombre] += total - anidado
+        if registro.pila:
+            registro.pila[-1] += total
+
+
+def medir(nombre=None):
+    """Decorador para un callback (va debajo de ``@app.callback``): le da
+    nombre a la petición y mide su cuerpo como fase ``calculo``."""
+    def decorador(funcion):
+        nombre_cb = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args):
+            registro = getattr(_local, "registro", None)
+            if registro is not None:
+                registro.nombre = nombre_cb
+            with fase("calculo"):
+                if _perfilador is not None:
+                    return _perfilador.ejecutar(nombre_cb, funcion, args)
+                return funcion(*args)
+
+        return envoltura
+    return decorador
+
+
+def usar_perfilador(perfilador):
+    """Los callbacks decorados con ``medir`` consultan a ``perfilador`` si
+    deben ejecutarse perfilados."""
+    global _perfilador
+    _perfilador = perfilador
+    return perfilador
+
+
+def _cerrar(registro, resultado, bytes_respuesta=None):
+    duracion = time.perf_counter() - registro.inicio
+    medidas = sum(registro.fases.values())
+    registro.fases["serializacion"] += max(duracion - medidas, 0.0)
+
+    LLAMADAS.labels(registro.nombre, resultado).inc()
+    DURACION.labels(registro.nombre).observe(duracion)
+    for nombre_fase, segundos in registro.fases.items():
+        DURACION_FASE.labels(registro.nombre, nombre_fase).observe(segundos)
+    if bytes_respuesta is not None:
+        BYTES_RESPUESTA.labels(registro.nombre).observe(bytes_respuesta)
+
+
+def exportar():
+    """Texto de exposición de Prometheus (sumado entre workers si aplica)."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro)
+    return generate_latest(REGISTRY)
+
+
+def registrar_rutas(server):
+    @server.before_request
+    def _abrir_registro():
+        if request.path == RUTA_CALLBACKS:
+            # Sin decorador, el callback se identifica por sus salidas
+            cuerpo = request.get_json(silent=True) or {}
+            _local.registro = _Registro(cuerpo.get("output", "desconocido"))
+
+    @server.after_request
+    def _registrar_respuesta(respuesta):
+        registro = getattr(_local, "registro", None)
+        if registro is not None:
+            _local.registro = None
+            if respuesta.status_code == 204:  # PreventUpdate
+                resultado = "sin_cambios"
+            elif respuesta.status_code < 400:
+                resultado = "ok"
+            else:
+                resultado = "error"
+            _cerrar(registro, resultado, respuesta.calculate_content_length())
+        return respuesta
+
+    @server.teardown_request
+    def _registrar_excepcion(error):
+        # Excepción no capturada: after_request no llegó a ejecutarse
+        registro = getattr(_local, "registro", None)
+        if registro is not None:
+            _local.registro = None
+            _cerrar(registro, "error")
+
+    @server.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(exportar(), mimetype=CONTENT_TYPE_LATEST)
+
+    return server
@@ -0,0 +1,158 @@
+"""
+Captura de perfiles bajo demanda para callbacks concretos, sin redesplegar.
+
+Un administrador arma el perfilador para las próximas ``n`` invocaciones de
+un callback (por su nombre en ``ltbi/metricas.py``); cada una se ejecuta bajo
+``cProfile`` y ``tracemalloc`` y deja en ``LTBI_PERFILES_DIR``
+(``data/.cache/perfiles``):
+
+- ``<callback>_<fecha>_<pid>.prof``: estadísticas de ``pstats`` (se abren con
+  ``python -m pstats`` o snakeviz), con las funciones internas de pandas y
+  plotly;
+- ``<callback>_<fecha>_<pid>.txt``: resumen legible con las funciones de mayor
+  tiempo acumulado y las líneas que más memoria asignaron.
+
+Rutas (todas exigen la cabecera ``X-LTBI-Admin`` igual a ``LTBI_ADMIN_TOKEN``;
+sin esa variable responden 403):
+
+- ``POST /api/perfilador?callback=actualizar_vista_global&n=3``: arma.
+- ``GET /api/perfilador``: invocaciones pendientes y capturas guardadas.
+- ``GET /api/perfilador/capturas/<archivo>``: descarga una captura.
+
+Una invocación perfilada omite la caché compartida de callbacks
+(``ltbi.cache_compartida.sin_cache``): la captura siempre mide el cuerpo real
+del callback, no la lectura de SQLite.
+
+Las invocaciones pendientes viven en disco (``diskcache``), así que armar en
+un worker de gunicorn vale para todos. Sin nada armado, el costo por llamada
+es comprobar que no existe un archivo.
+"""
+import cProfile
+import datetime
+import hmac
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+
+import diskcache
+from flask import abort, jsonify, request, send_from_directory
+
+from ltbi.cache_compartida import sin_cache
+
+DIR_PERFILES = os.environ.get("LTBI_PERFILES_DIR", os.path.join("data", ".cache", "perfiles"))
+TOKEN_ADMIN = os.environ.get("LTBI_ADMIN_TOKEN", "")
+MAX_INVOCACIONES = 20
+LINEAS_RESUMEN = 40
+
+
+class Perfilador:
+    def __init__(self, directorio=DIR_PERFILES):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._pendientes = diskcache.Cache(os.path.join(directorio, ".pendientes"))
+        self._marca = os.path.join(directorio, ".armado")
+        # tracemalloc es global al proceso: una captura a la vez
+        self._lock = threading.Lock()
+
+    # --- Armado ---
+    def armar(self, callback, n=1):
+        with self._pendientes.transact():
+            self._pendientes[callback] = n
+        open(self._marca, "a").close()
+
+    def pendientes(self):
+        return {callback: self._pendientes[callback] for callback in self._pendientes}
+
+    def _tomar(self, callback):
+        """Descuenta una invocación pendiente de ``callback``; ``True`` si había."""
+        if not os.path.exists(self._marca):
+            return False
+        with self._pendientes.transact():
+            n = self._pendientes.get(callback, 0)
+            if n <= 0:
+                return False
+            if n > 1:
+                self._pendientes[callback] = n - 1
+            else:
+                del self._pendientes[callback]
+                if len(self._pendientes) == 0 and os.path.exists(self._marca):
+                    os.remove(self._marca)
+        return True
+
+    # --- Captura ---
+    def ejecutar(self, callback, funcion, args):
+        """Ejecuta ``funcion(*args)``, perfilada si ``callback`` está armado."""
+        if not self._tomar(callback):
+            return funcion(*args)
+        with self._lock:
+            perfil = cProfile.Profile()
+            tracemalloc.start()
+            try:
+                with sin_cache():
+                    return perfil.runcall(funcion, *args)
+            finally:
+                instantanea = tracemalloc.take_snapshot()
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self._guardar(callback, perfil, instantanea, pico)
+
+    def _guardar(self, callback, perfil, instantanea, pico):
+        fecha = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        base = os.path.join(self.directorio, f"{callback}_{fecha}_{os.getpid()}")
+        perfil.dump_stats(base + ".prof")
+
+        texto = io.StringIO()
+        estadisticas = pstats.Stats(perfil, stream=texto)
+        texto.write(f"Callback: {callback}\nTiempo total: {estadisticas.total_tt * 1000:.1f} ms\n")
+        texto.write(f"Pico de memoria asignada: {pico / 2 ** 20:.2f} MB\n\n")
+        estadisticas.sort_stats("cumulative").print_stats(LINEAS_RESUMEN)
+        texto.write("\nLíneas con más memoria asignada (vigente al terminar):\n")
+        for estadistica in instantanea.statistics("lineno")[:LINEAS_RESUMEN]:
+            texto.write(f"{estadistica}\n")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(texto.getvalue())
+
+    def cerrar(self):
+        """Cierra la conexión SQLite; debe llamarse en el maestro antes del fork."""
+        self._pendientes.close()
+
+    def capturas(self):
+        return sorted(
+            (a for a in os.listdir(self.directorio) if a.endswith((".prof", ".txt"))),
+            reverse=True,
+        )
+
+
+def _exigir_admin():
+    enviado = request.headers.get("X-LTBI-Admin", "")
+    if not TOKEN_ADMIN or not hmac.compare_digest(enviado, TOKEN_ADMIN):
+        abort(403)
+
+
+def registrar_rutas(server, perfilador):
+    @server.route("/api/perfilador", methods=["POST"])
+    def api_perfilador_armar():
+        _exigir_admin()
+        callback = request.values.get("callback")
+        try:
+            n = int(request.values.get("n", 1))
+        except ValueError:
+            return jsonify(error="n debe ser un entero."), 400
+        if not callback or not 1 <= n <= MAX_INVOCACIONES:
+            return jsonify(error=f"Se requiere callback y 1 <= n <= {MAX_INVOCACIONES}."), 400
+        perfilador.armar(callback, n)
+        return jsonify(callback=callback, pendientes=n)
+
+    @server.route("/api/perfilador", methods=["GET"])
+    def api_perfilador_estado():
+        _exigir_admin()
+        return jsonify(pendientes=perfilador.pendientes(), capturas=perfilador.capturas())
+
+    @server.route("/api/perfilador/capturas/<path:archivo>", methods=["GET"])
+    def api_perfilador_descargar(archivo):
+        _exigir_admin()
+        return send_from_directory(os.path.abspath(perfilador.directorio), archivo, as_attachment=True)
+
+    return perfilador
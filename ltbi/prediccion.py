@@ -0,0 +1,226 @@
+"""
+Endpoint HTTP de predicción en línea con micro-lotes.
+
+Las peticiones concurrentes para un mismo modelo se encolan y un hilo por
+modelo las agrupa (hasta ``LTBI_LOTE_MAX_FILAS`` filas o
+``LTBI_LOTE_ESPERA_MS`` milisegundos) antes de llamar una sola vez a
+``predict``. Rutas:
+
+- ``POST /api/prediccion``: JSON ``{"modelo": ..., "filas": [...]}`` (o
+  ``"fila": {...}``), o CSV con ``?modelo=...``.
+- ``GET /api/prediccion/esquema``: columnas esperadas por modelo.
+- ``GET /api/prediccion/estadisticas``: filas/s en ``predict`` y percentiles de
+  latencia por lote.
+
+Cada petición se valida y convierte a números antes de entrar en la cola, y
+si un lote falla igualmente, sus peticiones se repiten por separado: una
+petición inválida nunca hace fallar (ni ve el error de) las demás.
+"""
+import io
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+from flask import jsonify, request
+
+LOTE_MAX_FILAS = int(os.environ.get("LTBI_LOTE_MAX_FILAS", 4096))
+LOTE_ESPERA_MS = float(os.environ.get("LTBI_LOTE_ESPERA_MS", 5))
+VENTANA_ESTADISTICAS = 1000
+
+
+class ErrorPrediccion(ValueError):
+    pass
+
+
+class ModeloNoRegistrado(LookupError):
+    pass
+
+
+def columnas_modelo(modelo):
+    columnas = getattr(modelo, "feature_names_in_", None)
+    if columnas is None:
+        raise ErrorPrediccion("El modelo no declara las columnas de entrada.")
+    return [str(c) for c in columnas]
+
+
+class MicroLotes:
+    """Cola + hilo de servicio que agrupa peticiones para un modelo."""
+
+    def __init__(self, nombre, modelo, max_filas=LOTE_MAX_FILAS, espera_ms=LOTE_ESPERA_MS):
+        self.nombre = nombre
+        self.modelo = modelo
+        self.columnas = columnas_modelo(modelo)
+        self.max_filas = max_filas
+        self.espera = espera_ms / 1000
+        self._cola = queue.Queue()
+        self._lotes = deque(maxlen=VENTANA_ESTADISTICAS)  # (t_fin, filas, latencia_s, peticiones)
+        self._hilo = threading.Thread(target=self._servir, name=f"lotes-{nombre}", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, filas):
+        faltantes = [c for c in self.columnas if c not in filas.columns]
+        if faltantes:
+            raise ErrorPrediccion(f"Faltan columnas: {', '.join(faltantes)}")
+        futuro = Future()
+        self._cola.put((_numericas(filas[self.columnas]), futuro))
+        return futuro
+
+    def _servir(self):
+        while True:
+            pendientes = [self._cola.get()]
+            n_filas = len(pendientes[0][0])
+            limite = time.perf_counter() + self.espera
+            while n_filas < self.max_filas:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                pendientes.append(item)
+                n_filas += len(item[0])
+            self._procesar(pendientes, n_filas)
+
+    def _procesar(self, pendientes, n_filas):
+        inicio = time.perf_counter()
+        try:
+            lote = pd.concat([filas for filas, _ in pendientes], ignore_index=True)
+            predicciones = np.asarray(self.modelo.predict(lote), dtype=np.float64)
+        except Exception as e:
+            if len(pendientes) == 1:
+                pendientes[0][1].set_exception(e)
+            else:
+                # Aislar la petición culpable: cada una se repite por separado
+                for item in pendientes:
+                    self._procesar([item], len(item[0]))
+            return
+        fin = time.perf_counter()
+        self._lotes.append((fin, n_filas, fin - inicio, len(pendientes)))
+
+        desde = 0
+        for filas, futuro in pendientes:
+            futuro.set_result(predicciones[desde:desde + len(filas)])
+            desde += len(filas)
+
+    def estadisticas(self):
+        lotes = list(self._lotes)
+        if not lotes:
+            return {"lotes": 0}
+        _, filas, latencias, peticiones = map(np.asarray, zip(*lotes))
+        return {
+            "lotes": int(len(lotes)),
+            "filas": int(filas.sum()),
+            "peticiones": int(peticiones.sum()),
+            "filas_por_lote_media": float(filas.mean()),
+            # Sólo el tiempo dentro de ``predict``, sin los intervalos ociosos
+            "filas_por_segundo_prediccion": float(filas.sum() / latencias.sum()) if latencias.sum() > 0 else None,
+            "latencia_lote_ms": {
+                f"p{p}": float(np.percentile(latencias, p) * 1000) for p in (50, 90, 95, 99)
+            },
+        }
+
+
+class ServicioPrediccion:
+    def __init__(self, registro):
+        self.registro = registro
+        self._lotes = {}
+        self._lock = threading.Lock()
+
+    def lotes(self, nombre):
+        if nombre not in self.registro:
+            raise ModeloNoRegistrado(nombre)
+        with self._lock:
+            servicio = self._lotes.get(nombre)
+            if servicio is None:
+                servicio = MicroLotes(nombre, self.registro.motor(nombre))
+                self._lotes[nombre] = servicio
+        return servicio
+
+    def predecir(self, nombre, filas, timeout=30):
+        return self.lotes(nombre).enviar(filas).result(timeout=timeout)
+
+    def columnas(self, nombre):
+        """Columnas de entrada sin cargar el modelo (del manifest del pack)."""
+        servicio = self._lotes.get(nombre)
+        if servicio is not None:
+            return servicio.columnas
+        return list(self.registro.entrada(nombre)["columnas"])
+
+    def estadisticas(self):
+        return {nombre: servicio.estadisticas() for nombre, servicio in self._lotes.items()}
+
+
+def _numericas(filas):
+    """Convierte las columnas a ``float64``; rechaza las filas con valores no numéricos."""
+    convertidas = filas.apply(pd.to_numeric, errors="coerce").astype(np.float64)
+    invalidas = convertidas.isna() & filas.notna()
+    if invalidas.to_numpy().any():
+        posiciones = np.flatnonzero(invalidas.to_numpy().any(axis=1))
+        columnas = [c for c in filas.columns if invalidas[c].any()]
+        raise ErrorPrediccion(
+            f"Valores no numéricos en las filas {', '.join(map(str, posiciones[:10]))} "
+            f"(columnas: {', '.join(columnas)})"
+        )
+    return convertidas
+
+
+def _leer_peticion():
+    """Devuelve (modelo, DataFrame de filas) a partir de JSON o CSV."""
+    tipo = request.mimetype or ""
+    if tipo in ("text/csv", "application/csv"):
+        filas = pd.read_csv(io.BytesIO(request.get_data()))
+        return request.args.get("modelo"), filas
+
+    cuerpo = request.get_json(silent=True)
+    if not isinstance(cuerpo, dict):
+        raise ErrorPrediccion("Se esperaba un objeto JSON o un CSV.")
+    if "filas" in cuerpo:
+        filas = cuerpo["filas"]
+        if not isinstance(filas, list):
+            raise ErrorPrediccion("'filas' debe ser una lista de objetos.")
+    elif "fila" in cuerpo:
+        filas = [cuerpo["fila"]]
+    else:
+        raise ErrorPrediccion("Falta 'filas' o 'fila'.")
+    return cuerpo.get("modelo") or request.args.get("modelo"), pd.DataFrame(filas)
+
+
+def registrar_rutas(server, registro):
+    servicio = ServicioPrediccion(registro)
+
+    @server.route("/api/prediccion", methods=["POST"])
+    def api_prediccion():
+        try:
+            modelo = None
+            modelo, filas = _leer_peticion()
+            modelo = modelo or next(iter(registro))
+            if filas.empty:
+                raise ErrorPrediccion("No se recibieron filas.")
+            predicciones = servicio.predecir(modelo, filas)
+        except ModeloNoRegistrado:
+            return jsonify(error=f"Modelo no registrado: {modelo}", modelos=list(registro)), 404
+        except TimeoutError:
+            return jsonify(error="La predicción tardó demasiado; reintente."), 503
+        except (ErrorPrediccion, ValueError) as e:
+            return jsonify(error=str(e)), 400
+        except Exception:
+            # Fallo del modelo o al cargarlo: se registra y se responde en JSON
+            server.logger.exception("Error al predecir con %s", modelo)
+            return jsonify(error=f"Error interno al predecir con {modelo}."), 500
+        return jsonify(modelo=modelo, n=int(len(predicciones)), predicciones=predicciones.tolist())
+
+    @server.route("/api/prediccion/esquema", methods=["GET"])
+    def api_prediccion_esquema():
+        return jsonify({nombre: servicio.columnas(nombre) for nombre in registro})
+
+    @server.route("/api/prediccion/estadisticas", methods=["GET"])
+    def api_prediccion_estadisticas():
+        return jsonify(servicio.estadisticas())
+
+    return servicio
@@ -0,0 +1,181 @@
+"""
+Recarga en caliente de nuevas publicaciones de la OMS.
+
+``VigilanteDatos`` revisa cada ``LTBI_RECARGA_SEGUNDOS`` (60 por defecto; 0
+la desactiva) cuál es el archivo más reciente de cada fuente en ``data/``
+(``LTBI_estimates_AAAA-MM-DD.csv``, ``TB_burden_countries_AAAA-MM-DD.csv``).
+Si cambia alguno, un hilo en segundo plano reconstruye las tablas tipadas
+(``ltbi.ingesta``) y una nueva ``Instantanea``, y la publica con una sola
+asignación. Cada callback toma ``vigilante.actual`` una vez al empezar, así
+que los que están en curso terminan sobre la instantánea anterior.
+
+El hilo se arranca con ``iniciar()`` en el proceso que atiende peticiones
+(``app.py`` en modo desarrollo, ``post_fork`` de gunicorn en producción):
+los hilos no sobreviven a un ``fork`` y el maestro no debe tener uno vivo.
+
+Entre instantáneas sólo se recalculan los agregados de los años con filas
+agregadas, eliminadas o modificadas (cubo región × año y mapas por año). Si
+la publicación nueva sólo agrega filas, los estadísticos descriptivos
+combinan las filas nuevas con los momentos ya calculados en lugar de
+recorrer todo el histórico.
+"""
+import os
+import threading
+import time
+
+import pandas as pd
+
+from ltbi import ingesta
+from ltbi.agregados import CuboAgregados
+from ltbi.datos import version_dataframe
+from ltbi.estadisticas import EstadisticasDescriptivas
+from ltbi.mapas import MapasPorAnio
+from ltbi.resumenes import CacheFigurasEDA
+
+RECARGA_SEGUNDOS = float(os.environ.get("LTBI_RECARGA_SEGUNDOS", 60))
+
+
+COLUMNAS_MAPAS = ["anio", "iso3", "country", "prevalencia_contactos"]
+
+
+def anios_cambiados(viejo, nuevo, columnas=None, col_anio="anio"):
+    """Años con alguna fila distinta (en ``columnas``, o en todas) entre
+    ``viejo`` y ``nuevo``, o ``None`` si cambiaron las columnas."""
+    if list(viejo.columns) != list(nuevo.columns):
+        return None
+    if columnas is not None:
+        viejo, nuevo = viejo[columnas], nuevo[columnas]
+
+    def _filas(df):
+        huellas = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        return pd.Series(df[col_anio].to_numpy(), index=huellas)
+
+    filas_viejo, filas_nuevo = _filas(viejo), _filas(nuevo)
+    distintas = filas_viejo.index.symmetric_difference(filas_nuevo.index)
+    anios = pd.concat([filas_viejo, filas_nuevo])
+    return sorted({int(a) for a in anios[anios.index.isin(distintas)]})
+
+
+def filas_agregadas(viejo, nuevo):
+    """Filas de ``nuevo`` que no están en ``viejo`` si ``nuevo`` conserva todas
+    las de ``viejo`` (con sus repeticiones); ``None`` si se quitó o modificó alguna."""
+    if list(viejo.columns) != list(nuevo.columns):
+        return None
+
+    def _claves(df):
+        huellas = pd.Series(pd.util.hash_pandas_object(df, index=False).to_numpy())
+        return pd.MultiIndex.from_arrays([huellas, huellas.groupby(huellas).cumcount()])
+
+    claves_viejo, claves_nuevo = _claves(viejo), _claves(nuevo)
+    if not claves_viejo.isin(claves_nuevo).all():
+        return None
+    return nuevo[~claves_nuevo.isin(claves_viejo)]
+
+
+class Instantanea:
+    """Tablas de una publicación de la OMS y todo lo que se deriva de ellas."""
+
+    def __init__(self, df_imputado, tabla_modelo, archivos, cubo, mapas, estadisticas):
+        self.df_imputado = df_imputado
+        self.tabla_modelo = tabla_modelo
+        self.archivos = archivos
+        self.cubo = cubo
+        self.mapas = mapas
+        self.estadisticas = estadisticas
+        self.version = version_dataframe(df_imputado)
+        self.figuras_eda = CacheFigurasEDA(df_imputado, estadisticas.version)
+
+    @classmethod
+    def construir(cls, df_imputado, tabla_modelo, archivos):
+        return cls(
+            df_imputado, tabla_modelo, archivos,
+            cubo=CuboAgregados(df_imputado),
+            mapas=MapasPorAnio(df_imputado),
+            estadisticas=EstadisticasDescriptivas(df_imputado),
+        )
+
+    def derivar(self, df_imputado, tabla_modelo, archivos):
+        """Nueva instantánea recalculando sólo los años que cambiaron; devuelve
+        ``(instantanea, {agregado: años})``, con ``None`` si fue completa."""
+        anios = anios_cambiados(self.df_imputado, df_imputado)
+        cubo = self.cubo.con_cambios(df_imputado, anios) if anios is not None else None
+        if cubo is None:
+            return Instantanea.construir(df_imputado, tabla_modelo, archivos), None
+        # Los mapas sólo dependen de la prevalencia por país: una imputación
+        # global que mueva otra columna en todos los años no los invalida.
+        anios_mapas = anios_cambiados(self.df_imputado, df_imputado, COLUMNAS_MAPAS)
+        estadisticas = self.estadisticas
+        if anios:
+            agregadas = filas_agregadas(self.df_imputado, df_imputado)
+            estadisticas = (EstadisticasDescriptivas(df_imputado) if agregadas is None
+                            else estadisticas.con_filas(agregadas))
+        return Instantanea(
+            df_imputado, tabla_modelo, archivos,
+            cubo=cubo,
+            mapas=self.mapas.con_cambios(df_imputado, anios_mapas),
+            estadisticas=estadisticas,
+        ), {"cubo": anios, "mapas": anios_mapas}
+
+
+def archivos_vigentes(directorio=ingesta.DIR_DATOS):
+    """Rutas del archivo más reciente de cada fuente y su firma (tamaño, mtime)."""
+    rutas = (
+        ingesta.archivo_reciente(ingesta.PATRON_LTBI, directorio),
+        ingesta.archivo_reciente(ingesta.PATRON_CARGA, directorio),
+    )
+    return rutas, tuple((os.stat(r).st_size, os.stat(r).st_mtime_ns) for r in rutas)
+
+
+class VigilanteDatos:
+    """Publica la ``Instantanea`` vigente y la renueva en segundo plano."""
+
+    def __init__(self, directorio=ingesta.DIR_DATOS, intervalo=RECARGA_SEGUNDOS):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._pid = None
+        self.recargas = 0
+        self.ultima_recarga_ms = None
+        rutas, firma = archivos_vigentes(directorio)
+        self._firma = firma
+        self.dir_cache = os.path.join(directorio, os.path.basename(ingesta.DIR_CACHE))
+        self._actual = Instantanea.construir(*ingesta.cargar(*rutas, dir_cache=self.dir_cache), archivos=rutas)
+
+    @property
+    def actual(self):
+        return self._actual
+
+    def iniciar(self):
+        """Arranca el hilo vigilante (una vez por proceso)."""
+        with self._lock:
+            if self.intervalo <= 0 or self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._vigilar, name="vigilante-datos", daemon=True).start()
+
+    def _vigilar(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                self.revisar()
+            except Exception as e:  # archivo a medio copiar, CSV inválido...
+                print(f"⚠️ No se pudieron recargar los datos: {e}")
+
+    def revisar(self):
+        """Recarga si cambió el archivo vigente de alguna fuente; devuelve
+        los años recalculados por agregado, ``None`` si fue completa, o
+        ``False`` si no había cambios."""
+        rutas, firma = archivos_vigentes(self.directorio)
+        if firma == self._firma:
+            return False
+        inicio = time.perf_counter()
+        df_imputado, tabla_modelo = ingesta.cargar(*rutas, dir_cache=self.dir_cache)
+        nueva, anios = self._actual.derivar(df_imputado, tabla_modelo, rutas)
+        self._actual = nueva
+        self._firma = firma
+        self.recargas += 1
+        self.ultima_recarga_ms = (time.perf_counter() - inicio) * 1000
+        detalle = "completa" if anios is None else ", ".join(f"{k}: {v}" for k, v in anios.items())
+        print(f"🔄 Datos recargados desde {', '.join(map(os.path.basename, rutas))} "
+              f"({detalle}, {self.ultima_recarga_ms:.0f} ms)")
+        return anios
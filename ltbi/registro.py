@@ -0,0 +1,186 @@
+"""
+Registro perezoso de los packs de modelos guardados en ``models/``.
+
+Se reconocen dos formas de pack:
+
+- Carpetas con ``manifest.json`` (ver ``ltbi.formato_pack``): se leen tal cual.
+- Pickles ``*.pkl`` heredados: se convierten una sola vez a
+  ``models/.cache/<pack>/`` y se vuelven a convertir sólo si el pickle cambia.
+
+Al arrancar sólo se leen los manifests (nombre, métricas, versión). Los
+arreglos ``y_test``/``y_pred``/``X_test`` se abren con ``mmap_mode="r"``, de
+modo que los workers comparten las mismas páginas, y el estimador sólo se
+carga cuando algún callback lo pide. Para predecir en lote, ``motor()``
+devuelve el estimador; con ``LTBI_MOTOR_ARBOLES=1``, el motor vectorizado de
+``ltbi.arboles`` cuando el pack lo incluye. Está apagado por defecto: por
+núcleo no supera al ``predict`` nativo y la compilación con numba se paga en
+las primeras peticiones, así que conviene activarlo sólo si ``benchmark.py``
+muestra una mejora en la máquina de despliegue. numba es un extra opcional
+(``requirements-motor.txt``); sin él, el motor usa NumPy.
+"""
+import glob
+import os
+import threading
+from collections.abc import Mapping
+
+import pandas as pd
+
+from ltbi import formato_pack
+
+DIR_CACHE = ".cache"
+USAR_MOTOR_ARBOLES = os.environ.get("LTBI_MOTOR_ARBOLES", "0") == "1"
+
+
+class PackPerezoso(Mapping):
+    """Vista tipo dict de un pack: métricas desde el manifest, arreglos en
+    mmap y el estimador al primer acceso."""
+
+    CLAVES = ("nombre", "modelo", "X_test", "y_test", "y_pred", "metricas")
+
+    def __init__(self, registro, nombre):
+        self._registro = registro
+        self._nombre = nombre
+
+    def __getitem__(self, clave):
+        if clave == "nombre":
+            return self._nombre
+        if clave == "metricas":
+            return self._registro.metricas(self._nombre)
+        if clave == "modelo":
+            return self._registro.modelo(self._nombre)
+        if clave == "X_test":
+            entrada = self._registro.entrada(self._nombre)
+            return pd.DataFrame(self._registro.arrays(self._nombre)["X_test"],
+                                columns=entrada["columnas"] or None)
+        if clave in ("y_test", "y_pred"):
+            return self._registro.arrays(self._nombre)[clave]
+        raise KeyError(clave)
+
+    def __iter__(self):
+        return iter(self.CLAVES)
+
+    def __len__(self):
+        return len(self.CLAVES)
+
+
+class RegistroModelos(Mapping):
+    """Mapea nombre de modelo -> ``PackPerezoso``, ordenado por R2_test."""
+
+    def __init__(self, directorio="models", dir_cache=None):
+        """``dir_cache``: dónde convertir los pickles (``<directorio>/.cache``)."""
+        self.directorio = directorio
+        self.dir_cache = dir_cache or os.path.join(directorio, DIR_CACHE)
+        self._lock = threading.Lock()
+        self._modelos = {}
+        self._motores = {}
+        self._arrays = {}
+        self._entradas = self._escanear()
+
+    # --- Descubrimiento ---
+    def _escanear(self):
+        entradas = {}
+        for carpeta in sorted(glob.glob(os.path.join(self.directorio, "*", ""))):
+            if formato_pack.es_pack(carpeta):
+                self._agregar(entradas, carpeta)
+
+        for ruta in sorted(glob.glob(os.path.join(self.directorio, "*.pkl"))):
+            id_pack = os.path.splitext(os.path.basename(ruta))[0]
+            if formato_pack.es_pack(os.path.join(self.directorio, id_pack)):
+                continue  # ya convertido junto al pickle
+            carpeta = os.path.join(self.dir_cache, id_pack)
+            try:
+                if not self._conversion_vigente(carpeta, ruta):
+                    formato_pack.convertir_pickle(ruta, carpeta)
+            except Exception as e:  # pack corrupto o incompatible: se omite
+                print(f"⚠️ No se pudo convertir {os.path.basename(ruta)}: {e}")
+                continue
+            self._agregar(entradas, carpeta)
+
+        orden = sorted(
+            entradas.values(),
+            key=lambda e: -float(e["metricas"].get("R2_test", float("-inf")))
+        )
+        return {e["nombre"]: e for e in orden}
+
+    @staticmethod
+    def _conversion_vigente(carpeta, ruta_pkl):
+        if not formato_pack.es_pack(carpeta):
+            return False
+        manifest = formato_pack.leer_manifest(carpeta)
+        if manifest.get("formato") != formato_pack.FORMATO:
+            return False
+        origen = manifest.get("origen") or {}
+        return origen.get("firma") == formato_pack.firma_archivo(ruta_pkl)
+
+    @staticmethod
+    def _agregar(entradas, carpeta):
+        manifest = formato_pack.leer_manifest(carpeta)
+        if manifest["nombre"] in entradas:
+            return
+        entradas[manifest["nombre"]] = {
+            "carpeta": carpeta,
+            "nombre": manifest["nombre"],
+            "version": manifest["version"],
+            "metricas": manifest["metricas"],
+            "columnas": manifest.get("columnas", []),
+            "n_test": manifest["n_test"],
+            "manifest": manifest,
+        }
+
+    # --- Acceso ---
+    def entrada(self, nombre):
+        return self._entradas[nombre]
+
+    def version(self, nombre):
+        return self._entradas[nombre]["version"]
+
+    def metricas(self, nombre):
+        return self._entradas[nombre]["metricas"]
+
+    def arrays(self, nombre):
+        arrays = self._arrays.get(nombre)
+        if arrays is None:
+            entrada = self._entradas[nombre]
+            arrays = formato_pack.cargar_arrays(entrada["carpeta"], entrada["manifest"])
+            self._arrays[nombre] = arrays
+        return arrays
+
+    def modelo(self, nombre):
+        with self._lock:
+            modelo = self._modelos.get(nombre)
+            if modelo is None:
+                entrada = self._entradas[nombre]
+                modelo = formato_pack.cargar_modelo(entrada["carpeta"], entrada["manifest"])
+                self._modelos[nombre] = modelo
+        return modelo
+
+    def motor(self, nombre):
+        """Predictor para lotes: ``MotorArboles`` si el pack lo trae, si no el estimador."""
+        if not USAR_MOTOR_ARBOLES:
+            return self.modelo(nombre)
+        with self._lock:
+            if nombre not in self._motores:
+                entrada = self._entradas[nombre]
+                self._motores[nombre] = formato_pack.cargar_motor(entrada["carpeta"], entrada["manifest"])
+            motor = self._motores[nombre]
+        return motor if motor is not None else self.modelo(nombre)
+
+    def precargar(self):
+        """Carga estimadores, motores y arreglos de todos los packs (p. ej. en
+        el maestro de gunicorn antes del fork, para compartirlos por CoW)."""
+        for nombre in self:
+            self.modelo(nombre)
+            self.motor(nombre)
+            self.arrays(nombre)
+
+    # --- Interfaz Mapping (compatible con el antiguo dict modelos_pack) ---
+    def __getitem__(self, nombre):
+        if nombre not in self._entradas:
+            raise KeyError(nombre)
+        return PackPerezoso(self, nombre)
+
+    def __iter__(self):
+        return iter(self._entradas)
+
+    def __len__(self):
+        return len(self._entradas)
@@ -0,0 +1,126 @@
+"""
+Histogramas y boxplots del EDA3 resumidos en el servidor.
+
+En modo ``"resumen"`` (por defecto) sólo viajan al navegador los conteos por
+bin y los cinco números del boxplot (más la lista de atípicos), así que el
+tamaño de la respuesta no crece con el número de filas. El modo ``"crudo"``
+conserva el comportamiento original (``marginal="rug"`` y ``points="all"``).
+"""
+import os
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from ltbi.cache import CacheLRU, serializar_figura
+from ltbi.metricas import fase
+
+COLOR_EDA = "#2C3E50"
+MAX_ATIPICOS = 1000
+
+
+def resumen_histograma(valores, nbins=30):
+    valores = np.asarray(valores, dtype=np.float64)
+    valores = valores[~np.isnan(valores)]
+    conteos, bordes = np.histogram(valores, bins=nbins)
+    return {"conteos": conteos, "bordes": bordes}
+
+
+def resumen_caja(valores, max_atipicos=MAX_ATIPICOS):
+    """Cinco números de Tukey (bigotes a 1.5·IQR) y los valores atípicos."""
+    valores = np.asarray(valores, dtype=np.float64)
+    valores = valores[~np.isnan(valores)]
+    q1, mediana, q3 = np.quantile(valores, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+    atipicos = valores[(valores < q1 - 1.5 * iqr) | (valores > q3 + 1.5 * iqr)]
+    if atipicos.size > max_atipicos:
+        # Conserva los más extremos respecto de la mediana
+        orden = np.argsort(np.abs(atipicos - mediana))[-max_atipicos:]
+        atipicos = atipicos[orden]
+    return {
+        "q1": q1, "mediana": mediana, "q3": q3,
+        "bigote_inf": dentro.min() if dentro.size else q1,
+        "bigote_sup": dentro.max() if dentro.size else q3,
+        "media": valores.mean(),
+        "atipicos": np.sort(atipicos),
+        "n": int(valores.size),
+    }
+
+
+@fase("figura")
+def figuras_resumidas(variable, hist, caja):
+    bordes = hist["bordes"]
+    fig_hist = go.Figure(go.Bar(
+        x=(bordes[:-1] + bordes[1:]) / 2,
+        y=hist["conteos"],
+        width=np.diff(bordes),
+        marker_color=COLOR_EDA,
+        name=variable,
+    ))
+    fig_hist.update_layout(
+        title=f"Histograma — {variable}",
+        xaxis_title=variable, yaxis_title="count",
+        bargap=0, template="plotly_white"
+    )
+
+    fig_box = go.Figure(go.Box(
+        x=[variable],
+        q1=[caja["q1"]], median=[caja["mediana"]], q3=[caja["q3"]],
+        lowerfence=[caja["bigote_inf"]], upperfence=[caja["bigote_sup"]],
+        mean=[caja["media"]],
+        marker_color=COLOR_EDA, name=variable, boxpoints=False,
+    ))
+    if caja["atipicos"].size:
+        fig_box.add_trace(go.Scatter(
+            x=[variable] * caja["atipicos"].size, y=caja["atipicos"],
+            mode="markers", marker=dict(color=COLOR_EDA, size=5),
+            name="Atípicos", showlegend=False,
+        ))
+    fig_box.update_layout(
+        title=f"Boxplot — {variable} (n={caja['n']})",
+        yaxis_title=variable, template="plotly_white"
+    )
+    return fig_hist, fig_box
+
+
+@fase("figura")
+def figuras_crudas(df, variable):
+    fig_hist = px.histogram(
+        df, x=variable, nbins=30, marginal="rug",
+        title=f"Histograma — {variable}",
+        color_discrete_sequence=[COLOR_EDA]
+    )
+    fig_hist.update_layout(template="plotly_white")
+
+    fig_box = px.box(
+        df, y=variable, points="all",
+        title=f"Boxplot — {variable}",
+        color_discrete_sequence=[COLOR_EDA]
+    )
+    fig_box.update_layout(template="plotly_white")
+    return fig_hist, fig_box
+
+
+class CacheFigurasEDA:
+    """Histograma y boxplot serializados por (columna, versión de datos)."""
+
+    def __init__(self, df, version, modo=None, maxsize=64):
+        self.df = df
+        self.version = version
+        self.modo = modo or os.environ.get("LTBI_EDA_MODO", "resumen")
+        self._cache = CacheLRU(maxsize)
+
+    def _construir(self, variable):
+        if self.modo == "crudo":
+            figuras = figuras_crudas(self.df, variable)
+        else:
+            valores = self.df[variable].to_numpy(dtype=np.float64)
+            figuras = figuras_resumidas(
+                variable, resumen_histograma(valores), resumen_caja(valores)
+            )
+        return tuple(serializar_figura(f) for f in figuras)
+
+    def obtener(self, variable):
+        clave = (variable, self.version, self.modo)
+        return self._cache.obtener(clave, lambda: self._construir(variable))
@@ -0,0 +1,63 @@
+"""
+Caché de layouts de sección ya serializados para el router ``mostrar_contenido``.
+
+Cada sección se construye una sola vez por versión de datos y se guarda en su
+forma JSON (``{"type", "namespace", "props"}``), que Dash acepta tal cual como
+``children``; navegar entre secciones se reduce a una búsqueda.
+"""
+import json
+import threading
+
+import plotly.express as px
+from plotly.io.json import to_json_plotly
+
+from ltbi.cache import serializar_figura
+from ltbi.metricas import fase
+
+
+def serializar_componente(componente):
+    return json.loads(to_json_plotly(componente))
+
+
+@fase("figura")
+def figura_evolucion_regiones(cubo, metrica="prevalencia_contactos"):
+    """Figura del EDA2 (media por región y año) a partir del cubo de agregados."""
+    matriz = cubo.matriz_region_anio(metrica, cubo.anio_min, cubo.anio_max)
+    datos = (
+        matriz.T.stack().rename("media_prevalencia").reset_index()
+        .sort_values([cubo.col_anio, cubo.col_region])
+    )
+    fig = px.line(
+        datos, x=cubo.col_anio, y="media_prevalencia", color=cubo.col_region,
+        title="Evolución de la prevalencia LTBI por región OMS",
+        markers=True, template="plotly_white"
+    )
+    return serializar_figura(fig)
+
+
+class CacheSecciones:
+    def __init__(self, constructor, version):
+        """``constructor(boton_id)`` arma el layout; ``version()`` devuelve la
+        versión actual de los datos de los que depende."""
+        self._constructor = constructor
+        self._version = version
+        self._layouts = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, boton_id):
+        clave = (boton_id, self._version())
+        layout = self._layouts.get(clave)
+        if layout is None:
+            with self._lock:
+                layout = self._layouts.get(clave)
+                if layout is None:
+                    layout = serializar_componente(self._constructor(boton_id))
+                    # Sólo se conserva la versión vigente de cada sección
+                    for vieja in [k for k in self._layouts if k[0] == boton_id]:
+                        del self._layouts[vieja]
+                    self._layouts[clave] = layout
+        return layout
+
+    def precalentar(self, botones):
+        for boton_id in botones:
+            self.obtener(boton_id)
@@ -0,0 +1,105 @@
+"""
+Líneas de tendencia vectorizadas con NumPy (sin statsmodels).
+
+``ajuste_lineal`` obtiene pendiente, intercepto y R² en forma cerrada a partir
+de las sumas de una sola pasada; ``lowess_binned`` suaviza sobre medias por
+bin, así que su costo no depende del número de puntos. Ambas descartan los
+pares con NaN o infinitos.
+"""
+import numpy as np
+from scipy import stats
+
+
+def _finitos(x, y):
+    """Pares ``(x, y)`` como float64, sin los que tienen NaN o infinitos."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    validos = np.isfinite(x) & np.isfinite(y)
+    return x[validos], y[validos]
+
+
+def ajuste_lineal(x, y):
+    x, y = _finitos(x, y)
+    n = x.size
+    if n < 3:
+        raise ValueError("Se necesitan al menos 3 puntos para ajustar la tendencia.")
+
+    x_media = x.mean()
+    y_media = y.mean()
+    dx = x - x_media
+    dy = y - y_media
+    sxx = dx @ dx
+    sxy = dx @ dy
+    syy = dy @ dy
+
+    pendiente = sxy / sxx if sxx > 0 else 0.0
+    intercepto = y_media - pendiente * x_media
+    ssr = max(syy - pendiente * sxy, 0.0)
+    r2 = 1.0 - ssr / syy if syy > 0 else 1.0
+
+    return {
+        "pendiente": float(pendiente),
+        "intercepto": float(intercepto),
+        "r2": float(r2),
+        "n": int(n),
+        "x_media": float(x_media),
+        "sxx": float(sxx),
+        "s2": float(ssr / (n - 2)),
+        "x_min": float(x.min()),
+        "x_max": float(x.max()),
+    }
+
+
+def evaluar_tendencia(ajuste, x_eval, nivel=None):
+    """Evalúa la recta en ``x_eval``. Con ``nivel`` (p. ej. 0.95) devuelve
+    también la banda de confianza de la media: ``(y, y_inf, y_sup)``."""
+    x_eval = np.asarray(x_eval, dtype=np.float64)
+    y = ajuste["intercepto"] + ajuste["pendiente"] * x_eval
+    if nivel is None:
+        return y
+
+    t = stats.t.ppf(0.5 + nivel / 2, ajuste["n"] - 2)
+    se = np.sqrt(ajuste["s2"] * (1.0 / ajuste["n"]
+                                 + (x_eval - ajuste["x_media"]) ** 2 / ajuste["sxx"]))
+    return y, y - t * se, y + t * se
+
+
+def lowess_binned(x, y, n_bins=50, frac=0.3):
+    """LOWESS (regresión local lineal con pesos tricúbicos) sobre las medias
+    de ``n_bins`` bins de ``x``, ponderadas por el número de puntos de cada bin.
+
+    Devuelve ``(x_centros, y_suavizado)`` para los bins no vacíos.
+    """
+    x, y = _finitos(x, y)
+    if x.size == 0:
+        return x, y
+
+    bordes = np.linspace(x.min(), x.max(), n_bins + 1)
+    idx = np.clip(np.searchsorted(bordes, x, side="right") - 1, 0, n_bins - 1)
+    conteo = np.bincount(idx, minlength=n_bins).astype(np.float64)
+    suma_x = np.bincount(idx, weights=x, minlength=n_bins)
+    suma_y = np.bincount(idx, weights=y, minlength=n_bins)
+
+    llenos = conteo > 0
+    w = conteo[llenos]
+    xb = suma_x[llenos] / w
+    yb = suma_y[llenos] / w
+
+    # --- Pesos tricúbicos para cada punto de evaluación (matriz bins x bins) ---
+    k = max(int(np.ceil(frac * xb.size)), 2)
+    dist = np.abs(xb[:, None] - xb[None, :])
+    radio = np.partition(dist, min(k, xb.size - 1), axis=1)[:, min(k, xb.size - 1)]
+    radio = np.where(radio > 0, radio, 1.0)
+    pesos = np.clip(1 - (dist / radio[:, None]) ** 3, 0, None) ** 3 * w[None, :]
+
+    # --- Mínimos cuadrados ponderados locales, todos a la vez ---
+    s0 = pesos.sum(axis=1)
+    s1 = pesos @ xb
+    s2 = pesos @ (xb ** 2)
+    t0 = pesos @ yb
+    t1 = pesos @ (xb * yb)
+    det = s0 * s2 - s1 ** 2
+    seguro = np.abs(det) > 1e-12
+    b = np.where(seguro, (s0 * t1 - s1 * t0) / np.where(seguro, det, 1.0), 0.0)
+    a = (t0 - b * s1) / s0
+    return xb, a + b * xb
@@ -0,0 +1,83 @@
+"""
+Callbacks en segundo plano: cola en disco y procesos acotados.
+
+``GestorTrabajos`` es el ``DiskcacheManager`` de Dash con dos cambios:
+
+- Los trabajos corren en procesos aparte (nunca en el hilo del worker web,
+  que sólo encola y luego responde a los sondeos del navegador), pero como
+  mucho ``LTBI_TRABAJOS_MAX`` a la vez entre todos los workers; el resto
+  espera turno. Los turnos son claves en el mismo ``diskcache`` con el pid
+  que los ocupa, así que el de un trabajo cancelado (proceso terminado) se
+  recupera solo.
+- Los resultados se guardan por (callback, entradas, versión de datos y
+  packs) durante ``LTBI_TRABAJOS_EXPIRA`` segundos y se reutilizan.
+
+Almacén: ``LTBI_TRABAJOS_DIR`` (``data/.cache/trabajos``).
+"""
+import contextlib
+import os
+import time
+
+import diskcache
+import psutil
+from dash import DiskcacheManager
+
+DIR_TRABAJOS = os.environ.get("LTBI_TRABAJOS_DIR", os.path.join("data", ".cache", "trabajos"))
+MAX_TRABAJOS = int(os.environ.get("LTBI_TRABAJOS_MAX", max(1, (os.cpu_count() or 1) // 2)))
+EXPIRA_SEGUNDOS = float(os.environ.get("LTBI_TRABAJOS_EXPIRA", 24 * 3600))
+
+
+def _vivo(pid):
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+@contextlib.contextmanager
+def turno(cache, maximo, espera=0.2):
+    """Ocupa uno de ``maximo`` turnos compartidos entre procesos."""
+    pid = os.getpid()
+    clave = None
+    while clave is None:
+        with cache.transact(retry=True):
+            for i in range(maximo):
+                dueno = cache.get(f"turno-{i}")
+                if dueno is None or not _vivo(dueno):
+                    clave = f"turno-{i}"
+                    cache.set(clave, pid)
+                    break
+        if clave is None:
+            time.sleep(espera)
+    try:
+        yield
+    finally:
+        with cache.transact(retry=True):
+            if cache.get(clave) == pid:
+                cache.delete(clave)
+
+
+class GestorTrabajos(DiskcacheManager):
+    def __init__(self, version, directorio=DIR_TRABAJOS, maximo=MAX_TRABAJOS, expira=EXPIRA_SEGUNDOS):
+        """``version()`` devuelve la versión vigente de datos y modelos."""
+        super().__init__(diskcache.Cache(directorio), cache_by=[version], expire=expira)
+        self.maximo = maximo
+
+    def make_job_fn(self, fn, progress, key=None):
+        job_fn = super().make_job_fn(fn, progress, key)
+        cache, maximo = self.handle, self.maximo
+
+        def con_turno(clave_resultado, *args):
+            # Proceso recién creado: no reutilizar la conexión SQLite del padre
+            cache.close()
+            # Dash lanza el proceso aunque el resultado ya esté guardado
+            if cache.get(clave_resultado) is not None:
+                return
+            with turno(cache, maximo):
+                job_fn(clave_resultado, *args)
+
+        return con_turno
+
+    def cerrar(self):
+        """Cierra la conexión SQLite; debe llamarse en el maestro antes del fork."""
+        self.handle.close()
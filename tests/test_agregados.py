@@ -0,0 +1,70 @@
+"""El cubo de sumas acumuladas debe dar lo mismo que filtrar y agrupar con pandas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ltbi.agregados import CuboAgregados
+
+METRICA = "prevalencia_contactos"
+RANGOS = [(2015, 2015), (2015, 2024), (2017, 2020), (2019, 2023), (2010, 2030)]
+
+
+def _tabla(semilla=0):
+    rng = np.random.default_rng(semilla)
+    n = 400
+    df = pd.DataFrame({
+        "anio": rng.choice([2015, 2016, 2017, 2019, 2020, 2022, 2024], n),  # años sin filas
+        "region_OMS": rng.choice(["AFR", "AMR", "EMR", "EUR", "SEA"], n),
+        METRICA: rng.gamma(2.0, 5.0, n),
+        "prevalencia_inferior": rng.gamma(2.0, 3.0, n),
+        "prevalencia_superior": rng.gamma(2.0, 8.0, n),
+    })
+    df.loc[rng.random(n) < 0.1, METRICA] = np.nan
+    # Una región sin datos en 2024
+    return df[~((df["region_OMS"] == "EUR") & (df["anio"] == 2024))].reset_index(drop=True)
+
+
+def _filtrar(df, anio_min, anio_max):
+    return df[df["anio"].between(anio_min, anio_max)]
+
+
+@pytest.mark.parametrize("anio_min,anio_max", RANGOS)
+def test_cubo_igual_a_pandas(anio_min, anio_max):
+    df = _tabla()
+    cubo = CuboAgregados(df)
+    sub = _filtrar(df, anio_min, anio_max)
+
+    assert cubo.media(METRICA, anio_min, anio_max) == pytest.approx(sub[METRICA].mean())
+
+    serie = sub.groupby("anio", as_index=False)[METRICA].mean().dropna()
+    serie = serie.rename(columns={METRICA: "media_prevalencia"})
+    pd.testing.assert_frame_equal(
+        cubo.serie_global(METRICA, anio_min, anio_max).reset_index(drop=True), serie,
+        check_dtype=False,
+    )
+
+    matriz = sub.pivot_table(index="region_OMS", columns="anio", values=METRICA, aggfunc="mean")
+    obtenida = cubo.matriz_region_anio(METRICA, anio_min, anio_max)
+    pd.testing.assert_frame_equal(obtenida, matriz.reindex_like(obtenida),
+                                  check_dtype=False, check_names=False)
+    assert list(obtenida.index) == list(matriz.index)
+    assert list(obtenida.columns) == list(matriz.columns)
+
+    # Métrica derivada
+    amplitud = sub["prevalencia_superior"] - sub["prevalencia_inferior"]
+    assert cubo.media("amplitud_intervalo", anio_min, anio_max) == pytest.approx(amplitud.mean())
+
+
+def test_con_cambios_igual_a_reconstruir():
+    df = _tabla()
+    cubo = CuboAgregados(df)
+    nuevo = df.copy()
+    en_2017 = nuevo["anio"] == 2017
+    nuevo.loc[en_2017, METRICA] = nuevo.loc[en_2017, METRICA] * 2
+
+    parcial = cubo.con_cambios(nuevo, {2017})
+    completo = CuboAgregados(nuevo)
+    np.testing.assert_allclose(parcial.sumas_acum, completo.sumas_acum)
+    np.testing.assert_array_equal(parcial.conteos_acum, completo.conteos_acum)
+    # El cubo original no cambia
+    assert cubo.media(METRICA, 2017, 2017) == pytest.approx(_filtrar(df, 2017, 2017)[METRICA].mean())
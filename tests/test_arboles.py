@@ -0,0 +1,43 @@
+"""El motor de árboles debe predecir lo mismo que el estimador de cada pack."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ltbi import arboles, formato_pack
+from ltbi.registro import RegistroModelos
+
+DIR_MODELOS = os.path.join(os.path.dirname(__file__), os.pardir, "models")
+TOLERANCIA = 1e-9
+
+
+@pytest.fixture(scope="module")
+def registro(tmp_path_factory):
+    # Los pickles se convierten en un directorio temporal, no en models/.cache
+    return RegistroModelos(DIR_MODELOS, dir_cache=str(tmp_path_factory.mktemp("packs")))
+
+
+def _packs_con_arboles(registro):
+    packs = [n for n in registro if "arboles" in registro.entrada(n)["manifest"]["modelo"]]
+    assert packs, "Ningún pack trae arboles.npz"
+    return packs
+
+
+def _caso(registro, nombre):
+    entrada = registro.entrada(nombre)
+    motor = formato_pack.cargar_motor(entrada["carpeta"], entrada["manifest"])
+    X = pd.DataFrame(np.asarray(registro.arrays(nombre)["X_test"]), columns=entrada["columnas"])
+    esperado = np.asarray(registro.modelo(nombre).predict(X), dtype=np.float64)
+    return motor, X, esperado
+
+
+@pytest.mark.parametrize("con_numba", [True, False], ids=["numba", "numpy"])
+def test_motor_igual_al_estimador(registro, con_numba, monkeypatch):
+    if not con_numba:
+        monkeypatch.setattr(arboles, "_kernel", lambda: None)
+    for nombre in _packs_con_arboles(registro):
+        motor, X, esperado = _caso(registro, nombre)
+        np.testing.assert_allclose(
+            motor.predict(X), esperado, rtol=0, atol=TOLERANCIA, err_msg=nombre
+        )
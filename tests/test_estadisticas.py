@@ -0,0 +1,53 @@
+"""Combinar momentos por lotes debe dar lo mismo que pandas sobre todas las filas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ltbi.estadisticas import CUANTILES, EstadisticasDescriptivas
+
+
+def _tabla(n, semilla):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        "a": rng.gamma(2.0, 5.0, n),
+        "b": rng.normal(100.0, 20.0, n),
+        "c": rng.exponential(3.0, n),
+        "pais": rng.choice(["x", "y"], n),  # no numérica: se ignora
+    })
+    df.loc[rng.random(n) < 0.1, "b"] = np.nan
+    return df
+
+
+def _comparar(estadisticas, df):
+    numericas = df[estadisticas.columnas]
+    np.testing.assert_allclose(estadisticas.media, numericas.mean(), rtol=1e-10)
+    np.testing.assert_allclose(estadisticas.varianza, numericas.var(), rtol=1e-10)
+    np.testing.assert_allclose(estadisticas.asimetria, numericas.skew(), rtol=1e-8)
+    np.testing.assert_allclose(estadisticas.minimo, numericas.min())
+    np.testing.assert_allclose(estadisticas.maximo, numericas.max())
+    np.testing.assert_array_equal(estadisticas.faltantes, numericas.isna().sum())
+    np.testing.assert_allclose(estadisticas.cuantiles, numericas.quantile(list(CUANTILES)))
+
+
+@pytest.mark.filterwarnings("ignore:All-NaN slice:RuntimeWarning")
+@pytest.mark.parametrize("tamanos", [(500, 1), (500, 120, 3, 40), (5, 700)])
+def test_agregar_filas_igual_a_pandas(tamanos):
+    lotes = [_tabla(n, semilla) for semilla, n in enumerate(tamanos)]
+    # Columna sin ningún valor en el primer lote
+    lotes[0]["c"] = np.nan
+    estadisticas = EstadisticasDescriptivas(lotes[0])
+    for lote in lotes[1:]:
+        estadisticas.agregar_filas(lote)
+    _comparar(estadisticas, pd.concat(lotes, ignore_index=True))
+
+
+def test_con_filas_no_modifica_el_original():
+    base, nuevas = _tabla(300, 0), _tabla(50, 1)
+    original = EstadisticasDescriptivas(base)
+    version = original.version
+    combinadas = original.con_filas(nuevas)
+
+    _comparar(original, base)
+    assert original.version == version
+    _comparar(combinadas, pd.concat([base, nuevas], ignore_index=True))
+    assert combinadas.version != version
@@ -0,0 +1,101 @@
+"""La ingesta por bloques debe coincidir con leer y unir los CSV con pandas."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from ltbi import ingesta
+
+DIR_DATOS = os.path.join(os.path.dirname(__file__), os.pardir, "data")
+RUTA_LTBI = ingesta.archivo_reciente(ingesta.PATRON_LTBI, DIR_DATOS)
+RUTA_CARGA = ingesta.archivo_reciente(ingesta.PATRON_CARGA, DIR_DATOS)
+RUTA_REFERENCIA = os.path.join(DIR_DATOS, "df_imputado.csv")
+NUMERICAS = ["prevalencia_contactos", "prevalencia_inferior", "prevalencia_superior",
+             "porcentaje_ninos", "elegibles_tratamiento"]
+
+
+def _por_clave(df):
+    return df.sort_values(ingesta.CLAVE_FILA).reset_index(drop=True)
+
+
+def test_lectura_por_bloques_igual_a_pandas():
+    esperado = pd.read_csv(RUTA_LTBI).rename(columns=ingesta.COLUMNAS_LTBI)
+    esperado = esperado[[c for c in ingesta.COLUMNAS_IMPUTADO if c in esperado.columns]]
+    obtenido = ingesta.leer_ltbi(RUTA_LTBI, filas_por_bloque=97)
+    pd.testing.assert_frame_equal(obtenido, esperado, check_dtype=False)
+
+    anios = obtenido["anio"].unique()
+    carga = pd.read_csv(RUTA_CARGA)[["iso3", "year", *ingesta.VARIABLES_CARGA]]
+    carga = carga[carga["year"].isin(anios)].drop_duplicates(["iso3", "year"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(ingesta.leer_carga(RUTA_CARGA, anios, filas_por_bloque=997), carga,
+                                  check_dtype=False)
+
+
+def test_imputacion_conserva_el_informe():
+    df_imputado, _ = ingesta.construir(RUTA_LTBI, RUTA_CARGA, ruta_referencia=RUTA_REFERENCIA)
+    informe = pd.read_csv(RUTA_REFERENCIA)
+    unida = df_imputado.astype({"country": str}).merge(informe, on=ingesta.CLAVE_FILA, suffixes=("", "_informe"))
+    assert len(unida) == len(informe)
+    for c in NUMERICAS:
+        np.testing.assert_allclose(unida[c], unida[f"{c}_informe"], rtol=1e-6, err_msg=c)
+
+
+def test_filas_nuevas_se_imputan(tmp_path):
+    # Un informe sin 2015: esas filas son "nuevas" y se imputan aquí
+    informe = pd.read_csv(RUTA_REFERENCIA)
+    referencia = tmp_path / "df_imputado.csv"
+    informe[informe["anio"] != 2015].to_csv(referencia, index=False)
+
+    df_imputado, _ = ingesta.construir(RUTA_LTBI, RUTA_CARGA, tipado=False, ruta_referencia=str(referencia))
+    propio = ingesta.imputar_ltbi(ingesta.leer_ltbi(RUTA_LTBI))
+    nuevas = df_imputado["anio"] == 2015
+    assert nuevas.any()
+    assert not df_imputado[NUMERICAS].isna().any().any()
+    pd.testing.assert_frame_equal(_por_clave(df_imputado[nuevas]), _por_clave(propio[propio["anio"] == 2015]))
+
+
+def test_tabla_modelo_igual_a_merge_de_pandas():
+    df_imputado, modelo = ingesta.construir(RUTA_LTBI, RUTA_CARGA, tipado=False,
+                                            ruta_referencia=RUTA_REFERENCIA)
+    carga = pd.read_csv(RUTA_CARGA)[["iso3", "year", *ingesta.VARIABLES_CARGA]]
+    unida = pd.merge(df_imputado, carga, left_on=["iso3", "anio"], right_on=["iso3", "year"])
+    for c in ingesta.VARIABLES_CARGA:
+        unida[c] = unida[c].fillna(unida.groupby("region_OMS")[c].transform("mean"))
+    esperado = unida.dropna(subset=ingesta.VARIABLES_CARGA)[ingesta.COLUMNAS_MODELO].reset_index(drop=True)
+    pd.testing.assert_frame_equal(modelo, esperado)
+
+
+def test_cache_se_invalida_al_cambiar_los_datos(tmp_path, monkeypatch):
+    referencia = tmp_path / "df_imputado.csv"
+    referencia.write_bytes(open(RUTA_REFERENCIA, "rb").read())
+    dir_cache = str(tmp_path / "cache")
+    construcciones = []
+    construir = ingesta.construir
+    monkeypatch.setattr(ingesta, "construir", lambda *a, **k: construcciones.append(1) or construir(*a, **k))
+
+    def cargar():
+        return ingesta.cargar(RUTA_LTBI, RUTA_CARGA, dir_cache=dir_cache, ruta_referencia=str(referencia))
+
+    primera, _ = cargar()
+    segunda, _ = cargar()
+    assert len(construcciones) == 1
+    pd.testing.assert_frame_equal(primera, segunda)
+
+    # Otra versión del informe: nueva firma, se reconstruye y se borra la anterior
+    informe = pd.read_csv(referencia)
+    informe["porcentaje_ninos"] = informe["porcentaje_ninos"] + 1
+    informe.to_csv(referencia, index=False)
+    tercera, _ = cargar()
+    assert len(construcciones) == 2
+    assert len([f for f in os.listdir(dir_cache) if f.endswith(".feather")]) == 2
+    np.testing.assert_allclose(tercera["porcentaje_ninos"], primera["porcentaje_ninos"] + 1, rtol=1e-6)
+
+
+def test_forzar_ignora_la_cache(tmp_path, monkeypatch):
+    construcciones = []
+    construir = ingesta.construir
+    monkeypatch.setattr(ingesta, "construir", lambda *a, **k: construcciones.append(1) or construir(*a, **k))
+    for _ in range(2):
+        ingesta.cargar(RUTA_LTBI, RUTA_CARGA, dir_cache=str(tmp_path), forzar=True,
+                       ruta_referencia=RUTA_REFERENCIA)
+    assert len(construcciones) == 2
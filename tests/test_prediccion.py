@@ -0,0 +1,110 @@
+"""Los micro-lotes deben devolver a cada petición sus propias predicciones."""
+import threading
+
+import flask
+import numpy as np
+import pandas as pd
+import pytest
+
+from ltbi.prediccion import ErrorPrediccion, MicroLotes, registrar_rutas
+
+COLUMNAS = ["a", "b"]
+
+
+class ModeloLineal:
+    """``a + 10 b``; falla si algún ``a`` es negativo."""
+
+    feature_names_in_ = np.array(COLUMNAS)
+
+    def __init__(self):
+        self.lotes = []
+
+    def predict(self, X):
+        self.lotes.append(len(X))
+        if (X["a"] < 0).any():
+            raise RuntimeError("a negativo")
+        return X["a"].to_numpy() + 10 * X["b"].to_numpy()
+
+
+def _filas(i, n):
+    # Columnas en otro orden: el servicio debe reordenarlas
+    return pd.DataFrame({"b": np.arange(n, dtype=float), "a": np.full(n, float(i))})
+
+
+def _en_paralelo(funcion, n):
+    hilos = [threading.Thread(target=funcion, args=(i,)) for i in range(n)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+
+def test_cada_peticion_recibe_sus_filas():
+    modelo = ModeloLineal()
+    lotes = MicroLotes("lineal", modelo, espera_ms=50)
+    futuros = {}
+
+    def enviar(i):
+        futuros[i] = lotes.enviar(_filas(i, 1 + i % 7))
+
+    _en_paralelo(enviar, 40)
+    for i, futuro in futuros.items():
+        filas = _filas(i, 1 + i % 7)
+        np.testing.assert_array_equal(futuro.result(timeout=10), filas["a"] + 10 * filas["b"])
+    assert max(modelo.lotes) > 7  # se agruparon peticiones
+    assert lotes.estadisticas()["filas"] == sum(1 + i % 7 for i in range(40))
+
+
+def test_un_error_solo_afecta_a_su_peticion():
+    modelo = ModeloLineal()
+    lotes = MicroLotes("lineal", modelo, espera_ms=50)
+    futuros = {}
+
+    def enviar(i):
+        futuros[i] = lotes.enviar(_filas(-1 if i == 3 else i, 4))
+
+    _en_paralelo(enviar, 10)
+    for i, futuro in futuros.items():
+        if i == 3:
+            with pytest.raises(RuntimeError, match="a negativo"):
+                futuro.result(timeout=10)
+        else:
+            np.testing.assert_array_equal(futuro.result(timeout=10), i + 10 * np.arange(4.0))
+    assert max(modelo.lotes) > 4  # falló un lote de varias peticiones, no sólo la suya
+
+
+def test_validacion_antes_de_encolar():
+    lotes = MicroLotes("lineal", ModeloLineal())
+    with pytest.raises(ErrorPrediccion, match="Faltan columnas: b"):
+        lotes.enviar(pd.DataFrame({"a": [1.0]}))
+    with pytest.raises(ErrorPrediccion, match="no numéricos"):
+        lotes.enviar(pd.DataFrame({"a": [1.0], "b": ["x"]}))
+
+
+class _Registro(dict):
+    def motor(self, nombre):
+        return ModeloLineal()
+
+    def entrada(self, nombre):
+        return {"columnas": COLUMNAS}
+
+
+@pytest.fixture
+def cliente():
+    server = flask.Flask(__name__)
+    registrar_rutas(server, _Registro(lineal=None))
+    return server.test_client()
+
+
+@pytest.mark.parametrize("cuerpo,estado", [
+    ({"modelo": "lineal", "filas": [{"a": 1, "b": 2}, {"a": 3, "b": 4}]}, 200),
+    ({"modelo": "otro", "fila": {"a": 1, "b": 2}}, 404),
+    ({"modelo": "lineal", "fila": {"a": "x", "b": 2}}, 400),
+    ({"modelo": "lineal", "fila": {"a": -1, "b": 2}}, 500),
+])
+def test_api_codigos_de_estado(cliente, cuerpo, estado):
+    respuesta = cliente.post("/api/prediccion", json=cuerpo)
+    assert respuesta.status_code == estado
+    assert respuesta.is_json
+    if estado == 200:
+        assert respuesta.json["predicciones"] == [21.0, 43.0]
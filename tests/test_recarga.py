@@ -0,0 +1,100 @@
+"""``Instantanea.derivar`` debe recalcular sólo los años que pandas ve distintos."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ltbi import ingesta
+from ltbi.agregados import CuboAgregados
+from ltbi.estadisticas import EstadisticasDescriptivas
+from ltbi.recarga import Instantanea, anios_cambiados
+
+DIR_DATOS = os.path.join(os.path.dirname(__file__), os.pardir, "data")
+
+
+@pytest.fixture(scope="module")
+def tablas():
+    return ingesta.construir(
+        ingesta.archivo_reciente(ingesta.PATRON_LTBI, DIR_DATOS),
+        ingesta.archivo_reciente(ingesta.PATRON_CARGA, DIR_DATOS),
+        ruta_referencia=os.path.join(DIR_DATOS, "df_imputado.csv"),
+    )
+
+
+@pytest.fixture(scope="module")
+def base(tablas):
+    return Instantanea.construir(*tablas, archivos=())
+
+
+def _anios_distintos(viejo, nuevo, columnas=None):
+    """Referencia en pandas: años de las filas que no aparecen en ambas tablas."""
+    columnas = columnas or list(viejo.columns)
+    viejo = viejo[columnas].astype({c: str for c in ("country", "iso3", "region_OMS") if c in columnas})
+    nuevo = nuevo[columnas].astype({c: str for c in ("country", "iso3", "region_OMS") if c in columnas})
+    unida = viejo.merge(nuevo, how="outer", on=columnas, indicator=True)
+    return sorted(int(a) for a in unida.loc[unida["_merge"] != "both", "anio"].unique())
+
+
+def _publicacion(df):
+    """Otra publicación: un valor cambia en 2018, se quita una fila de 2020
+    y sólo la tasa de niños cambia en 2022."""
+    df = df.copy()
+    df.loc[df.index[df["anio"] == 2018][0], "prevalencia_contactos"] += 1
+    df.loc[df["anio"] == 2022, "porcentaje_ninos"] += 1
+    return df.drop(index=df.index[df["anio"] == 2020][0]).reset_index(drop=True)
+
+
+def _comparar_con_reconstruccion(instantanea, df):
+    completo = CuboAgregados(df)
+    np.testing.assert_allclose(instantanea.cubo.sumas_acum, completo.sumas_acum)
+    np.testing.assert_array_equal(instantanea.cubo.conteos_acum, completo.conteos_acum)
+    esperadas = EstadisticasDescriptivas(df)
+    np.testing.assert_allclose(instantanea.estadisticas.media, esperadas.media, rtol=1e-10)
+    np.testing.assert_allclose(instantanea.estadisticas.varianza, esperadas.varianza, rtol=1e-8)
+    assert instantanea.estadisticas.version == esperadas.version
+
+
+def test_anios_cambiados_igual_a_pandas(tablas):
+    viejo = tablas[0]
+    nuevo = _publicacion(viejo)
+    assert anios_cambiados(viejo, nuevo) == _anios_distintos(viejo, nuevo) == [2018, 2020, 2022]
+    columnas = ["anio", "iso3", "country", "prevalencia_contactos"]
+    assert anios_cambiados(viejo, nuevo, columnas) == _anios_distintos(viejo, nuevo, columnas) == [2018, 2020]
+    assert anios_cambiados(viejo, viejo.copy()) == []
+    assert anios_cambiados(viejo, viejo.drop(columns="iso3")) is None
+
+
+def test_derivar_recalcula_solo_los_anios_cambiados(tablas, base):
+    df, modelo = tablas
+    nuevo = _publicacion(df)
+    derivada, anios = base.derivar(nuevo, modelo, ())
+
+    assert anios == {"cubo": [2018, 2020, 2022], "mapas": [2018, 2020]}
+    _comparar_con_reconstruccion(derivada, nuevo)
+    completa = Instantanea.construir(nuevo, modelo, ())
+    for anio in range(2015, 2024):
+        assert derivada.mapas.obtener(anio) == completa.mapas.obtener(anio)
+        if anio not in anios["mapas"]:
+            assert derivada.mapas.obtener(anio) is base.mapas.obtener(anio)
+    # La instantánea anterior sigue intacta
+    _comparar_con_reconstruccion(base, df)
+
+
+def test_derivar_con_filas_agregadas(tablas, base):
+    df, modelo = tablas
+    nuevas = df[df["anio"] == 2023].head(5).copy()
+    nuevas["prevalencia_contactos"] = nuevas["prevalencia_contactos"] * 2
+    nuevo = pd.concat([df, nuevas], ignore_index=True)
+    derivada, anios = base.derivar(nuevo, modelo, ())
+
+    assert anios["cubo"] == [2023]
+    _comparar_con_reconstruccion(derivada, nuevo)
+
+
+def test_derivar_completa_si_cambian_las_columnas(tablas, base):
+    df, modelo = tablas
+    nuevo = df.assign(extra=1.0)
+    derivada, anios = base.derivar(nuevo, modelo, ())
+    assert anios is None
+    assert list(derivada.df_imputado.columns) == list(nuevo.columns)
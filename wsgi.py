@@ -0,0 +1,26 @@
+"""
+Punto de entrada WSGI para producción (gunicorn, ver ``gunicorn.conf.py``).
+
+Con ``preload_app`` este módulo se importa una sola vez en el proceso
+maestro: datos, agregados, secciones y packs de modelos quedan cargados
+antes del fork y los workers los comparten copy-on-write.
+"""
+import gc
+
+from app import cache_callbacks, modelos_pack, perfilador, server, trabajos
+
+# Estimadores y motores de árboles en el maestro (el registro es perezoso)
+modelos_pack.precargar()
+
+# Las conexiones SQLite no deben cruzar el fork; cada worker abre las suyas
+cache_callbacks.cerrar()
+perfilador.cerrar()
+trabajos.cerrar()
+
+# Los objetos heredados pasan a la generación permanente: el GC de cada
+# worker no los recorre ni escribe en sus cabeceras, así que sus páginas
+# siguen compartidas.
+gc.collect()
+gc.freeze()
+
+application = server